@@ -0,0 +1,103 @@
+"""
+Async versions of the read-heavy vendor portal endpoints.
+
+Served at the same URLs as the matching VendorDashboardViewSet actions
+when ASYNC_VENDOR_PORTAL is on. Rows are loaded with the async ORM, and the
+dashboard's independent aggregates are awaited together with
+asyncio.gather. Under ASGI a worker's event loop keeps serving other
+vendor sessions while these queries wait, instead of parking a thread
+per request.
+
+Responses match the DRF actions: the same querysets and serializers,
+session authentication only, and 403 for unauthenticated or non-vendor
+users.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .mixins import resolve_vendor_id
+from .serializers import (
+    InvoiceSerializer, RequestForQuotationSerializer,
+    VendorPurchaseOrderSerializer, VendorQuotationSerializer,
+)
+from .views import VendorDashboardViewSet
+
+
+# Queryset and aggregate builders shared with the sync actions
+portal = VendorDashboardViewSet()
+
+
+async def _vendor_id_or_error(request):
+    """Return (vendor_id, None) or (None, error response)"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None, JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    # resolve_vendor_id reads request.user and the session synchronously
+    request.user = user
+    vendor_id = await sync_to_async(resolve_vendor_id)(request)
+    if not vendor_id:
+        return None, JsonResponse({'error': 'No vendor account associated with this user'}, status=403)
+    return vendor_id, None
+
+
+async def _serialize(queryset, serializer_class):
+    rows = [row async for row in queryset]
+    # Everything the serializers read is joined or prefetched; only rendering runs sync
+    return await sync_to_async(lambda: serializer_class(rows, many=True).data)()
+
+
+async def _list(request, build_queryset, serializer_class, filter_status=True):
+    vendor_id, error = await _vendor_id_or_error(request)
+    if error:
+        return error
+
+    queryset = build_queryset(vendor_id)
+    status_filter = request.GET.get('status')
+    if filter_status and status_filter:
+        queryset = queryset.filter(status=status_filter)
+    return JsonResponse(await _serialize(queryset, serializer_class), safe=False)
+
+
+@require_GET
+async def vendor_dashboard_stats(request):
+    """GET /api/vendor-dashboard/dashboard_stats/"""
+    vendor_id, error = await _vendor_id_or_error(request)
+    if error:
+        return error
+
+    results = await asyncio.gather(*(
+        queryset.aaggregate(**aggregates)
+        for queryset, aggregates in portal.get_stats_aggregates(vendor_id)
+    ))
+    stats = {}
+    for result in results:
+        stats.update(result)
+    return JsonResponse(stats)
+
+
+@require_GET
+async def vendor_rfqs(request):
+    """GET /api/vendor-dashboard/my_rfqs/?status="""
+    return await _list(request, portal.get_rfq_queryset, RequestForQuotationSerializer)
+
+
+@require_GET
+async def vendor_quotations(request):
+    """GET /api/vendor-dashboard/my_quotations/?status="""
+    return await _list(request, portal.get_quotation_queryset, VendorQuotationSerializer)
+
+
+@require_GET
+async def vendor_purchase_orders(request):
+    """GET /api/vendor-dashboard/my_purchase_orders/?status="""
+    return await _list(request, portal.get_purchase_order_queryset, VendorPurchaseOrderSerializer)
+
+
+@require_GET
+async def vendor_invoices(request):
+    """GET /api/vendor-dashboard/my_invoices/"""
+    return await _list(request, portal.get_invoice_queryset, InvoiceSerializer, filter_status=False)
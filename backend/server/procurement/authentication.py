@@ -0,0 +1,65 @@
+"""
+Stateless signed-token authentication.
+
+Tokens are `django.core.signing` payloads carrying the user id and a slice
+of the session auth hash, so they expire after SIMPLE_JWT's
+ACCESS_TOKEN_LIFETIME and stop working as soon as the password changes.
+Requests authenticated this way never touch django_session.
+
+Send the token as `Authorization: Bearer <token>`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from rest_framework import authentication, exceptions
+
+
+TOKEN_SALT = 'procurement.auth.token'
+DEFAULT_LIFETIME = timedelta(minutes=60)
+
+
+def token_lifetime():
+    return getattr(settings, 'SIMPLE_JWT', {}).get('ACCESS_TOKEN_LIFETIME', DEFAULT_LIFETIME)
+
+
+def issue_token(user):
+    """Return a signed token for `user`"""
+    payload = {'uid': user.pk, 'h': user.get_session_auth_hash()[:16]}
+    return signing.dumps(payload, salt=TOKEN_SALT, compress=True)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """Authenticate `Authorization: Bearer <token>` headers issued by issue_token()"""
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = signing.loads(
+                header[1].decode(),
+                salt=TOKEN_SALT,
+                max_age=token_lifetime(),
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        try:
+            user = User.objects.select_related('profile').get(pk=payload['uid'], is_active=True)
+        except (User.DoesNotExist, KeyError, TypeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if user.get_session_auth_hash()[:16] != payload.get('h'):
+            raise exceptions.AuthenticationFailed('Token has been revoked.')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,267 @@
+"""
+In-memory autocomplete index for the product catalog.
+
+Each process keeps a sorted list of lowercase keys (product code, full name
+and every word of the name) so prefix lookups are a bisect, plus a trigram
+map used when the prefix pass finds too few matches. The index is built on
+first use, patched from Product post_save/post_delete (see signals.py) and
+rebuilt after AUTOCOMPLETE_MAX_AGE seconds so workers that did not see a
+save still converge.
+
+Only the first build in a process blocks a request. Later rebuilds run in
+a background thread while lookups keep using the current index, and the
+new index is swapped in when it is complete; saves that arrive during the
+build are replayed onto it.
+"""
+import bisect
+import threading
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+
+
+DEFAULT_MAX_AGE = 300
+FIELDS = ('id', 'product_code', 'name', 'unit_of_measure', 'unit_price', 'category_id')
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _index_keys(product):
+    name = (product['name'] or '').lower()
+    keys = {product['product_code'].lower(), name}
+    keys.update(word for word in name.split() if word)
+    return keys
+
+
+def _product_trigrams(product):
+    return _trigrams(product['name'].lower()) | _trigrams(product['product_code'].lower())
+
+
+class _Index:
+    """
+    One generation of the index; replaced as a whole by rebuild().
+
+    Products loaded by the build are numbered by name order, and each
+    trigram maps to a NumPy array of those numbers, so the fuzzy pass is one
+    bincount. Saves after the build mark the loaded entry dead and keep the
+    new values in small dicts until the next rebuild folds them in.
+    """
+
+    def __init__(self, rows=()):
+        rows = sorted(rows, key=lambda row: (row['name'].lower(), row['id']))
+        self.keys = []
+        self.keys_by_product = {}
+        self.products = {}
+        self.positions = {}
+        postings = defaultdict(list)
+        for position, row in enumerate(rows):
+            keys = _index_keys(row)
+            self.keys.extend((key, row['id']) for key in keys)
+            for trigram in _product_trigrams(row):
+                postings[trigram].append(position)
+            self.keys_by_product[row['id']] = keys
+            self.products[row['id']] = row
+            self.positions[row['id']] = position
+        # One sort instead of an insort per key
+        self.keys.sort()
+        self.ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows))
+        self.dead = np.zeros(len(rows), dtype=bool)
+        self.postings = {trigram: np.array(found, dtype=np.int32) for trigram, found in postings.items()}
+        self.patched = {}
+        self.patched_trigrams = defaultdict(set)
+
+    def add(self, product):
+        keys = _index_keys(product)
+        for key in keys:
+            bisect.insort(self.keys, (key, product['id']))
+        for trigram in _product_trigrams(product):
+            self.patched_trigrams[trigram].add(product['id'])
+        self.keys_by_product[product['id']] = keys
+        self.products[product['id']] = product
+        self.patched[product['id']] = product
+
+    def remove(self, product_id):
+        product = self.products.pop(product_id, None)
+        if product is None:
+            return
+        for key in self.keys_by_product.pop(product_id, ()):
+            position = bisect.bisect_left(self.keys, (key, product_id))
+            if position < len(self.keys) and self.keys[position] == (key, product_id):
+                del self.keys[position]
+        if self.patched.pop(product_id, None) is not None:
+            for trigram in _product_trigrams(product):
+                self.patched_trigrams[trigram].discard(product_id)
+        elif product_id in self.positions:
+            self.dead[self.positions[product_id]] = True
+
+    def fuzzy(self, query, exclude, limit):
+        """Products sharing at least half the query's trigrams, most shared first"""
+        trigrams = _trigrams(query)
+        threshold = max(1, len(query) // 2)
+        matches = []
+
+        found = [self.postings[trigram] for trigram in trigrams if trigram in self.postings]
+        if found:
+            counts = np.bincount(np.concatenate(found), minlength=len(self.ids))
+            counts[self.dead] = 0
+            excluded = [self.positions[pid] for pid in exclude if pid in self.positions]
+            counts[excluded] = 0
+            # Candidates come out in name order; rank by count, then that order
+            candidates = np.flatnonzero(counts >= threshold)
+            order = (len(trigrams) - counts[candidates]).astype(np.int64) * len(self.ids) + candidates
+            if len(order) > limit:
+                order = np.partition(order, limit)[:limit]
+            for value in np.sort(order):
+                position = int(value % len(self.ids))
+                product_id = int(self.ids[position])
+                matches.append((-int(counts[position]), self.products[product_id]['name'].lower(), product_id))
+
+        overlap = Counter(chain.from_iterable(self.patched_trigrams.get(trigram, ()) for trigram in trigrams))
+        for product_id, count in overlap.items():
+            if count >= threshold and product_id not in exclude:
+                matches.append((-count, self.products[product_id]['name'].lower(), product_id))
+
+        matches.sort()
+        return [product_id for _, _, product_id in matches[:limit]]
+
+
+class ProductAutocompleteIndex:
+    """Sorted prefix index with a trigram fallback over active products"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._index = None
+        self._pending = None  # Saves seen while a rebuild is loading rows
+        self._refreshing = False
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'AUTOCOMPLETE_MAX_AGE', DEFAULT_MAX_AGE)
+
+    def _apply(self, index, product_id, product):
+        index.remove(product_id)
+        if product is not None:
+            index.add(product)
+
+    def rebuild(self):
+        """Reload every active product in one query and swap the new index in"""
+        with self._build_lock:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            self._pending = []
+        try:
+            rows = Product.objects.filter(is_active=True).values(*FIELDS)
+            index = _Index(rows.iterator(chunk_size=2000))
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for product_id, product in self._pending:
+                self._apply(index, product_id, product)
+            self._pending = None
+            self._index = index
+            self._built_at = time.monotonic()
+
+    def _refresh(self):
+        try:
+            self.rebuild()
+        finally:
+            self._refreshing = False
+            connection.close()
+
+    def invalidate(self):
+        """Mark the index stale (e.g. after a bulk import) so the next lookup refreshes it"""
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        if self._index is None:
+            # Nothing to serve yet; concurrent first lookups wait for one build
+            with self._build_lock:
+                if self._index is None:
+                    self._load()
+            return
+        with self._lock:
+            fresh = self._built_at is not None and time.monotonic() - self._built_at <= self.max_age
+            if fresh or self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='product-autocomplete-rebuild', daemon=True).start()
+
+    def _patch(self, product_id, product):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, product))
+            if self._index is not None:
+                self._apply(self._index, product_id, product)
+
+    def update(self, product):
+        """Apply a single saved Product instance to an already built index"""
+        values = {field: getattr(product, field) for field in FIELDS} if product.is_active else None
+        self._patch(product.pk, values)
+
+    def remove(self, product_id):
+        self._patch(product_id, None)
+
+    def lookup(self, query, limit=10):
+        """Return up to `limit` active products matching `query`, best first"""
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+        self._ensure_built()
+
+        with self._lock:
+            index = self._index
+            ranked = {}
+            position = bisect.bisect_left(index.keys, (query, 0))
+            while position < len(index.keys) and len(ranked) < limit * 4:
+                key, product_id = index.keys[position]
+                if not key.startswith(query):
+                    break
+                product = index.products[product_id]
+                if key == product['product_code'].lower():
+                    rank = 0
+                elif key == product['name'].lower():
+                    rank = 1
+                else:
+                    rank = 2
+                ranked[product_id] = min(rank, ranked.get(product_id, rank))
+                position += 1
+
+            results = sorted(
+                ranked,
+                key=lambda pid: (ranked[pid], index.products[pid]['name'].lower())
+            )[:limit]
+
+            if len(results) < limit and len(query) >= 3:
+                results.extend(index.fuzzy(query, ranked, limit - len(results)))
+
+            return [
+                {
+                    'id': index.products[pid]['id'],
+                    'product_code': index.products[pid]['product_code'],
+                    'name': index.products[pid]['name'],
+                    'unit_of_measure': index.products[pid]['unit_of_measure'],
+                    'unit_price': str(Decimal(index.products[pid]['unit_price']).quantize(Decimal('0.01'))),
+                    'category': index.products[pid]['category_id'],
+                }
+                for pid in results
+            ]
+
+
+product_index = ProductAutocompleteIndex()
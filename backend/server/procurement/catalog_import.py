@@ -0,0 +1,193 @@
+"""
+Streaming CSV import for the product catalog.
+
+Rows are read one at a time, validated, and upserted by product_code in
+chunks with bulk_create(update_conflicts=True), so memory stays bounded by
+the chunk size whatever the file length. Categories are resolved through a
+name -> id map loaded once per import.
+
+Recognised columns: product_code, name, unit_price (required) and
+description, category, unit_of_measure, current_stock, reorder_level,
+is_active. Columns missing from the header are left untouched on existing
+products and take the model default on new ones.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from .models import Category, Product
+
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+REQUIRED_COLUMNS = ('product_code', 'name', 'unit_price')
+OPTIONAL_COLUMNS = (
+    'description', 'category', 'unit_of_measure',
+    'current_stock', 'reorder_level', 'is_active',
+)
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'active'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'inactive'}
+
+
+class CatalogImportError(Exception):
+    """The file cannot be imported at all (bad header, unreadable CSV)"""
+
+
+class CategoryMap:
+    """Case-insensitive category name -> id lookup, creating missing names on demand"""
+
+    def __init__(self, create_missing=True):
+        self.create_missing = create_missing
+        self.created = 0
+        self._ids = {name.lower(): pk for name, pk in Category.objects.values_list('name', 'id')}
+
+    def resolve(self, name):
+        name = name.strip()
+        if not name:
+            return None
+        key = name.lower()
+        if key not in self._ids:
+            if not self.create_missing:
+                raise ValueError(f'unknown category "{name}"')
+            category, created = Category.objects.get_or_create(name=name)
+            self.created += created
+            self._ids[key] = category.pk
+        return self._ids[key]
+
+
+def _parse_int(value, column):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{column} must be a whole number')
+
+
+def _parse_decimal(value, column):
+    try:
+        number = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'{column} must be a number')
+    # NaN survives quantize() but cannot be compared or stored
+    if not number.is_finite():
+        raise ValueError(f'{column} must be a number')
+    return number
+
+
+def _parse_row(row, columns, categories):
+    """Turn a CSV row into Product field values, raising ValueError on bad input"""
+    code = (row.get('product_code') or '').strip()
+    name = (row.get('name') or '').strip()
+    if not code:
+        raise ValueError('product_code is required')
+    if not name:
+        raise ValueError('name is required')
+    if len(code) > 50:
+        raise ValueError('product_code is longer than 50 characters')
+    if len(name) > 200:
+        raise ValueError('name is longer than 200 characters')
+
+    unit_price = _parse_decimal((row.get('unit_price') or '').strip(), 'unit_price')
+    if unit_price < 0 or unit_price >= Decimal('100000000'):
+        raise ValueError('unit_price is out of range')
+
+    values = {'product_code': code, 'name': name, 'unit_price': unit_price}
+    for column in columns:
+        raw = (row.get(column) or '').strip()
+        if column == 'description':
+            values['description'] = raw
+        elif column == 'unit_of_measure':
+            values['unit_of_measure'] = raw[:50] or 'pieces'
+        elif column == 'category':
+            values['category_id'] = categories.resolve(raw)
+        elif column in ('current_stock', 'reorder_level'):
+            values[column] = _parse_int(raw or '0', column)
+        elif column == 'is_active':
+            if raw.lower() in TRUE_VALUES or not raw:
+                values['is_active'] = True
+            elif raw.lower() in FALSE_VALUES:
+                values['is_active'] = False
+            else:
+                raise ValueError('is_active must be true or false')
+    return values
+
+
+def _upsert_chunk(rows, update_fields):
+    """Insert or update one chunk; returns (created, updated)"""
+    codes = list(rows)
+    existing = set(
+        Product.objects.filter(product_code__in=codes).values_list('product_code', flat=True)
+    )
+    products = [Product(**values) for values in rows.values()]
+
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['product_code']
+    with transaction.atomic():
+        Product.objects.bulk_create(products, **options)
+    return len(codes) - len(existing), len(existing)
+
+
+def import_products(stream, chunk_size=DEFAULT_CHUNK_SIZE, create_categories=True):
+    """
+    Import products from a text stream of CSV data.
+    Returns a summary dict with created/updated/error counts and the first
+    MAX_REPORTED_ERRORS row errors.
+    """
+    from .autocomplete import product_index
+    from .response_cache import bump_model_version
+
+    reader = csv.DictReader(stream)
+    try:
+        header = [column.strip() for column in (reader.fieldnames or [])]
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise CatalogImportError(f'Unreadable CSV: {e}')
+    reader.fieldnames = header
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise CatalogImportError(f'Missing required columns: {", ".join(missing)}')
+
+    columns = [column for column in OPTIONAL_COLUMNS if column in header]
+    update_fields = ['name', 'unit_price', 'updated_at'] + [
+        'category' if column == 'category' else column for column in columns
+    ]
+    categories = CategoryMap(create_missing=create_categories)
+
+    summary = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    chunk = {}
+
+    def flush():
+        if chunk:
+            created, updated = _upsert_chunk(chunk, update_fields)
+            summary['created'] += created
+            summary['updated'] += updated
+            chunk.clear()
+
+    try:
+        for row in reader:
+            summary['rows'] += 1
+            try:
+                values = _parse_row(row, columns, categories)
+            except ValueError as e:
+                summary['failed'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'line': reader.line_num, 'error': str(e)})
+                continue
+            # Later rows win; one upsert cannot touch the same code twice
+            chunk.pop(values['product_code'], None)
+            chunk[values['product_code']] = values
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise CatalogImportError(f'Unreadable CSV at line {reader.line_num}: {e}')
+    finally:
+        # bulk_create bypasses post_save, so invalidate what the signals would have
+        if summary['created'] or summary['updated']:
+            bump_model_version(Product)
+            product_index.invalidate()
+
+    summary['categories_created'] = categories.created
+    return summary
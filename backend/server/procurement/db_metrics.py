@@ -0,0 +1,139 @@
+"""
+Per-process database connection statistics.
+
+Django keeps one connection per alias per thread and, with CONN_MAX_AGE,
+reuses it across requests. These counters show how well that works:
+how many connections were opened, how many are open or idle right now,
+and how long requests waited for a connection to be opened.
+
+Nothing here touches the database. DatabaseMetricsMiddleware attaches a
+RequestMetrics execute wrapper to each alias, and a request is counted
+against an alias when its first query runs there; requests that never
+query (static files, cached responses) are not counted and do not open a
+connection. The connection_created receiver in signals.py registers new
+connections. The numbers cover the current worker process only.
+"""
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_wrappers = weakref.WeakSet()
+_stats = {}
+
+
+def _alias_stats(alias):
+    return _stats.setdefault(alias, {
+        'opened': 0,
+        'requests': 0,
+        'reused': 0,
+        'in_use': 0,
+        'wait_ms_total': 0.0,
+        'wait_ms_max': 0.0,
+    })
+
+
+def connection_opened(wrapper):
+    with _lock:
+        _wrappers.add(wrapper)
+        _alias_stats(wrapper.alias)['opened'] += 1
+
+
+def request_started(alias, reused, wait_ms):
+    with _lock:
+        stats = _alias_stats(alias)
+        stats['requests'] += 1
+        stats['reused'] += reused
+        stats['in_use'] += 1
+        stats['wait_ms_total'] += wait_ms
+        stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+
+
+def request_finished(alias):
+    with _lock:
+        _alias_stats(alias)['in_use'] -= 1
+
+
+def _time_connects(connection):
+    """Record on the connection how long its next connect() takes"""
+    if '_metrics_connect' in connection.__dict__:
+        return
+    connect = connection.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        connect()
+        connection._metrics_connect_ms = (time.perf_counter() - started) * 1000
+
+    connection._metrics_connect = connect
+    connection.connect = timed_connect
+
+
+class RequestMetrics:
+    """
+    Per-request execute wrapper. install() and uninstall() must run on the
+    thread that will run the request's queries.
+    """
+
+    def __init__(self, connections, aliases):
+        self.connections = connections
+        self.aliases = aliases
+        self.existing = {}
+        self.started = set()
+
+    def install(self):
+        for alias in self.aliases:
+            connection = self.connections[alias]
+            _time_connects(connection)
+            connection.__dict__.pop('_metrics_connect_ms', None)
+            self.existing[alias] = connection.connection
+            connection.execute_wrappers.append(self)
+
+    def uninstall(self):
+        for alias in self.aliases:
+            wrappers = self.connections[alias].execute_wrappers
+            if self in wrappers:
+                wrappers.remove(self)
+        for alias in self.started:
+            request_finished(alias)
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.alias not in self.started:
+            self.started.add(connection.alias)
+            existing = self.existing.get(connection.alias)
+            reused = existing is not None and connection.connection is existing
+            request_started(connection.alias, reused, connection.__dict__.pop('_metrics_connect_ms', 0.0))
+        return execute(sql, params, many, context)
+
+
+def snapshot():
+    """Statistics per database alias for this process"""
+    with _lock:
+        open_by_alias = {}
+        for wrapper in list(_wrappers):
+            if wrapper.connection is not None:
+                open_by_alias[wrapper.alias] = open_by_alias.get(wrapper.alias, 0) + 1
+
+        databases = {}
+        for alias, config in settings.DATABASES.items():
+            stats = dict(_alias_stats(alias))
+            open_connections = open_by_alias.get(alias, 0)
+            requests = stats['requests']
+            databases[alias] = {
+                'conn_max_age': config.get('CONN_MAX_AGE', 0),
+                'health_checks': config.get('CONN_HEALTH_CHECKS', False),
+                'open': open_connections,
+                'in_use': stats['in_use'],
+                'idle': max(open_connections - stats['in_use'], 0),
+                'opened_total': stats['opened'],
+                'requests': requests,
+                'reuse_ratio': round(stats['reused'] / requests, 4) if requests else None,
+                'wait_ms_avg': round(stats['wait_ms_total'] / requests, 3) if requests else None,
+                'wait_ms_max': round(stats['wait_ms_max'], 3),
+            }
+    return {'pid': os.getpid(), 'databases': databases}
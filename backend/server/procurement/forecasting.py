@@ -0,0 +1,225 @@
+"""
+Weekly demand forecasting for the whole catalog in one vectorised pass.
+
+History is bucketed into dense (products x weeks) NumPy arrays:
+
+- demand: PurchaseRequest quantities by creation week
+- ordered: PurchaseOrderItem quantities by PO order week
+- received: GoodsReceipt delivered_quantity by receipt week, attributed to
+  the product of the PO's purchase request
+
+Every product is forecast at once. The moving average and simple
+exponential smoothing are column sweeps over the weeks axis, never a
+per-product loop. Safety stock is z * sigma * sqrt(lead time), where
+sigma is the spread of the one-step smoothing errors. It is scaled up by
+the observed fill rate (received / ordered), so unreliable supply carries
+more buffer. Lead time is each product's mean order-to-receipt time,
+falling back to FORECAST_DEFAULT_LEAD_DAYS.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import GoodsReceipt, Product, ProductForecast, PurchaseOrderItem, PurchaseRequest
+
+
+DEFAULTS = {
+    'FORECAST_HISTORY_WEEKS': 26,
+    'FORECAST_MA_WEEKS': 4,
+    'FORECAST_ALPHA': 0.3,
+    'FORECAST_SERVICE_Z': 1.65,  # ~95% cycle service level
+    'FORECAST_DEFAULT_LEAD_DAYS': 14,
+}
+LOAD_CHUNK_SIZE = 50000
+WRITE_CHUNK_SIZE = 2000
+
+
+def _setting(name):
+    return getattr(settings, name, DEFAULTS[name])
+
+
+def _to_date(value):
+    return timezone.localtime(value).date() if hasattr(value, 'hour') else value
+
+
+class HistoryMatrix:
+    """Maps (product id, date) pairs onto a dense products x weeks array"""
+
+    def __init__(self, product_ids, start, weeks):
+        self.product_ids = product_ids
+        self.start = start
+        self.weeks = weeks
+
+    def rows(self, ids):
+        positions = np.searchsorted(self.product_ids, ids)
+        positions = np.minimum(positions, len(self.product_ids) - 1)
+        return positions, self.product_ids[positions] == ids
+
+    def accumulate(self, queryset, with_lead_time=False):
+        """
+        Sum (product_id, when, quantity) rows into a new products x weeks array.
+        With `with_lead_time`, rows carry a fourth column (the order date) and
+        the mean days from order to `when` per product is returned as well.
+        """
+        matrix = np.zeros((len(self.product_ids), self.weeks), dtype=np.float64)
+        lead_totals = np.zeros(len(self.product_ids))
+        lead_counts = np.zeros(len(self.product_ids))
+        buffer = []
+
+        def flush():
+            if not buffer or not len(self.product_ids):
+                buffer.clear()
+                return
+            size = len(buffer)
+            ids = np.fromiter((row[0] for row in buffer), dtype=np.int64, count=size)
+            dates = [_to_date(row[1]) for row in buffer]
+            days = np.fromiter(((day - self.start).days for day in dates), dtype=np.int64, count=size)
+            quantities = np.fromiter((row[2] for row in buffer), dtype=np.float64, count=size)
+            rows, known = self.rows(ids)
+            cols = days // 7
+            keep = known & (cols >= 0) & (cols < self.weeks)
+            np.add.at(matrix, (rows[keep], cols[keep]), quantities[keep])
+            if with_lead_time:
+                lead = np.fromiter(
+                    (max((day - row[3]).days, 0) for day, row in zip(dates, buffer)),
+                    dtype=np.float64, count=size,
+                )
+                np.add.at(lead_totals, rows[keep], lead[keep])
+                np.add.at(lead_counts, rows[keep], 1)
+            buffer.clear()
+
+        for row in queryset.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            if None in row:
+                continue
+            buffer.append(row)
+            if len(buffer) >= LOAD_CHUNK_SIZE:
+                flush()
+        flush()
+
+        if not with_lead_time:
+            return matrix
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return matrix, lead_totals / lead_counts
+
+
+def moving_average(series, window):
+    window = max(1, min(window, series.shape[1]))
+    return series[:, -window:].mean(axis=1)
+
+
+def exponential_smoothing(series, alpha):
+    """Return (final level, std of one-step errors) for every row of `series`"""
+    level = series[:, 0].copy()
+    errors = np.zeros_like(series)
+    for week in range(1, series.shape[1]):
+        errors[:, week] = series[:, week] - level
+        level += alpha * errors[:, week]
+    sigma = errors[:, 1:].std(axis=1) if series.shape[1] > 1 else np.zeros(len(series))
+    return level, sigma
+
+
+def compute_forecasts(weeks=None, alpha=None, service_z=None):
+    """
+    Forecast weekly demand for every active product.
+    Returns a dict of NumPy arrays keyed like ProductForecast fields, plus 'product_id'.
+    """
+    weeks = weeks or _setting('FORECAST_HISTORY_WEEKS')
+    alpha = alpha if alpha is not None else _setting('FORECAST_ALPHA')
+    service_z = service_z if service_z is not None else _setting('FORECAST_SERVICE_Z')
+
+    # Whole weeks ending with the current one, so the last bucket is this week
+    today = timezone.localdate()
+    start = today - timedelta(days=today.weekday() + (weeks - 1) * 7)
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    product_ids = np.array(
+        sorted(Product.objects.filter(is_active=True).values_list('id', flat=True)), dtype=np.int64
+    )
+    matrix = HistoryMatrix(product_ids, start, weeks)
+
+    demand = matrix.accumulate(
+        PurchaseRequest.objects.filter(created_at__gte=since, product__isnull=False)
+        .exclude(status__in=('draft', 'rejected'))
+        .values_list('product_id', 'created_at', 'quantity')
+    )
+    ordered = matrix.accumulate(
+        PurchaseOrderItem.objects.filter(purchase_order__order_date__gte=start, product__isnull=False)
+        .exclude(purchase_order__status='cancelled')
+        .values_list('product_id', 'purchase_order__order_date', 'quantity')
+    )
+    received, lead_days = matrix.accumulate(
+        GoodsReceipt.objects.filter(
+            received_at__gte=since, purchase_order__purchase_request__product__isnull=False
+        ).values_list(
+            'purchase_order__purchase_request__product_id', 'received_at',
+            'delivered_quantity', 'purchase_order__order_date',
+        ),
+        with_lead_time=True,
+    )
+
+    ma = moving_average(demand, _setting('FORECAST_MA_WEEKS'))
+    ses, sigma = exponential_smoothing(demand, alpha)
+
+    ordered_total = ordered.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fill_rate = np.where(ordered_total > 0, received.sum(axis=1) / ordered_total, 1.0)
+    fill_rate = np.clip(fill_rate, 0.5, 1.0)
+
+    lead_days = np.where(np.isnan(lead_days), _setting('FORECAST_DEFAULT_LEAD_DAYS'), lead_days)
+    lead_weeks = lead_days / 7.0
+
+    safety_stock = service_z * sigma * np.sqrt(lead_weeks) / fill_rate
+    reorder_point = ses * lead_weeks + safety_stock
+
+    return {
+        'product_id': product_ids,
+        'weekly_demand_ma': ma,
+        'weekly_demand_ses': ses,
+        'demand_std': sigma,
+        'fill_rate': fill_rate,
+        'lead_time_days': lead_days,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+        'history_weeks': np.count_nonzero(demand, axis=1),
+    }
+
+
+def save_forecasts(results):
+    """Upsert one ProductForecast row per product; returns the number written"""
+    generated_at = timezone.now()
+    decimal_fields = (
+        'weekly_demand_ma', 'weekly_demand_ses', 'demand_std',
+        'safety_stock', 'reorder_point',
+    )
+    count = len(results['product_id'])
+    options = {
+        'update_conflicts': True,
+        'update_fields': [*decimal_fields, 'fill_rate', 'lead_time_days', 'history_weeks', 'generated_at'],
+    }
+    # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['product']
+
+    rounded = {field: np.round(results[field], 2) for field in decimal_fields}
+    for offset in range(0, count, WRITE_CHUNK_SIZE):
+        rows = range(offset, min(offset + WRITE_CHUNK_SIZE, count))
+        forecasts = [
+            ProductForecast(
+                product_id=int(results['product_id'][i]),
+                **{field: f"{rounded[field][i]:.2f}" for field in decimal_fields},
+                fill_rate=float(results['fill_rate'][i]),
+                lead_time_days=float(results['lead_time_days'][i]),
+                history_weeks=int(results['history_weeks'][i]),
+                generated_at=generated_at,
+            )
+            for i in rows
+        ]
+        with transaction.atomic():
+            ProductForecast.objects.bulk_create(forecasts, **options)
+    return count
+
+
+def run_forecast(**options):
+    return save_forecasts(compute_forecasts(**options))
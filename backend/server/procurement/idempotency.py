@@ -0,0 +1,167 @@
+"""
+Idempotency keys for side-effecting POST actions.
+
+A client that may retry a POST sends an `Idempotency-Key` header: any
+string that is unique to the operation, such as a UUID. The first request
+with a key claims an IdempotencyKey row before the view runs. If the view
+succeeds (2xx), its response is stored in the same transaction as the
+view's own writes. Every retry with the same key, user and endpoint then
+gets that stored response back until the key expires, with an
+`Idempotent-Replayed: true` header. A retry after a dropped connection
+therefore returns the original purchase order, payment or invoice
+instead of creating another one.
+
+Other cases:
+- A retry that arrives while the first request is still running gets a
+  409.
+- A key reused for a different path or body gets a 422.
+- Error responses and exceptions release the key, so the client can retry
+  with the same key once the problem is fixed.
+- If a request died while holding its claim, the claim can be taken over
+  after `lock_timeout` seconds.
+
+Requests without the header run as before. Expired keys are deleted by
+purge_expired(), which run_workers calls hourly.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+DEFAULT_SETTINGS = {
+    'ttl_hours': 24,  # How long a completed response is replayed
+    'lock_timeout': 300,  # Seconds before an unfinished claim may be taken over
+}
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def get_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'IDEMPOTENCY', {})}
+
+
+def _owner(request):
+    user = request.user
+    return f'user:{user.pk}' if user.is_authenticated else 'anonymous'
+
+
+def _request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}\n{request.path}\n{body}'.encode()).hexdigest()
+
+
+def _claim(scope, owner, key, request_hash):
+    """(record, claimed): claimed is False when another request holds or completed the key"""
+    config = get_settings()
+    for _ in range(3):
+        now = timezone.now()
+        lease = {
+            'status': 'in_progress',
+            'request_hash': request_hash,
+            'response_status': None,
+            'response_body': None,
+            'locked_until': now + timedelta(seconds=config['lock_timeout']),
+            'expires_at': now + timedelta(hours=config['ttl_hours']),
+        }
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(scope=scope, owner=owner, key=key, **lease), True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(scope=scope, owner=owner, key=key).first()
+        if record is None:
+            continue  # Released between our insert and read; try again
+        abandoned = record.status == 'in_progress' and record.locked_until <= now
+        if record.expires_at > now and not abandoned:
+            return record, False
+        # Take over an expired or abandoned key; the conditional UPDATE lets only one retry win
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, status=record.status, locked_until=record.locked_until,
+        ).update(**lease)
+        if taken:
+            for field, value in lease.items():
+                setattr(record, field, value)
+            return record, True
+    raise IntegrityError(f'Could not claim idempotency key {key!r}')
+
+
+def _held(record):
+    """Queryset matching the record only while this request still holds its claim"""
+    return IdempotencyKey.objects.filter(pk=record.pk, status='in_progress', locked_until=record.locked_until)
+
+
+def _replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {'error': f'This {HEADER} was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.status != 'completed':
+        return Response(
+            {'error': f'A request with this {HEADER} is still being processed'},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Retry-After': '1'}
+        )
+    return Response(record.response_body, status=record.response_status, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(scope=None):
+    """
+    Make a DRF view method replay its first successful response to retries
+    that carry the same Idempotency-Key. Put it above @transaction.atomic.
+    `scope` defaults to the method name.
+    """
+    def decorator(view):
+        name = scope or view.__name__
+
+        @wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            request_hash = _request_hash(request)
+            record, claimed = _claim(name, _owner(request), key, request_hash)
+            if not claimed:
+                return _replay(record, request_hash)
+
+            try:
+                with transaction.atomic():
+                    response = view(self, request, *args, **kwargs)
+                    if status.is_success(response.status_code) and isinstance(response, Response):
+                        _held(record).update(
+                            status='completed',
+                            response_status=response.status_code,
+                            response_body=json.loads(JSONRenderer().render(response.data) or 'null'),
+                        )
+                        return response
+            except BaseException:
+                _held(record).delete()
+                raise
+            _held(record).delete()
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired():
+    """Delete keys past their expiry; returns the count"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
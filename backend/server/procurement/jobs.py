@@ -0,0 +1,227 @@
+"""
+Durable background jobs backed by the BackgroundJob table.
+
+Request handlers call enqueue() inside their own transaction, so a job
+exists exactly when the change that needs it is committed, and no broker is
+required. `manage.py run_workers` claims jobs and runs them: tasks on the
+'cpu' queue in a process pool, tasks on the 'io' queue in a thread pool.
+
+Claiming takes the highest-priority due jobs with SELECT ... FOR UPDATE
+SKIP LOCKED where the database supports it, so several workers never wait
+on each other's rows. Each claim stamps the jobs with a unique lease token
+and a visibility timeout. While a job runs, run_workers renews its lease
+every third of the timeout, so a job may run longer than its timeout
+without being claimed twice. A job whose worker died stops being renewed
+and becomes claimable again once the timeout passes, and only the lease
+holder may record its outcome. Failed attempts are retried with
+exponential backoff until max_attempts.
+
+Because a job can run again after a lost lease, tasks must be safe to
+repeat. Tasks are registered with @task in procurement.tasks.
+"""
+import traceback
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+DEFAULT_SETTINGS = {
+    'io_threads': 8,
+    'cpu_processes': None,  # None = os.cpu_count()
+    'batch_size': 10,  # Jobs claimed per queue per poll
+    'poll_interval': 1.0,  # Seconds to sleep when no job is due
+    'retry_backoff_seconds': 30,  # Doubled on every further attempt
+    'max_backoff_seconds': 3600,
+    'keep_finished_days': 7,  # Succeeded and failed jobs are purged after this
+}
+
+
+class JobError(Exception):
+    pass
+
+
+Task = namedtuple('Task', 'name func queue max_attempts timeout priority')
+Lease = namedtuple('Lease', 'job_id token timeout')
+
+TASKS = {}
+
+
+def get_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'BACKGROUND_JOBS', {})}
+
+
+def task(name, queue='io', max_attempts=3, timeout=300, priority=0):
+    """
+    Register a function as a background task.
+    `timeout` is the visibility timeout in seconds: how long a claimed job
+    may go without a lease renewal before another worker assumes it was
+    lost and claims it again.
+    """
+    if queue not in dict(BackgroundJob.QUEUE_CHOICES):
+        raise ValueError(f'Unknown queue: {queue}')
+
+    def register(func):
+        TASKS[name] = Task(name, func, queue, max_attempts, timeout, priority)
+        return func
+    return register
+
+
+def load_tasks():
+    # Task modules register on import; imported lazily to avoid a cycle
+    from . import tasks  # noqa: F401
+
+
+def get_task(name):
+    load_tasks()
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise JobError(f'Unknown task: {name}')
+
+
+def enqueue(name, payload=None, priority=None, delay=0):
+    """
+    Add a job to run `name(**payload)`. The payload must be JSON
+    serialisable. Called inside a transaction, the job only becomes
+    visible to workers when that transaction commits.
+    """
+    spec = get_task(name)
+    return BackgroundJob.objects.create(
+        task=name,
+        payload=payload or {},
+        queue=spec.queue,
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _claimable(now):
+    return Q(status='pending', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def _lease_timeout(name):
+    # Unknown tasks are leased briefly; run_job fails them
+    return TASKS[name].timeout if name in TASKS else 60
+
+
+def claim(queue, worker, limit):
+    """
+    Lease up to `limit` due jobs of `queue` to `worker`.
+    Returns Leases; pass job_id and token to run_job() and keep the lease
+    alive with renew() while it runs.
+    """
+    load_tasks()
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    skip_locked = connection.features.has_select_for_update_skip_locked
+
+    with transaction.atomic():
+        candidates = list(
+            BackgroundJob.objects.select_for_update(skip_locked=skip_locked)
+            .filter(_claimable(now), queue=queue)
+            .order_by('-priority', 'run_after', 'id')
+            .values_list('id', 'task')[:limit]
+        )
+        by_task = {}
+        for job_id, name in candidates:
+            by_task.setdefault(name, []).append(job_id)
+
+        for name, ids in by_task.items():
+            timeout = _lease_timeout(name)
+            # Re-checking the claim condition keeps this safe on databases
+            # without row locks: a job taken meanwhile is not updated twice
+            BackgroundJob.objects.filter(_claimable(now), id__in=ids).update(
+                status='running',
+                attempts=F('attempts') + 1,
+                locked_by=token,
+                locked_until=now + timedelta(seconds=timeout),
+            )
+
+    return [
+        Lease(job_id, token, _lease_timeout(name))
+        for job_id, name in BackgroundJob.objects.filter(locked_by=token, status='running').values_list('id', 'task')
+    ]
+
+
+def renew(leases):
+    """
+    Push back the visibility timeout of running jobs still held under
+    `leases`. A lease taken over by another worker or already finished is
+    left alone. Returns the number of jobs renewed.
+    """
+    now = timezone.now()
+    groups = {}
+    for lease in leases:
+        groups.setdefault((lease.token, lease.timeout), []).append(lease.job_id)
+    renewed = 0
+    for (token, timeout), ids in groups.items():
+        renewed += BackgroundJob.objects.filter(id__in=ids, locked_by=token, status='running').update(
+            locked_until=now + timedelta(seconds=timeout)
+        )
+    return renewed
+
+
+def _backoff(attempts, config):
+    return min(config['retry_backoff_seconds'] * 2 ** max(attempts - 1, 0), config['max_backoff_seconds'])
+
+
+def _finish(job_id, token, **fields):
+    """Record an outcome unless the lease was lost to another worker; returns False if it was"""
+    return bool(
+        BackgroundJob.objects.filter(pk=job_id, locked_by=token, status='running')
+        .update(locked_until=None, **fields)
+    )
+
+
+def run_job(job_id, token):
+    """
+    Run one claimed job and record the outcome. Executed by the worker
+    pools, so it must stay a module-level function (picklable for the
+    process pool). Returns the job's new status, or 'lost'.
+    """
+    close_old_connections()
+    try:
+        job = BackgroundJob.objects.filter(pk=job_id, locked_by=token, status='running').first()
+        if job is None:
+            return 'lost'
+
+        if job.attempts > job.max_attempts:
+            # Lease expired on the last attempt, most likely a crashed worker
+            _finish(job_id, token, status='failed', finished_at=timezone.now(),
+                    last_error='Visibility timeout expired on the final attempt')
+            return 'failed'
+
+        try:
+            get_task(job.task).func(**job.payload)
+        except Exception:
+            error = traceback.format_exc()[-4000:]
+            if job.attempts >= job.max_attempts:
+                finished = _finish(job_id, token, status='failed', finished_at=timezone.now(), last_error=error)
+                return 'failed' if finished else 'lost'
+            delay = _backoff(job.attempts, get_settings())
+            finished = _finish(job_id, token, status='pending', last_error=error,
+                               run_after=timezone.now() + timedelta(seconds=delay))
+            return 'retry' if finished else 'lost'
+
+        finished = _finish(job_id, token, status='succeeded', finished_at=timezone.now(), last_error='')
+        return 'succeeded' if finished else 'lost'
+    finally:
+        close_old_connections()
+
+
+def purge_finished(days=None):
+    """Delete succeeded and failed jobs finished more than `days` ago; returns the count"""
+    days = get_settings()['keep_finished_days'] if days is None else days
+    deleted, _ = BackgroundJob.objects.filter(
+        status__in=('succeeded', 'failed'),
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.core import signals
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request database latency with a fresh connection per request '
+        '(CONN_MAX_AGE=0) against a persistent connection'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Simulated requests per mode (default 200)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Database alias to benchmark (default "default")')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        original = {
+            key: connection.settings_dict.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')
+        }
+        try:
+            fresh = self.run(connection, options['requests'], conn_max_age=0, health_checks=False)
+            persistent = self.run(connection, options['requests'], conn_max_age=600, health_checks=True)
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+        self.stdout.write(f"{options['requests']} requests against '{connection.alias}' ({connection.vendor})")
+        self.report('fresh connection', fresh)
+        self.report('persistent + health check', persistent)
+        saved = statistics.median(fresh) - statistics.median(persistent)
+        self.stdout.write(self.style.SUCCESS(f'Saved {saved:.3f} ms per request (median)'))
+
+    def run(self, connection, count, conn_max_age, health_checks):
+        """
+        Time `count` request cycles: request_started, one query, request_finished.
+        Django's own signal handlers open, health-check and close the
+        connection exactly as they do for real requests.
+        """
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            signals.request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            signals.request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f'  {label:<26} median {statistics.median(timings):8.3f} ms   '
+            f'mean {statistics.mean(timings):8.3f} ms   max {max(timings):8.3f} ms'
+        )
@@ -0,0 +1,249 @@
+import random
+import re
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from procurement.models import (
+    Invoice, Payment, PurchaseOrder, PurchaseRequest,
+    RequestForQuotation, Vendor, VendorQuotation,
+)
+
+
+# (description, index name, model owning the index, queryset builder)
+# Paths with no index name are already served by FK/unique indexes and are only EXPLAINed.
+ACCESS_PATHS = [
+    (
+        'PurchaseOrder by (vendor, status)', 'po_vendor_status_idx', PurchaseOrder,
+        lambda ctx: PurchaseOrder.objects.filter(vendor_id=ctx['vendor'], status='sent'),
+    ),
+    (
+        'PurchaseOrder by (assigned_to, created_at)', 'po_assigned_created_idx', PurchaseOrder,
+        lambda ctx: PurchaseOrder.objects.filter(assigned_to_id=ctx['user']).order_by('-created_at')[:50],
+    ),
+    (
+        'PurchaseOrder by (vendor, delivery_status, expected_delivery_date)', 'po_vendor_delivery_idx', PurchaseOrder,
+        lambda ctx: PurchaseOrder.objects.filter(
+            vendor_id=ctx['vendor'], delivery_status='pending', expected_delivery_date__lt=ctx['today'],
+        ),
+    ),
+    (
+        'Invoice by (purchase_order)', None, Invoice,
+        lambda ctx: Invoice.objects.filter(purchase_order_id=ctx['order']),
+    ),
+    (
+        'Invoice by (vendor, status, invoice_date)', 'invoice_vendor_status_idx', Invoice,
+        lambda ctx: Invoice.objects.filter(vendor_id=ctx['vendor'], status='pending').order_by('-invoice_date')[:50],
+    ),
+    (
+        'RequestForQuotation by (vendor, status, sent_date)', 'rfq_vendor_status_sent_idx', RequestForQuotation,
+        lambda ctx: RequestForQuotation.objects.filter(
+            vendor_id=ctx['vendor'], status='sent',
+        ).order_by('-sent_date')[:50],
+    ),
+    (
+        'VendorQuotation by (rfq__vendor, status)', None, VendorQuotation,
+        lambda ctx: VendorQuotation.objects.filter(rfq__vendor_id=ctx['vendor'], status='submitted'),
+    ),
+    (
+        'PurchaseRequest by (status, created_at)', 'pr_status_created_idx', PurchaseRequest,
+        lambda ctx: PurchaseRequest.objects.filter(status='pending').order_by('-created_at')[:50],
+    ),
+    (
+        'PurchaseRequest by (employee, created_at)', 'pr_employee_created_idx', PurchaseRequest,
+        lambda ctx: PurchaseRequest.objects.filter(employee_id=ctx['user']).order_by('-created_at')[:50],
+    ),
+    (
+        'Payment by (invoice, payment_date)', 'payment_invoice_date_idx', Payment,
+        lambda ctx: Payment.objects.filter(invoice_id=ctx['invoice']).order_by('-payment_date'),
+    ),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN and time the hot access paths with and without their composite index. '
+        'Use --seed to run against generated rows that are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Generate this many purchase orders (plus related rows) for the run, then roll back')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Executions per query when timing (default 20)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql' and not connection.features.can_rollback_ddl:
+            raise CommandError(f'Cannot compare plans without an index on {connection.vendor}')
+
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                    self.stdout.write(f"Seeded {options['seed']} purchase orders (rolled back at the end)")
+                used = self.run_benchmarks(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        total = sum(1 for path in ACCESS_PATHS if path[1])
+        style = self.style.SUCCESS if used == total else self.style.WARNING
+        self.stdout.write(style(f'{used}/{total} new indexes are used by their access path'))
+
+    # ==================== BENCHMARK ====================
+
+    def context(self):
+        order, vendor = PurchaseOrder.objects.values_list('id', 'vendor_id').order_by('vendor_id').first() or (None, None)
+        user = PurchaseOrder.objects.exclude(assigned_to=None).values_list('assigned_to_id', flat=True).first()
+        invoice = Payment.objects.values_list('invoice_id', flat=True).first()
+        if vendor is None:
+            raise CommandError('No purchase orders to benchmark against; pass --seed N')
+        return {'order': order, 'vendor': vendor, 'user': user or 0, 'invoice': invoice or 0, 'today': date.today()}
+
+    def run_benchmarks(self, repeat):
+        ctx = self.context()
+        used = 0
+        for description, index_name, model, build in ACCESS_PATHS:
+            sql, params = build(ctx).query.sql_with_params()
+            if index_name is None:
+                plan = self.measure(sql, params, repeat)
+                self.stdout.write(f'\n{description} [existing indexes]')
+                self.stdout.write(f'  plan   {plan[0]:8.2f} ms  {plan[1]}')
+                continue
+
+            before = self.measure(self.without_index(sql, model, index_name), params, repeat, drop_index=index_name)
+            after = self.measure(sql, params, repeat)
+            is_used = index_name in after[1]
+            used += is_used
+
+            self.stdout.write(f'\n{description} [{index_name}]')
+            self.stdout.write(f'  before {before[0]:8.2f} ms  {before[1]}')
+            self.stdout.write(f'  after  {after[0]:8.2f} ms  {after[1]}')
+            if is_used:
+                self.stdout.write(self.style.SUCCESS('  index used'))
+            else:
+                self.stdout.write(self.style.WARNING('  index NOT used'))
+        return used
+
+    def without_index(self, sql, model, index_name):
+        """MySQL can ignore one index per query; elsewhere it is dropped inside a savepoint"""
+        if connection.vendor != 'mysql':
+            return sql
+        table = re.escape(connection.ops.quote_name(model._meta.db_table))
+        hint = f' IGNORE INDEX ({connection.ops.quote_name(index_name)})'
+        return re.sub(rf'((?:FROM|JOIN) {table})', lambda match: match.group(1) + hint, sql)
+
+    def measure(self, sql, params, repeat, drop_index=None):
+        """Return (median ms, plan summary), dropping `drop_index` first where DDL can be rolled back"""
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if drop_index and connection.vendor != 'mysql':
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(drop_index)}')
+                    cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                    plan = self.summarise_plan(cursor)
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        cursor.execute(sql, params)
+                        cursor.fetchall()
+                        timings.append((time.perf_counter() - started) * 1000)
+                raise Rollback
+        except Rollback:
+            pass
+        return statistics.median(timings), plan
+
+    def summarise_plan(self, cursor):
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        if 'key' in columns:
+            # MySQL: one row per table access
+            return '; '.join(
+                '{table}: {type} key={key} rows={rows}'.format(**dict(zip(columns, row)))
+                for row in rows
+            )
+        return '; '.join(str(row[-1]) for row in rows)
+
+    # ==================== SEED DATA ====================
+
+    def seed(self, count):
+        rnd = random.Random(42)
+        today = date.today()
+        suffix = f'{int(time.time())}'
+
+        users = User.objects.bulk_create([
+            User(username=f'bench-{suffix}-{i}', email=f'bench{i}@example.com') for i in range(50)
+        ])
+        vendors = Vendor.objects.bulk_create([
+            Vendor(
+                vendor_code=f'BENCH-{suffix}-{i}', company_name=f'Bench Vendor {i}',
+                contact_person='Bench', email=f'vendor{i}@example.com', phone='0',
+                address='-', city='-', state='-', postal_code='0', country='-',
+            )
+            for i in range(200)
+        ])
+
+        requests = PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(
+                employee=rnd.choice(users), item_name=f'Item {i}', quantity=rnd.randint(1, 50),
+                department=rnd.choice(['Ops', 'IT', 'Finance', 'HR']),
+                status=rnd.choice(['pending', 'approved', 'rejected', 'ordered']),
+            )
+            for i in range(count)
+        ], batch_size=2000)
+
+        rfqs = RequestForQuotation.objects.bulk_create([
+            RequestForQuotation(
+                rfq_number=f'BENCH-RFQ-{suffix}-{i}', purchase_request=request, vendor=rnd.choice(vendors),
+                status=rnd.choice(['sent', 'received', 'accepted', 'expired']),
+            )
+            for i, request in enumerate(requests)
+        ], batch_size=2000)
+
+        VendorQuotation.objects.bulk_create([
+            VendorQuotation(
+                rfq=rfq, quotation_number=f'BENCH-Q-{suffix}-{i}', unit_price=Decimal('10'),
+                quantity=1, estimated_delivery_days=7, quotation_valid_until=today,
+                status=rnd.choice(['draft', 'submitted', 'accepted', 'rejected']),
+            )
+            for i, rfq in enumerate(rfqs)
+        ], batch_size=2000)
+
+        orders = PurchaseOrder.objects.bulk_create([
+            PurchaseOrder(
+                po_number=f'BENCH-PO-{suffix}-{i}', vendor=rfq.vendor, purchase_request=rfq.purchase_request,
+                created_by=users[0], assigned_to=rnd.choice(users),
+                status=rnd.choice(['draft', 'sent', 'confirmed', 'delivered', 'cancelled']),
+                delivery_status=rnd.choice(['pending', 'shipped', 'delivered']),
+                expected_delivery_date=today + timedelta(days=rnd.randint(-60, 60)),
+            )
+            for i, rfq in enumerate(rfqs)
+        ], batch_size=2000)
+
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                invoice_number=f'BENCH-INV-{suffix}-{i}', vendor=order.vendor, purchase_order=order,
+                invoice_date=today - timedelta(days=rnd.randint(0, 365)), due_date=today,
+                status=rnd.choice(['pending', 'approved', 'paid']), total_amount=Decimal('100'),
+            )
+            for i, order in enumerate(orders)
+        ], batch_size=2000)
+
+        paid = [invoice for invoice in invoices for _ in range(rnd.randint(0, 2))]
+        Payment.objects.bulk_create([
+            Payment(
+                payment_number=f'BENCH-PAY-{suffix}-{i}', invoice=invoice, vendor=invoice.vendor,
+                amount=Decimal('50'), payment_date=today - timedelta(days=rnd.randint(0, 365)),
+                payment_method='bank_transfer',
+            )
+            for i, invoice in enumerate(paid)
+        ], batch_size=2000)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.catalog_import import DEFAULT_CHUNK_SIZE, CatalogImportError, import_products
+
+
+class Command(BaseCommand):
+    help = 'Upsert products by product_code from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f'Rows per upsert statement (default {DEFAULT_CHUNK_SIZE})')
+        parser.add_argument('--no-create-categories', action='store_true',
+                            help='Reject rows whose category does not exist instead of creating it')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], encoding='utf-8-sig', newline='') as stream:
+                summary = import_products(
+                    stream,
+                    chunk_size=options['chunk_size'],
+                    create_categories=not options['no_create_categories'],
+                )
+        except (OSError, CatalogImportError) as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['rows']} rows: {summary['created']} created, "
+            f"{summary['updated']} updated, {summary['failed']} failed, "
+            f"{summary['categories_created']} categories created"
+        ))
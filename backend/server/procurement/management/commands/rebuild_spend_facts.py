@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from procurement.jobs import enqueue
+from procurement.spend import rebuild_spend_facts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the SpendFact rollup from every purchase order line'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='store_true',
+                            help='Enqueue a background job for run_workers instead of running now')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            job = enqueue('rebuild_spend_facts')
+            self.stdout.write(self.style.SUCCESS(f'Queued spend cube rebuild as job #{job.pk}'))
+            return
+        written = rebuild_spend_facts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt spend cube with {written} cells'))
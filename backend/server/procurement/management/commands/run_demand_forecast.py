@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from procurement.forecasting import run_forecast
+from procurement.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Recompute weekly demand forecasts and safety stock for every active product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, help='History window in weeks (default FORECAST_HISTORY_WEEKS)')
+        parser.add_argument('--alpha', type=float, help='Exponential smoothing factor (default FORECAST_ALPHA)')
+        parser.add_argument('--service-z', type=float,
+                            help='Safety stock z-score (default FORECAST_SERVICE_Z)')
+        parser.add_argument('--queue', action='store_true',
+                            help='Enqueue a background job for run_workers instead of running now')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            job = enqueue('run_demand_forecast', {
+                'weeks': options['weeks'], 'alpha': options['alpha'], 'service_z': options['service_z'],
+            })
+            self.stdout.write(self.style.SUCCESS(f'Queued demand forecast as job #{job.pk}'))
+            return
+        started = time.monotonic()
+        count = run_forecast(weeks=options['weeks'], alpha=options['alpha'], service_z=options['service_z'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Forecast {count} products in {time.monotonic() - started:.1f}s'
+        ))
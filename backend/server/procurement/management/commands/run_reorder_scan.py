@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.reorder import ReorderError, run_reorder_scan
+
+
+class Command(BaseCommand):
+    help = 'Raise purchase requests for active products at or below their reorder level'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count the requests that would be created without creating them')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Requests written per bulk insert (default 1000)')
+
+    def handle(self, *args, **options):
+        try:
+            created = run_reorder_scan(dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+        except ReorderError as e:
+            raise CommandError(str(e))
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {created} reorder purchase requests'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from procurement.jobs import enqueue
+from procurement.matching import run_three_way_match
+
+
+class Command(BaseCommand):
+    help = 'Match open invoices against their purchase orders and goods receipts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='store_true',
+                            help='Enqueue a background job for run_workers instead of running now')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            job = enqueue('run_three_way_match')
+            self.stdout.write(self.style.SUCCESS(f'Queued three-way match as job #{job.pk}'))
+            return
+        started = time.monotonic()
+        summary = run_three_way_match()
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {summary['invoices']} invoices in {time.monotonic() - started:.1f}s: "
+            f"{summary['matched']} matched, {summary['exception']} exceptions"
+        ))
@@ -0,0 +1,163 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from procurement import idempotency, jobs
+
+
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs from the BackgroundJob table: the "cpu" queue in a '
+        'process pool and the "io" queue in a thread pool'
+    )
+
+    def add_arguments(self, parser):
+        config = jobs.get_settings()
+        parser.add_argument('--queues', default='io,cpu',
+                            help='Comma-separated queues to serve (default "io,cpu")')
+        parser.add_argument('--threads', type=int, default=config['io_threads'],
+                            help=f"Thread pool size for the io queue (default {config['io_threads']})")
+        parser.add_argument('--processes', type=int, default=config['cpu_processes'] or os.cpu_count(),
+                            help='Process pool size for the cpu queue (default: CPU count)')
+        parser.add_argument('--poll-interval', type=float, default=config['poll_interval'],
+                            help='Seconds to wait when no job is due')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due and none is running')
+
+    def handle(self, *args, **options):
+        queues = [queue.strip() for queue in options['queues'].split(',') if queue.strip()]
+        unknown = set(queues) - {'io', 'cpu'}
+        if unknown:
+            raise CommandError(f"Unknown queue(s): {', '.join(sorted(unknown))}")
+        if options['threads'] < 1 or options['processes'] < 1:
+            raise CommandError('--threads and --processes must be at least 1')
+
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = jobs.get_settings()['batch_size']
+        self.capacity = {'io': options['threads'], 'cpu': options['processes']}
+        self.executors = {queue: self.make_executor(queue) for queue in queues}
+        self.running = {queue: set() for queue in queues}
+        self.leases = {}  # future -> jobs.Lease
+        self.renew_at = {}  # future -> monotonic time its lease is next renewed
+        self.counts = {}
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        self.stdout.write(
+            f"Worker {self.worker} serving {', '.join(queues)} "
+            f"({options['threads']} threads, {options['processes']} processes)"
+        )
+        last_purge = 0
+        try:
+            while not self.stopping:
+                if time.monotonic() - last_purge > PURGE_INTERVAL:
+                    jobs.purge_finished()
+                    idempotency.purge_expired()
+                    last_purge = time.monotonic()
+
+                claimed = sum(self.fill(queue) for queue in queues)
+                self.heartbeat()
+                if options['once'] and not claimed and not any(self.running.values()):
+                    break
+                if not claimed:
+                    close_old_connections()
+                    self.idle(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopping = True
+            self.stdout.write('Waiting for running jobs to finish...')
+            # Keep renewing leases so long jobs are not claimed by another worker meanwhile
+            while any(self.running.values()):
+                self.heartbeat()
+                self.idle(options['poll_interval'])
+                for queue in queues:
+                    self.collect(queue)
+            for executor in self.executors.values():
+                executor.shutdown(wait=True)
+            for queue in queues:
+                self.collect(queue)
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(self.counts.items())) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped: {summary}'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def make_executor(self, queue):
+        if queue == 'cpu':
+            # Spawned children start clean instead of inheriting the parent's DB connections.
+            # The initializer is django.setup itself: a function from procurement would be
+            # unpickled, importing the models, before Django is set up in the child.
+            return ProcessPoolExecutor(
+                max_workers=self.capacity['cpu'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(max_workers=self.capacity['io'], thread_name_prefix='job-io')
+
+    def idle(self, timeout):
+        """Sleep until the poll interval passes or a running job finishes"""
+        running = set().union(*self.running.values())
+        if running:
+            wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout)
+
+    def collect(self, queue):
+        """Drop finished futures from the running set and count their outcomes"""
+        broken = False
+        for future in [future for future in self.running[queue] if future.done()]:
+            self.running[queue].discard(future)
+            self.leases.pop(future, None)
+            self.renew_at.pop(future, None)
+            try:
+                outcome = future.result()
+            except BrokenProcessPool:
+                # A child died mid-job; its lease expires and the job is retried
+                outcome = 'crashed'
+                broken = True
+            except Exception:
+                # run_job failed outside the task (claim lookup, recording the outcome);
+                # the lease expires and the job is retried, so keep serving
+                self.stderr.write(f'Job runner error on the {queue} queue:\n{traceback.format_exc()}')
+                outcome = 'error'
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        if broken and not self.stopping:
+            self.executors[queue] = self.make_executor(queue)
+
+    def fill(self, queue):
+        """Claim as many due jobs as the queue's pool has free slots; returns the count"""
+        self.collect(queue)
+        free = min(self.capacity[queue] - len(self.running[queue]), self.batch_size)
+        if free <= 0:
+            return 0
+        claimed = jobs.claim(queue, self.worker, free)
+        for lease in claimed:
+            future = self.executors[queue].submit(jobs.run_job, lease.job_id, lease.token)
+            self.running[queue].add(future)
+            self.leases[future] = lease
+            self.renew_at[future] = time.monotonic() + lease.timeout / 3
+        return len(claimed)
+
+    def heartbeat(self):
+        """Renew the leases of running jobs once a third of their timeout has passed"""
+        now = time.monotonic()
+        due = [future for future, renew_at in self.renew_at.items() if renew_at <= now]
+        if not due:
+            return
+        jobs.renew([self.leases[future] for future in due])
+        for future in due:
+            self.renew_at[future] = now + self.leases[future].timeout / 3
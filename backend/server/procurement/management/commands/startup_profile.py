@@ -0,0 +1,147 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_POLICY = {
+    'budget_ms': 2000,
+    'lazy_modules': ('razorpay', 'reportlab', 'numpy'),
+}
+
+# Runs in a fresh interpreter: boot Django the way a WSGI worker does, then
+# load the URLconf (and with it every view module) as the first request would
+BOOT_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+wsgi = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (setup - started) * 1000,
+    'wsgi_ms': (wsgi - setup) * 1000,
+    'urls_ms': (urls - wsgi) * 1000,
+    'total_ms': (urls - started) * 1000,
+    'modules': sorted(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure WSGI worker cold-start time and per-package import cost (-X importtime) '
+        'in fresh interpreters, and fail if it exceeds the startup budget'
+    )
+
+    def add_arguments(self, parser):
+        policy = self.get_policy()
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Cold starts to time; the median is reported (default 3)')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Packages and modules to list by import cost (default 10)')
+        parser.add_argument('--budget-ms', type=float, default=policy['budget_ms'],
+                            help=f"Fail when the median cold start exceeds this (default {policy['budget_ms']})")
+
+    def get_policy(self):
+        return {**DEFAULT_POLICY, **getattr(settings, 'STARTUP_PROFILE', {})}
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+
+        runs = [self.boot() for _ in range(options['runs'])]
+        self.report_timings(runs)
+        self.report_imports(options['top'])
+
+        problems = []
+        median_ms = statistics.median(run['wall_ms'] for run in runs)
+        if median_ms > options['budget_ms']:
+            problems.append(f"cold start {median_ms:.0f} ms exceeds the {options['budget_ms']:.0f} ms budget")
+
+        loaded = set(runs[0]['modules'])
+        eager = [name for name in self.get_policy()['lazy_modules'] if name in loaded]
+        if eager:
+            problems.append(f"imported at startup but meant to load lazily: {', '.join(eager)}")
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f"Cold start {median_ms:.0f} ms is within the {options['budget_ms']:.0f} ms budget"
+        ))
+
+    # ==================== SUBPROCESSES ====================
+
+    def run_python(self, *flags):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'server.settings'),
+            'PYTHONPATH': os.pathsep.join(path for path in sys.path if path),
+        }
+        env.pop('PYTHONPROFILEIMPORTTIME', None)
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', BOOT_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if result.returncode:
+            raise CommandError(f'Django failed to start:\n{result.stderr[-2000:]}')
+        return result, wall_ms
+
+    def boot(self):
+        result, wall_ms = self.run_python()
+        return {**json.loads(result.stdout.strip().splitlines()[-1]), 'wall_ms': wall_ms}
+
+    def import_times(self):
+        """(module, self µs, cumulative µs) for every import, from -X importtime"""
+        result, _ = self.run_python('-X', 'importtime')
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            fields = line[len('import time:'):].split('|')
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue  # Header row
+            rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+        return rows
+
+    # ==================== REPORTS ====================
+
+    def report_timings(self, runs):
+        def median(key):
+            return statistics.median(run[key] for run in runs)
+
+        self.stdout.write(f"Cold start, median of {len(runs)} run(s) with {os.environ.get('DJANGO_SETTINGS_MODULE')}")
+        self.stdout.write(f"  django.setup()        {median('setup_ms'):8.1f} ms")
+        self.stdout.write(f"  WSGI application      {median('wsgi_ms'):8.1f} ms")
+        self.stdout.write(f"  URLconf and views     {median('urls_ms'):8.1f} ms")
+        self.stdout.write(f"  in-process total      {median('total_ms'):8.1f} ms")
+        self.stdout.write(f"  process wall time     {median('wall_ms'):8.1f} ms  (includes interpreter start)")
+        self.stdout.write(f"  modules loaded        {len(runs[0]['modules']):8d}")
+
+    def report_imports(self, top):
+        rows = self.import_times()
+        by_package = {}
+        for module, self_us, _ in rows:
+            package = module.split('.')[0]
+            by_package[package] = by_package.get(package, 0) + self_us
+        total_us = sum(by_package.values())
+
+        self.stdout.write(f'\nImport time by top-level package (self time, total {total_us / 1000:.1f} ms)')
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'  {package:<30} {self_us / 1000:8.1f} ms  {self_us / total_us:6.1%}')
+
+        self.stdout.write('\nSlowest modules (cumulative, including their imports)')
+        for module, _, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+            self.stdout.write(f'  {module:<50} {cumulative_us / 1000:8.1f} ms')
@@ -0,0 +1,241 @@
+"""
+Three-way match of invoices against purchase orders and goods receipts.
+
+All open invoices are matched in one set-based pass. A fixed handful of
+grouped aggregate queries load the per-PO totals: ordered quantity and
+value from PurchaseOrderItem, received quantity and value from
+GoodsReceiptItem.quantity_accepted (or GoodsReceipt.delivered_quantity for
+receipts recorded without item lines), and the amount billed so far. Each
+invoice is then checked in memory and the results are upserted into
+InvoiceMatch, so the query count does not grow with the number of invoices.
+
+Invoices carry no line items, so the comparison is at PO level. The
+subtotal of every non-cancelled invoice against a PO is checked against
+what was ordered (price) and what was accepted into stock (quantity).
+
+Exception codes:
+
+- no_purchase_order: the invoice is not linked to a PO
+- vendor_mismatch: the invoice vendor is not the PO vendor
+- not_received: nothing has been received against the PO
+- over_delivered: more was received than ordered
+- exceeds_ordered: billed more than the ordered value
+- exceeds_received: billed more than the value of goods accepted
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import GoodsReceipt, GoodsReceiptItem, Invoice, InvoiceMatch, PurchaseOrder, PurchaseOrderItem
+
+
+DEFAULT_POLICY = {
+    'price_tolerance_percent': 2,
+    'price_tolerance_amount': 1,
+    'quantity_tolerance_percent': 0,
+    'invoice_statuses': ('pending', 'overdue'),
+}
+EXCEPTION_CODES = (
+    'no_purchase_order', 'vendor_mismatch', 'not_received',
+    'over_delivered', 'exceeds_ordered', 'exceeds_received',
+)
+WRITE_CHUNK_SIZE = 2000
+READ_CHUNK_SIZE = 1000  # PO ids per IN (...) when totalling
+CENT = Decimal('0.01')
+
+
+def get_policy():
+    return {**DEFAULT_POLICY, **getattr(settings, 'THREE_WAY_MATCH', {})}
+
+
+def _tolerance(base, policy):
+    """Largest amount over `base` still accepted as a match"""
+    percent = base * Decimal(str(policy['price_tolerance_percent'])) / 100
+    return max(percent, Decimal(str(policy['price_tolerance_amount'])))
+
+
+def _money(value):
+    return (value or Decimal('0')).quantize(CENT)
+
+
+def _po_totals(po_ids):
+    """
+    Per-PO ordered/received/billed totals for the purchase order ids in
+    `po_ids` (a list, so every query sees the same POs). Returns {po_id: dict}.
+    """
+    totals = {
+        row['id']: {
+            'vendor_id': row['vendor_id'],
+            'ordered_quantity': row['total_quantity'] or 0,
+            'ordered_amount': row['subtotal'] or Decimal('0'),
+            'received_quantity': 0,
+            'received_amount': Decimal('0'),
+            'billed_amount': Decimal('0'),
+        }
+        for row in PurchaseOrder.objects.filter(id__in=po_ids).values(
+            'id', 'vendor_id', 'total_quantity', 'subtotal'
+        )
+    }
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    # Item lines win over the PO header when they exist
+    ordered = (
+        PurchaseOrderItem.objects.filter(purchase_order_id__in=po_ids)
+        .values('purchase_order_id')
+        .annotate(
+            ordered_quantity=Sum('quantity'),
+            ordered_amount=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=money)),
+        )
+        .order_by()
+    )
+    for row in ordered:
+        po = totals.get(row['purchase_order_id'])
+        if po is None:
+            continue  # PO deleted since the first query
+        po['ordered_quantity'] = row['ordered_quantity'] or 0
+        po['ordered_amount'] = row['ordered_amount'] or Decimal('0')
+
+    accepted = (
+        GoodsReceiptItem.objects.filter(goods_receipt__purchase_order_id__in=po_ids)
+        .values('goods_receipt__purchase_order_id')
+        .annotate(
+            accepted_quantity=Sum('quantity_accepted'),
+            accepted_amount=Sum(ExpressionWrapper(
+                F('quantity_accepted') * F('purchase_order_item__unit_price'), output_field=money
+            )),
+        )
+        .order_by()
+    )
+    itemised = set()
+    for row in accepted:
+        po = totals.get(row['goods_receipt__purchase_order_id'])
+        if po is None:
+            continue
+        itemised.add(row['goods_receipt__purchase_order_id'])
+        po['received_quantity'] = row['accepted_quantity'] or 0
+        po['received_amount'] = row['accepted_amount'] or Decimal('0')
+
+    delivered = (
+        GoodsReceipt.objects.filter(purchase_order_id__in=po_ids)
+        .values('purchase_order_id')
+        .annotate(delivered=Sum('delivered_quantity'))
+        .order_by()
+    )
+    for row in delivered:
+        po = totals.get(row['purchase_order_id'])
+        if po is None or row['purchase_order_id'] in itemised or not row['delivered']:
+            continue
+        # Header-only receipts: value them at the PO's average unit price
+        po['received_quantity'] = row['delivered']
+        if po['ordered_quantity']:
+            po['received_amount'] = po['ordered_amount'] * row['delivered'] / po['ordered_quantity']
+
+    billed = (
+        Invoice.objects.filter(purchase_order_id__in=po_ids)
+        .exclude(status='cancelled')
+        .values('purchase_order_id')
+        .annotate(billed=Sum('subtotal'))
+        .order_by()
+    )
+    for row in billed:
+        po = totals.get(row['purchase_order_id'])
+        if po is not None:
+            po['billed_amount'] = row['billed'] or Decimal('0')
+    return totals
+
+
+def evaluate(invoice, po, policy):
+    """Return the exception codes for one invoice row against its PO totals"""
+    if po is None:
+        return ['no_purchase_order']
+
+    exceptions = []
+    if invoice['vendor_id'] != po['vendor_id']:
+        exceptions.append('vendor_mismatch')
+    if not po['received_quantity']:
+        exceptions.append('not_received')
+    else:
+        allowed = po['ordered_quantity'] * (1 + Decimal(str(policy['quantity_tolerance_percent'])) / 100)
+        if po['received_quantity'] > allowed:
+            exceptions.append('over_delivered')
+
+    billed = po['billed_amount']
+    if billed > po['ordered_amount'] + _tolerance(po['ordered_amount'], policy):
+        exceptions.append('exceeds_ordered')
+    if po['received_quantity'] and billed > po['received_amount'] + _tolerance(po['received_amount'], policy):
+        exceptions.append('exceeds_received')
+    return exceptions
+
+
+def with_exception(matches, code):
+    """
+    Narrow an InvoiceMatch queryset to rows whose exceptions include `code`.
+    JSONField __contains is not available on SQLite, so the stored list is
+    compared as text; codes are stored as quoted JSON strings and contain
+    no quotes themselves, so '"<code>"' only matches that element.
+    """
+    return matches.annotate(exceptions_text=Cast('exceptions', TextField())).filter(
+        exceptions_text__contains=f'"{code}"'
+    )
+
+
+def _save_matches(matches):
+    options = {
+        'update_conflicts': True,
+        'update_fields': [
+            'status', 'exceptions', 'ordered_quantity', 'received_quantity',
+            'ordered_amount', 'received_amount', 'billed_amount', 'matched_at',
+        ],
+    }
+    # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['invoice']
+    for offset in range(0, len(matches), WRITE_CHUNK_SIZE):
+        with transaction.atomic():
+            InvoiceMatch.objects.bulk_create(matches[offset:offset + WRITE_CHUNK_SIZE], **options)
+
+
+def run_three_way_match(policy=None):
+    """
+    Match every open invoice and store the outcome in InvoiceMatch.
+    Returns {'invoices': n, 'matched': n, 'exception': n}.
+    """
+    policy = policy or get_policy()
+    # Read the open invoices once so the PO totals and the loop below see the same set
+    invoices = list(
+        Invoice.objects.filter(status__in=policy['invoice_statuses'])
+        .values('id', 'vendor_id', 'purchase_order_id').order_by()
+    )
+    po_ids = sorted({invoice['purchase_order_id'] for invoice in invoices if invoice['purchase_order_id']})
+    totals = {}
+    for offset in range(0, len(po_ids), READ_CHUNK_SIZE):
+        totals.update(_po_totals(po_ids[offset:offset + READ_CHUNK_SIZE]))
+
+    matched_at = timezone.now()
+    summary = {'invoices': 0, 'matched': 0, 'exception': 0}
+    matches = []
+    for invoice in invoices:
+        po = totals.get(invoice['purchase_order_id'])
+        exceptions = evaluate(invoice, po, policy)
+        status = 'exception' if exceptions else 'matched'
+        po = po or {}
+        matches.append(InvoiceMatch(
+            invoice_id=invoice['id'],
+            status=status,
+            exceptions=exceptions,
+            ordered_quantity=po.get('ordered_quantity', 0),
+            received_quantity=po.get('received_quantity', 0),
+            ordered_amount=_money(po.get('ordered_amount')),
+            received_amount=_money(po.get('received_amount')),
+            billed_amount=_money(po.get('billed_amount')),
+            matched_at=matched_at,
+        ))
+        summary['invoices'] += 1
+        summary[status] += 1
+
+    _save_matches(matches)
+    return summary
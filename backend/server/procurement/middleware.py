@@ -0,0 +1,204 @@
+"""
+Request middleware for the procurement API.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Django calls a sync-and-async-capable middleware with a coroutine
+    get_response when the rest of the chain is async; __call__ then returns
+    the __acall__ coroutine instead of forcing an async-to-sync hop for
+    every request to an async view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+
+# ==================== SESSION REFRESH ====================
+
+class SessionRefreshMiddleware(HybridMiddleware):
+    """
+    Extend session expiry only when it is due, instead of on every request.
+
+    With SESSION_SAVE_EVERY_REQUEST off, Django only writes a session when it
+    is modified. This middleware marks the session modified once its last
+    refresh is older than SESSION_REFRESH_THRESHOLD seconds, so a steady
+    stream of reads costs one session write per threshold window.
+    Must sit after SessionMiddleware and AuthenticationMiddleware.
+    """
+    REFRESHED_AT_KEY = '_refreshed_at'
+
+    @property
+    def threshold(self):
+        return getattr(settings, 'SESSION_REFRESH_THRESHOLD', settings.SESSION_COOKIE_AGE // 2)
+
+    def handle(self, request):
+        return self.refresh(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # Reading the session or the lazy user may hit the database
+        return await sync_to_async(self.refresh)(request, response)
+
+    def refresh(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty() or session.modified:
+            return response
+        if not request.user.is_authenticated or response.status_code >= 500:
+            return response
+
+        now = int(time.time())
+        refreshed_at = session.get(self.REFRESHED_AT_KEY, 0)
+        if now - refreshed_at >= self.threshold:
+            session[self.REFRESHED_AT_KEY] = now
+        return response
+
+
+# ==================== READ REPLICA ROUTING ====================
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Serve safe-method requests from the read replica (see procurement.routers).
+
+    After an unsafe request the client gets a short-lived pin cookie. While
+    it is valid, that client's reads stay on the primary, so it always sees
+    its own writes despite replication lag.
+    Does nothing unless the replica alias is configured.
+    """
+    PIN_COOKIE = 'db_pin'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    @property
+    def pin_seconds(self):
+        return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES.get(self.PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self, response):
+        if response.status_code < 400:
+            response.set_cookie(
+                self.PIN_COOKIE,
+                str(int(time.time()) + self.pin_seconds),
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+    def handle(self, request):
+        from .routers import replica_alias, use_replica
+
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        if request.method not in self.SAFE_METHODS:
+            return self.pin(self.get_response(request))
+
+        on_replica = not self.is_pinned(request)
+        with use_replica(on_replica):
+            response = self.get_response(request)
+        response['X-DB-Route'] = 'replica' if on_replica else 'primary'
+        return response
+
+    async def __acall__(self, request):
+        from .routers import replica_alias, use_replica
+
+        if replica_alias() is None:
+            return await self.get_response(request)
+
+        if request.method not in self.SAFE_METHODS:
+            return self.pin(await self.get_response(request))
+
+        # The context variable is copied into sync_to_async threads, so the
+        # async ORM's queries are routed the same way
+        on_replica = not self.is_pinned(request)
+        with use_replica(on_replica):
+            response = await self.get_response(request)
+        response['X-DB-Route'] = 'replica' if on_replica else 'primary'
+        return response
+
+
+# ==================== DATABASE CONNECTION METRICS ====================
+
+class DatabaseMetricsMiddleware(HybridMiddleware):
+    """
+    Record in procurement.db_metrics whether each request's first query
+    reused a persistent connection and how long opening one took. The
+    connection is not touched here: Django opens it (and runs the
+    CONN_HEALTH_CHECKS ping) on the first query, so requests that never
+    query do not pay for either.
+    """
+
+    def metrics(self):
+        from django.db import connections
+
+        from . import db_metrics
+
+        return db_metrics.RequestMetrics(connections, list(settings.DATABASES))
+
+    def handle(self, request):
+        metrics = self.metrics()
+        metrics.install()
+        try:
+            return self.get_response(request)
+        finally:
+            metrics.uninstall()
+
+    async def __acall__(self, request):
+        # Connections and their execute wrappers are per thread; the async
+        # ORM runs its queries on the same thread-sensitive executor
+        metrics = self.metrics()
+        await sync_to_async(metrics.install)()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(metrics.uninstall)()
+
+
+# ==================== STATUS EVENT ACTOR ====================
+
+class StatusEventActorMiddleware(HybridMiddleware):
+    """
+    Publish the current request to procurement.timeline so status events
+    recorded by signal handlers name the user who made the change. The user
+    is read when an event is recorded, after DRF has authenticated it.
+    """
+
+    def handle(self, request):
+        from .timeline import current_request
+
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        from .timeline import current_request
+
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
@@ -0,0 +1,67 @@
+# Full-text indexes backing /api/search/
+# MySQL gets FULLTEXT indexes, SQLite gets external-content FTS5 tables kept
+# in sync by triggers. Other backends are left alone and use icontains.
+from django.db import migrations
+
+
+SEARCH_COLUMNS = {
+    'procurement_vendor': ('company_name', 'vendor_code', 'contact_person', 'email'),
+    'procurement_product': ('product_code', 'name', 'description'),
+    'procurement_purchaserequest': ('item_name', 'department', 'justification'),
+    'procurement_requestforquotation': ('rfq_number', 'admin_notes'),
+    'procurement_purchaseorder': ('po_number', 'tracking_number', 'notes'),
+    'procurement_invoice': ('invoice_number', 'notes'),
+}
+
+
+def _sqlite_statements(table, columns):
+    fts = f"{table}_fts"
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f"new.{c}" for c in columns)
+    old_cols = ', '.join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_COLUMNS.items():
+        if vendor == 'mysql':
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX {table}_ft ({', '.join(columns)})"
+            )
+        elif vendor == 'sqlite':
+            for statement in _sqlite_statements(table, columns):
+                schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_COLUMNS:
+        if vendor == 'mysql':
+            schema_editor.execute(f"ALTER TABLE {table} DROP INDEX {table}_ft")
+        elif vendor == 'sqlite':
+            fts = f"{table}_fts"
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0014_rename_reference_number_payment_transaction_reference_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
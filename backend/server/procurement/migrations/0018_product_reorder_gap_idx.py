@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 10:40
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0017_synctombstone_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('reorder_level'), '-', models.F('current_stock')), models.F('is_active'), name='product_reorder_gap_idx'),
+        ),
+    ]
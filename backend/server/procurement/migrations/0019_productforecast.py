@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0018_product_reorder_gap_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekly_demand_ma', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('weekly_demand_ses', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('demand_std', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('safety_stock', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reorder_point', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('fill_rate', models.FloatField(default=1.0)),
+                ('lead_time_days', models.FloatField(default=0)),
+                ('history_weeks', models.PositiveIntegerField(default=0, help_text='Weeks with any demand in the window')),
+                ('generated_at', models.DateTimeField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='procurement.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0019_productforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('exception', 'Exception')], max_length=20)),
+                ('exceptions', models.JSONField(blank=True, default=list, help_text='Exception codes, empty when matched')),
+                ('ordered_quantity', models.IntegerField(default=0)),
+                ('received_quantity', models.IntegerField(default=0)),
+                ('ordered_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('received_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('billed_amount', models.DecimalField(decimal_places=2, default=0, help_text='Subtotal of every non-cancelled invoice against the purchase order', max_digits=12)),
+                ('matched_at', models.DateTimeField()),
+                ('invoice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match', to='procurement.invoice')),
+            ],
+            options={
+                'ordering': ['-matched_at'],
+                'indexes': [models.Index(fields=['status', 'matched_at'], name='invoicematch_status_idx')],
+            },
+        ),
+    ]
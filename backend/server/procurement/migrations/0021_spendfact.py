@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0020_invoicematch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the PO order month')),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('lines', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='procurement.category')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='procurement.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'department', 'category', 'vendor', 'status'], name='spendfact_key_idx')],
+            },
+        ),
+    ]
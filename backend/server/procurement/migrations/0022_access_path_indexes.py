@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0021_spendfact'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['vendor', 'status', 'invoice_date'], name='invoice_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['invoice', 'payment_date'], name='payment_invoice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['assigned_to', 'created_at'], name='po_assigned_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'delivery_status', 'expected_delivery_date'], name='po_vendor_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['status', 'created_at'], name='pr_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['employee', 'created_at'], name='pr_employee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestforquotation',
+            index=models.Index(fields=['vendor', 'status', 'sent_date'], name='rfq_vendor_status_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 16:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0023_backgroundjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('purchase_request', 'Purchase Request'), ('rfq', 'Request for Quotation'), ('quotation', 'Vendor Quotation'), ('purchase_order', 'Purchase Order')], max_length=30)),
+                ('document_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(default='status', help_text='Status field that changed', max_length=30)),
+                ('from_status', models.CharField(blank=True, help_text='Empty when the document was created', max_length=30)),
+                ('to_status', models.CharField(max_length=30)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['at', 'id'],
+                'indexes': [models.Index(fields=['document_type', 'document_id', 'at'], name='statusevent_document_idx'), models.Index(fields=['document_type', 'field', 'to_status', 'at'], name='statusevent_transition_idx')],
+            },
+        ),
+    ]
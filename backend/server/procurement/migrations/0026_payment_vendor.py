@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 18:10
+# Payment.vendor was added to the model without a migration. Existing
+# payments take the vendor of the invoice they pay before the column
+# becomes required.
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_invoice_vendor(apps, schema_editor):
+    Payment = apps.get_model('procurement', 'Payment')
+    Invoice = apps.get_model('procurement', 'Invoice')
+    Payment.objects.filter(vendor__isnull=True).update(
+        vendor_id=Subquery(Invoice.objects.filter(pk=OuterRef('invoice_id')).values('vendor_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0025_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='vendor',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='procurement.vendor'),
+        ),
+        migrations.RunPython(copy_invoice_vendor, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='payment',
+            name='vendor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='procurement.vendor'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-19 19:05
+# Concurrent first writes could insert two rows for one spend cell. Merge
+# any duplicates into the oldest row before the cell becomes unique.
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cells(apps, schema_editor):
+    SpendFact = apps.get_model('procurement', 'SpendFact')
+    key = ('month', 'department', 'category_id', 'vendor_id', 'status')
+    duplicates = (
+        SpendFact.objects.values(*key)
+        .annotate(rows=Count('id'), keep=Min('id'), total_amount=Sum('amount'),
+                  total_quantity=Sum('quantity'), line_count=Sum('lines'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for cell in duplicates:
+        cell_rows = SpendFact.objects.filter(**{field: cell[field] for field in key})
+        cell_rows.exclude(pk=cell['keep']).delete()
+        cell_rows.filter(pk=cell['keep']).update(
+            amount=cell['total_amount'], quantity=cell['total_quantity'], lines=cell['line_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0026_payment_vendor'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cells, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='spendfact',
+            constraint=models.UniqueConstraint(models.F('month'), models.F('department'), django.db.models.functions.comparison.Coalesce('category', models.Value(0)), models.F('vendor'), models.F('status'), name='spendfact_cell_unique'),
+        ),
+    ]
@@ -0,0 +1,366 @@
+"""
+Reusable ViewSet mixins for the procurement API.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, Count, Max, Q, When
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .response_cache import get_model_versions, response_cache_key, response_cache_timeout
+from .routers import use_replica
+
+
+# ==================== SPARSE FIELDSETS ====================
+
+def _resolve_source(model, path):
+    """
+    Work out how to load a `__` separated model path.
+    Returns (select_related path or None, only() path or None), or None when
+    the path cannot be loaded with a single joined query.
+    """
+    select_parts = []
+    current = model
+    segments = path.split('__')
+    for index, segment in enumerate(segments):
+        try:
+            field = current._meta.get_field(segment)
+        except FieldDoesNotExist:
+            return None
+
+        is_last = index == len(segments) - 1
+        if not field.is_relation:
+            return ('__'.join(select_parts) or None, path) if is_last else None
+        if field.one_to_many or field.many_to_many:
+            return None
+
+        select_parts.append(segment)
+        current = field.related_model
+        if is_last:
+            # Whole related row; reverse one-to-one cannot be named in only()
+            only_path = None if field.auto_created and not field.concrete else path
+            return '__'.join(select_parts), only_path
+    return None
+
+
+class SparseFieldsetMixin:
+    """
+    Trim list/retrieve querysets to what ?fields= and ?expand= will render.
+
+    The serializer (see serializers.SparseFieldsMixin) decides which fields
+    are rendered. This mixin turns those fields into only(), select_related()
+    and prefetch_related() calls, using the serializer's Meta.field_sources
+    for computed fields and Meta.expandable_fields for nested relations.
+    Without either query parameter the queryset is left untouched.
+    """
+
+    def _is_sparse_request(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return False
+        params = request.query_params
+        return 'fields' in params or 'expand' in params
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self._is_sparse_request():
+            return queryset
+
+        serializer = self.get_serializer()
+        meta = getattr(serializer, 'Meta', None)
+        field_sources = getattr(meta, 'field_sources', {})
+        expandable = getattr(meta, 'expandable_fields', {})
+        model = queryset.model
+
+        select_paths = set()
+        only_paths = {model._meta.pk.name}
+        prefetch_paths = []
+        full_rows = set()
+        prefetched = set()
+        can_defer = True
+
+        def add_source(path):
+            resolved = _resolve_source(model, path)
+            if resolved is None:
+                return False
+            select_path, only_path = resolved
+            if select_path:
+                select_paths.add(select_path)
+            if only_path:
+                only_paths.add(only_path)
+            return True
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in expandable:
+                spec = expandable[name]
+                for path in spec.get('sources', ()):
+                    can_defer = add_source(path) and can_defer
+                for path in spec.get('prefetch', ()):
+                    prefetch_paths.append(path)
+                    hop = path.split('__')[0]
+                    resolved = _resolve_source(model, hop)
+                    if resolved and resolved[1] and '__' in path:
+                        # Join the forward relation the prefetch starts from as a whole row
+                        full_rows.add(hop)
+                    elif resolved:
+                        # Reverse one-to-one: let the prefetch own it
+                        prefetched.add(hop)
+                continue
+            if name in field_sources:
+                for path in field_sources[name]:
+                    can_defer = add_source(path) and can_defer
+                continue
+            if field.source == '*' or not add_source(field.source.replace('.', '__')):
+                can_defer = False
+
+        def under(path, hops):
+            return any(path == hop or path.startswith(f'{hop}__') for hop in hops)
+
+        select_paths = {p for p in select_paths if not under(p, prefetched)} | full_rows
+        only_paths = {p for p in only_paths if not under(p, prefetched | full_rows)} | full_rows
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_paths:
+            queryset = queryset.select_related(*sorted(select_paths))
+        if prefetch_paths:
+            queryset = queryset.prefetch_related(*prefetch_paths)
+        if can_defer:
+            queryset = queryset.only(*sorted(only_paths))
+        return queryset
+
+
+# ==================== CONDITIONAL GET ====================
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve GETs with 304 Not Modified when the client's
+    validator still matches, before anything is serialized.
+
+    The validator is one aggregate query: MAX() over
+    `conditional_timestamp_fields` plus COUNT() of the filtered rows and of
+    each related table those fields reach.
+    List the timestamps of every related row the serializer renders so a
+    change to nested data also changes the ETag. Lists only send an ETag,
+    because Last-Modified cannot see deletes; details send both.
+    Set `conditional_timestamp_fields = None` to opt a ViewSet out.
+    Set `conditional_date_relative = True` when the serializer renders
+    fields computed from today's date (days until delivery): the validator
+    then also changes at midnight.
+
+    ViewSets that also use CachedResponseMixin take the ETag from the
+    response cache key instead. It already changes with every write to a
+    cache dependency, and a cache hit then costs no query at all.
+    """
+    conditional_timestamp_fields = ('updated_at',)
+    conditional_date_relative = False
+
+    def _conditional_state(self, queryset):
+        fields = self.conditional_timestamp_fields
+        aggregates = {f'ts_{index}': Max(path) for index, path in enumerate(fields)}
+        # Counting the joined related rows catches deletes that leave every MAX() as it was
+        relations = sorted({path.rsplit('__', 1)[0] for path in fields if '__' in path})
+        for index, relation in enumerate(relations):
+            aggregates[f'rel_{index}'] = Count(relation)
+        aggregates['row_count'] = Count('pk')
+        state = queryset.order_by().aggregate(**aggregates)
+
+        timestamps = [state[f'ts_{index}'] for index in range(len(fields))]
+        relation_counts = [str(state[f'rel_{index}']) for index in range(len(relations))]
+        present = [ts for ts in timestamps if ts is not None]
+        last_modified = max(present) if present else None
+        today = None
+        if self.conditional_date_relative:
+            today = timezone.localdate()
+            midnight = timezone.make_aware(datetime.combine(today, time.min))
+            last_modified = max(last_modified, midnight) if last_modified else midnight
+
+        raw = '|'.join([
+            queryset.model._meta.label_lower,
+            self.request.get_full_path(),
+            str(state['row_count']),
+            *relation_counts,
+            *(ts.isoformat() if ts else '-' for ts in timestamps),
+            *([today.isoformat()] if today else []),
+        ])
+        etag = 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+        return etag, last_modified, state['row_count']
+
+    def _cached_etag(self):
+        """ETag derived from the response cache key, or None when responses are not cached"""
+        if not isinstance(self, CachedResponseMixin):
+            return None
+        return 'W/"%s"' % hashlib.md5(self._response_cache_key().encode()).hexdigest()
+
+    def _finalize_conditional(self, response, etag, last_modified=None):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # Session and SignedTokenAuthentication callers see different rows
+            patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.conditional_timestamp_fields is None:
+            return super().list(request, *args, **kwargs)
+
+        etag = self._cached_etag()
+        if etag is None:
+            etag, _, _ = self._conditional_state(self.filter_queryset(self.get_queryset()))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self._finalize_conditional(not_modified, etag)
+
+        response = super().list(request, *args, **kwargs)
+        return self._finalize_conditional(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.conditional_timestamp_fields is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, last_modified, row_count = self._cached_etag(), None, 1
+        if etag is None:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            etag, last_modified, row_count = self._conditional_state(queryset)
+        if row_count:
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(last_modified.timestamp()) if last_modified else None,
+            )
+            if not_modified is not None:
+                return self._finalize_conditional(not_modified, etag, last_modified)
+
+        response = super().retrieve(request, *args, **kwargs)
+        return self._finalize_conditional(response, etag, last_modified)
+
+
+# ==================== RESPONSE CACHE ====================
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve GETs from the response cache.
+
+    `cache_dependencies` lists every model whose rows end up in the response.
+    Saving or deleting any of them bumps that model's version and therefore
+    changes the cache key, so no explicit purge is needed.
+    """
+    cache_dependencies = ()
+
+    def _response_cache_key(self):
+        # One model-version lookup per request, shared with ConditionalGetMixin
+        if not hasattr(self, '_cache_key'):
+            self._cache_key = response_cache_key(self.request, self.cache_dependencies)
+        return self._cache_key
+
+    def _cached(self, request, render):
+        key = self._response_cache_key()
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        # Render misses from the primary so replica lag never ends up cached
+        with use_replica(False):
+            response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, response_cache_timeout())
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+
+# ==================== VENDOR CONTEXT ====================
+
+VENDOR_SESSION_KEY = '_vendor_context'
+
+
+def resolve_vendor_id(request):
+    """
+    Return the id of the vendor the authenticated user acts for, or None.
+
+    One query, preferring UserProfile.vendor over Vendor.user as the old
+    lookup did. Session-authenticated users get the result stored in their
+    session, so later requests resolve it without touching the database.
+    The stored value carries the UserProfile and Vendor cache versions, so
+    relinking a profile or vendor makes every session resolve it again.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    from .models import UserProfile, Vendor
+
+    session = getattr(request, 'session', None)
+    cached = session.get(VENDOR_SESSION_KEY) if session is not None else None
+    versions = get_model_versions((UserProfile, Vendor)) if session is not None else None
+    if cached and cached[0] == user.pk and cached[2:] == [versions]:
+        return cached[1]
+
+    vendor_id = (
+        Vendor.objects.filter(Q(user_profiles__user_id=user.pk) | Q(user_id=user.pk))
+        .annotate(via_profile=Case(When(user_profiles__user_id=user.pk, then=0), default=1))
+        .order_by('via_profile', 'id')
+        .values_list('id', flat=True)
+        .first()
+    )
+    if vendor_id is not None and session is not None and session.session_key:
+        session[VENDOR_SESSION_KEY] = [user.pk, vendor_id, versions]
+    return vendor_id
+
+
+class VendorContextMixin:
+    """
+    Resolve the caller's vendor once, right after authentication, and
+    expose it as `request.vendor_id` so actions can filter on the id
+    without loading the Vendor row.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.vendor_id = resolve_vendor_id(request)
+
+
+# ==================== STATUS TIMELINE ====================
+
+class StatusTimelineMixin:
+    """
+    GET /api/<documents>/{id}/timeline/: the document's status events,
+    oldest first, from the StatusEvent log (see procurement.timeline).
+    Visibility is checked with an EXISTS against the ViewSet's own queryset,
+    so callers only see timelines of documents they can retrieve.
+    """
+    timeline_document_type = None
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        from .serializers import StatusEventSerializer
+        from .timeline import timeline
+
+        if not self.filter_queryset(self.get_queryset()).filter(pk=pk).exists():
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        events = timeline(self.timeline_document_type, pk)
+        return Response({
+            'document_type': self.timeline_document_type,
+            'document_id': int(pk),
+            'events': StatusEventSerializer(events, many=True).data,
+        })
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -181,6 +184,7 @@ class VendorDocument(models.Model):
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Categories"
@@ -215,11 +219,38 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Reorder scan: range on reorder_level - current_stock >= 0, is_active read from the index
+            models.Index(
+                F('reorder_level') - F('current_stock'), F('is_active'),
+                name='product_reorder_gap_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.product_code} - {self.name}"
 
 
+# =========================
+# PRODUCT FORECAST
+# =========================
+class ProductForecast(models.Model):
+    """Latest weekly demand forecast for a product (written by run_demand_forecast)"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast')
+    weekly_demand_ma = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    weekly_demand_ses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    demand_std = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    safety_stock = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reorder_point = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    fill_rate = models.FloatField(default=1.0)
+    lead_time_days = models.FloatField(default=0)
+    history_weeks = models.PositiveIntegerField(default=0, help_text="Weeks with any demand in the window")
+    generated_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Forecast for {self.product.product_code}"
+
+
 # =========================
 # PURCHASE REQUEST
 # =========================
@@ -266,6 +297,11 @@ class PurchaseRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='pr_updated_at_idx'),
+            models.Index(fields=['status', 'created_at'], name='pr_status_created_idx'),
+            models.Index(fields=['employee', 'created_at'], name='pr_employee_created_idx'),
+        ]
     
     def __str__(self):
         return f"PR #{self.id} - {self.item_name} ({self.status})"
@@ -328,6 +364,10 @@ class RequestForQuotation(models.Model):
         ordering = ['-sent_date']
         verbose_name = 'Request for Quotation'
         verbose_name_plural = 'Requests for Quotation'
+        indexes = [
+            models.Index(fields=['updated_at'], name='rfq_updated_at_idx'),
+            models.Index(fields=['vendor', 'status', 'sent_date'], name='rfq_vendor_status_sent_idx'),
+        ]
     
     def __str__(self):
         return f"RFQ-{self.rfq_number} - {self.vendor.company_name}"
@@ -412,6 +452,7 @@ class VendorQuotation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['updated_at'], name='quotation_updated_at_idx')]
     
     def __str__(self):
         return f"Quote-{self.quotation_number} - {self.rfq.vendor.company_name}"
@@ -511,6 +552,15 @@ class PurchaseOrder(models.Model):
     
     class Meta:
         ordering = ['-order_date', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='po_updated_at_idx'),
+            models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+            models.Index(fields=['assigned_to', 'created_at'], name='po_assigned_created_idx'),
+            models.Index(
+                fields=['vendor', 'delivery_status', 'expected_delivery_date'],
+                name='po_vendor_delivery_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"PO-{self.po_number}"
@@ -535,6 +585,7 @@ class PurchaseOrderItem(models.Model):
     received_quantity = models.IntegerField(default=0)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def save(self, *args, **kwargs):
         self.line_total = Decimal(self.quantity) * self.unit_price
@@ -567,6 +618,7 @@ class GoodsReceipt(models.Model):
     received_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='received_goods')
     received_at = models.DateTimeField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"GR for PO #{self.purchase_order.po_number}"
@@ -645,6 +697,10 @@ class Invoice(models.Model):
     
     class Meta:
         ordering = ['-invoice_date']
+        indexes = [
+            models.Index(fields=['updated_at'], name='invoice_updated_at_idx'),
+            models.Index(fields=['vendor', 'status', 'invoice_date'], name='invoice_vendor_status_idx'),
+        ]
     
     def __str__(self):
         return f"INV-{self.invoice_number}"
@@ -654,6 +710,39 @@ class Invoice(models.Model):
         return self.total_amount - self.paid_amount
 
 
+# =========================
+# INVOICE MATCH
+# =========================
+class InvoiceMatch(models.Model):
+    """Result of the latest three-way match of an invoice (written by run_three_way_match)"""
+    STATUS_CHOICES = [
+        ('matched', 'Matched'),
+        ('exception', 'Exception'),
+    ]
+    
+    invoice = models.OneToOneField(Invoice, on_delete=models.CASCADE, related_name='match')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    exceptions = models.JSONField(default=list, blank=True, help_text="Exception codes, empty when matched")
+    
+    ordered_quantity = models.IntegerField(default=0)
+    received_quantity = models.IntegerField(default=0)
+    ordered_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    received_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    billed_amount = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0,
+        help_text="Subtotal of every non-cancelled invoice against the purchase order"
+    )
+    
+    matched_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-matched_at']
+        indexes = [models.Index(fields=['status', 'matched_at'], name='invoicematch_status_idx')]
+    
+    def __str__(self):
+        return f"Match for INV-{self.invoice.invoice_number}: {self.status}"
+
+
 # =========================
 # PAYMENT
 # =========================
@@ -699,9 +788,14 @@ class Payment(models.Model):
         related_name='created_payments'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['updated_at'], name='payment_updated_at_idx'),
+            models.Index(fields=['invoice', 'payment_date'], name='payment_invoice_date_idx'),
+        ]
     
     def __str__(self):
         return f"PAY-{self.payment_number}"
@@ -728,13 +822,183 @@ class Notification(models.Model):
     related_order = models.ForeignKey(PurchaseOrder, on_delete=models.SET_NULL, null=True, blank=True)
     related_rfq = models.ForeignKey(RequestForQuotation, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['updated_at'], name='notification_updated_at_idx')]
     
     def __str__(self):
         return f"Notification for {self.user.username} - {self.type}"
+
+
+# =========================
+# SPEND FACT
+# =========================
+class SpendFact(models.Model):
+    """
+    Purchase order line spend rolled up by month, department, category,
+    vendor and PO status. Kept current by signal deltas (see procurement.spend).
+    Each cell has exactly one row; a missing category counts as 0 in the key.
+    """
+    month = models.DateField(help_text="First day of the PO order month")
+    department = models.CharField(max_length=100, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20)
+    
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantity = models.BigIntegerField(default=0)
+    lines = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'department', 'category', 'vendor', 'status'], name='spendfact_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                F('month'), F('department'), Coalesce('category', Value(0)), F('vendor'), F('status'),
+                name='spendfact_cell_unique',
+            ),
+        ]
     
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.department or '-'} {self.status}: {self.amount}"
+
+
+# =========================
+# SYNC TOMBSTONE
+# =========================
+class SyncTombstone(models.Model):
+    """Deleted row of a synced model, kept so /api/sync/ can report deletes"""
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx')]
+    
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at}"
+
+
+# =========================
+# STATUS EVENT
+# =========================
+class StatusEvent(models.Model):
+    """Append-only log of document status transitions (see procurement.timeline)"""
+    DOCUMENT_TYPE_CHOICES = [
+        ('purchase_request', 'Purchase Request'),
+        ('rfq', 'Request for Quotation'),
+        ('quotation', 'Vendor Quotation'),
+        ('purchase_order', 'Purchase Order'),
+    ]
+    
+    document_type = models.CharField(max_length=30, choices=DOCUMENT_TYPE_CHOICES)
+    document_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=30, default='status', help_text="Status field that changed")
+    from_status = models.CharField(max_length=30, blank=True, help_text="Empty when the document was created")
+    to_status = models.CharField(max_length=30)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    note = models.CharField(max_length=255, blank=True)
+    at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['at', 'id']
+        indexes = [
+            models.Index(fields=['document_type', 'document_id', 'at'], name='statusevent_document_idx'),
+            models.Index(fields=['document_type', 'field', 'to_status', 'at'], name='statusevent_transition_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Status events are append-only')
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.document_type} #{self.document_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+# =========================
+# BACKGROUND JOB
+# =========================
+class BackgroundJob(models.Model):
+    """Durable unit of deferred work, claimed and run by run_workers (see procurement.jobs)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    QUEUE_CHOICES = [
+        ('io', 'I/O bound'),
+        ('cpu', 'CPU bound'),
+    ]
+    
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=10, choices=QUEUE_CHOICES, default='io')
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(help_text="Not claimed before this time (retry backoff)")
+    locked_until = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Visibility timeout: a running job past this time is claimed again"
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-priority', 'run_after']
+        indexes = [
+            models.Index(fields=['queue', 'status', 'priority', 'run_after'], name='job_claim_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_lease_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+# =========================
+# IDEMPOTENCY KEY
+# =========================
+class IdempotencyKey(models.Model):
+    """Client-supplied Idempotency-Key and the response it produced (see procurement.idempotency)"""
+    STATUS_CHOICES = [
+        ('in_progress', 'In progress'),
+        ('completed', 'Completed'),
+    ]
+
+    scope = models.CharField(max_length=100, help_text="Endpoint the key was sent to")
+    owner = models.CharField(max_length=50, help_text="'user:<id>', or 'anonymous'")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64, help_text="SHA-256 of the method, path and body")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_until = models.DateTimeField(help_text="An in-progress key past this time may be taken over")
+    expires_at = models.DateTimeField(help_text="Replayed until this time, then purged")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner', 'key'], name='idempotency_key_unique'),
+        ]
+        indexes = [models.Index(fields=['expires_at'], name='idempotency_expires_idx')]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.status})"
+
 # =========================
 # SIGNALS FOR AUTO-GENERATION
 # =========================
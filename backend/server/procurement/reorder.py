@@ -0,0 +1,106 @@
+"""
+Reorder-point scan: raise purchase requests for active products whose
+stock has fallen to their reorder level.
+
+Candidates come from one range scan over the (reorder_level -
+current_stock, is_active) expression index on Product, with products
+that already have an open purchase request excluded by NOT EXISTS.
+Requests are written with bulk_create in chunks, so the scan streams over
+large catalogs without loading them. Products with reorder_level 0 are
+treated as untracked and skipped.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from .models import Product, PurchaseRequest
+
+
+OPEN_REQUEST_STATUSES = ('draft', 'pending', 'approved', 'rfq_sent', 'quotation_received')
+
+DEFAULT_POLICY = {
+    # Order enough to bring stock back to reorder_level * target_multiplier
+    'target_multiplier': 2,
+    'minimum_quantity': 1,
+    'department': 'Inventory',
+    'urgency_level': 'medium',
+    # Username the requests are raised for; defaults to the first active superuser
+    'requester': None,
+}
+
+
+class ReorderError(Exception):
+    pass
+
+
+def get_policy():
+    return {**DEFAULT_POLICY, **getattr(settings, 'REORDER_POLICY', {})}
+
+
+def reorder_quantity(current_stock, reorder_level, policy):
+    target = reorder_level * policy['target_multiplier']
+    return max(policy['minimum_quantity'], target - current_stock)
+
+
+def get_requester(policy):
+    users = User.objects.filter(is_active=True)
+    if policy['requester']:
+        requester = users.filter(username=policy['requester']).first()
+        if requester is None:
+            raise ReorderError(f"Reorder requester '{policy['requester']}' does not exist")
+        return requester
+    requester = users.filter(is_superuser=True).order_by('id').first()
+    if requester is None:
+        raise ReorderError('No active superuser to raise reorder requests; set REORDER_POLICY["requester"]')
+    return requester
+
+
+def reorder_candidates():
+    """Active, tracked products at or below their reorder level with no open request"""
+    open_requests = PurchaseRequest.objects.filter(
+        product_id=OuterRef('pk'), status__in=OPEN_REQUEST_STATUSES
+    )
+    return (
+        Product.objects
+        .alias(reorder_gap=F('reorder_level') - F('current_stock'))
+        .filter(is_active=True, reorder_gap__gte=0, reorder_level__gt=0)
+        .exclude(Exists(open_requests))
+        .order_by()
+        .values('id', 'name', 'current_stock', 'reorder_level')
+    )
+
+
+def run_reorder_scan(requester=None, dry_run=False, chunk_size=1000):
+    """Create purchase requests for every reorder candidate; returns how many"""
+    policy = get_policy()
+    requester = requester or get_requester(policy)
+    created = 0
+    batch = []
+
+    def flush():
+        nonlocal created
+        if batch and not dry_run:
+            with transaction.atomic():
+                PurchaseRequest.objects.bulk_create(batch)
+        created += len(batch)
+        batch.clear()
+
+    for product in reorder_candidates().iterator(chunk_size=chunk_size):
+        batch.append(PurchaseRequest(
+            employee=requester,
+            product_id=product['id'],
+            item_name=product['name'],
+            quantity=reorder_quantity(product['current_stock'], product['reorder_level'], policy),
+            department=policy['department'],
+            urgency_level=policy['urgency_level'],
+            justification=(
+                f"Automatic reorder: stock {product['current_stock']} "
+                f"is at or below reorder level {product['reorder_level']}"
+            ),
+            status='pending',
+        ))
+        if len(batch) >= chunk_size:
+            flush()
+    flush()
+    return created
@@ -0,0 +1,68 @@
+"""
+Response caching for read-heavy reference endpoints.
+
+Cached entries are keyed by path, normalised query string, the caller's
+role and the current version of every model the response depends on.
+Writes bump the model version (see signals.py), so a cached response can
+never outlive the data it was built from. Versions live in the default
+cache; with more than one worker process that cache must be shared
+(file or Redis backend, see CACHES in settings.py).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = 'model-version:{}'
+DEFAULT_TIMEOUT = 300
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_model_versions(models):
+    """Return the current version token of each model, creating missing ones"""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so an evicted counter never reuses an old value
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """Invalidate every cached response that depends on `model`"""
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'admin'
+    profile = getattr(user, 'profile', None)
+    return profile.role if profile else 'employee'
+
+
+def response_cache_key(request, models):
+    query = '&'.join(
+        f'{name}={",".join(sorted(values))}'
+        for name, values in sorted(request.query_params.lists())
+    )
+    versions = '.'.join(str(version) for version in get_model_versions(models))
+    raw = f'{request.path}?{query}|{request_role(request)}|{versions}'
+    return 'response:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def response_cache_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
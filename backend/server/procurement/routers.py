@@ -0,0 +1,60 @@
+"""
+Read-replica database routing.
+
+ReplicaRouter sends reads to the REPLICA_DATABASE alias only while
+`read_from_replica` is switched on for the current request or block.
+ReplicaRoutingMiddleware switches it on for safe-method requests. Every
+other read, and every write, goes to `default`. A request already inside a
+transaction on `default` also reads from `default`, so it sees its own
+uncommitted rows.
+
+Enable it by defining the replica alias in DATABASES and listing
+'procurement.routers.ReplicaRouter' in DATABASE_ROUTERS (settings.py does
+both when DB_REPLICA_HOST or DB_REPLICA_NAME is set).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+DEFAULT_REPLICA_ALIAS = 'replica'
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE', DEFAULT_REPLICA_ALIAS)
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Route reads inside the block to the replica (or, with enabled=False, to the primary)"""
+    token = read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Reads go to the replica when the current request allows it, writes to default"""
+
+    def db_for_read(self, model, **hints):
+        if not read_from_replica.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so objects may relate across them
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
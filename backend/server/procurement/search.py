@@ -0,0 +1,181 @@
+"""
+Full-text search across the main procurement documents.
+
+MySQL is queried through the FULLTEXT indexes and SQLite through the FTS5
+tables created in migration 0015. Any other backend falls back to
+icontains lookups so the endpoint keeps working, just without an index.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import (
+    Vendor, Product, PurchaseRequest, PurchaseOrder,
+    Invoice, RequestForQuotation
+)
+
+
+class SearchTarget:
+    """One searchable document type and how to present its hits"""
+
+    def __init__(self, key, model, columns, display):
+        self.key = key
+        self.model = model
+        self.columns = columns
+        self.display = display
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f"{self.table}_fts"
+
+
+# Keep the column lists in sync with migration 0015
+SEARCH_TARGETS = [
+    SearchTarget(
+        'vendors', Vendor,
+        ('company_name', 'vendor_code', 'contact_person', 'email'),
+        lambda row: {
+            'title': row['company_name'],
+            'subtitle': f"{row['vendor_code']} · {row['contact_person']}",
+            'status': row['status'],
+        },
+    ),
+    SearchTarget(
+        'products', Product,
+        ('product_code', 'name', 'description'),
+        lambda row: {
+            'title': row['name'],
+            'subtitle': row['product_code'],
+            'status': 'active' if row['is_active'] else 'inactive',
+        },
+    ),
+    SearchTarget(
+        'purchase_requests', PurchaseRequest,
+        ('item_name', 'department', 'justification'),
+        lambda row: {
+            'title': row['item_name'],
+            'subtitle': f"PR #{row['id']} · {row['department']}",
+            'status': row['status'],
+        },
+    ),
+    SearchTarget(
+        'rfqs', RequestForQuotation,
+        ('rfq_number', 'admin_notes'),
+        lambda row: {
+            'title': row['rfq_number'],
+            'subtitle': row['admin_notes'][:80],
+            'status': row['status'],
+        },
+    ),
+    SearchTarget(
+        'purchase_orders', PurchaseOrder,
+        ('po_number', 'tracking_number', 'notes'),
+        lambda row: {
+            'title': row['po_number'],
+            'subtitle': row['tracking_number'] or row['notes'][:80],
+            'status': row['status'],
+        },
+    ),
+    SearchTarget(
+        'invoices', Invoice,
+        ('invoice_number', 'notes'),
+        lambda row: {
+            'title': row['invoice_number'],
+            'subtitle': row['notes'][:80],
+            'status': row['status'],
+        },
+    ),
+]
+
+SEARCH_TARGETS_BY_KEY = {target.key: target for target in SEARCH_TARGETS}
+
+MAX_TERMS = 8
+
+
+def tokenize(query):
+    """Split a free-text query into search terms"""
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def _mysql_hits(target, terms, limit):
+    columns = ', '.join(target.columns)
+    boolean_query = ' '.join(f'+{term}*' for term in terms)
+    sql = (
+        f"SELECT id, MATCH({columns}) AGAINST (%s IN BOOLEAN MODE) AS score "
+        f"FROM {target.table} "
+        f"WHERE MATCH({columns}) AGAINST (%s IN BOOLEAN MODE) "
+        f"ORDER BY score DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [boolean_query, boolean_query, limit])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _sqlite_hits(target, terms, limit):
+    # Quote every term so FTS5 operators in user input are taken literally
+    match_query = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+    sql = (
+        f"SELECT rowid, -bm25({target.fts_table}) AS score "
+        f"FROM {target.fts_table} "
+        f"WHERE {target.fts_table} MATCH %s "
+        f"ORDER BY bm25({target.fts_table}) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match_query, limit])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _fallback_hits(target, terms, limit):
+    queryset = target.model.objects.all()
+    for term in terms:
+        term_filter = Q()
+        for column in target.columns:
+            term_filter |= Q(**{f'{column}__icontains': term})
+        queryset = queryset.filter(term_filter)
+    ids = queryset.order_by('-pk').values_list('pk', flat=True)[:limit]
+    return [(pk, 0.0) for pk in ids]
+
+
+def _hits(target, terms, limit):
+    if connection.vendor == 'mysql':
+        return _mysql_hits(target, terms, limit)
+    if connection.vendor == 'sqlite':
+        return _sqlite_hits(target, terms, limit)
+    return _fallback_hits(target, terms, limit)
+
+
+def search(query, types=None, limit=10):
+    """
+    Run a ranked search and return hits grouped by document type.
+    Every type costs one index lookup plus one primary-key fetch.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return {}
+
+    targets = SEARCH_TARGETS
+    if types:
+        targets = [SEARCH_TARGETS_BY_KEY[key] for key in types if key in SEARCH_TARGETS_BY_KEY]
+
+    results = {}
+    for target in targets:
+        hits = _hits(target, terms, limit)
+        if not hits:
+            results[target.key] = []
+            continue
+
+        rows = {
+            row['id']: row
+            for row in target.model.objects.filter(pk__in=[pk for pk, _ in hits]).values()
+        }
+        results[target.key] = [
+            {'id': pk, 'score': round(score, 4), **target.display(rows[pk])}
+            for pk, score in hits
+            if pk in rows
+        ]
+    return results
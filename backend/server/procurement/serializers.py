@@ -4,15 +4,51 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.db import transaction
 from .models import (
-    RequestForQuotation, Vendor, Category, Product,
+    RequestForQuotation, Vendor, Category, Product, ProductForecast,
     PurchaseOrder, PurchaseOrderItem,
-    Invoice, Payment, UserProfile, EmployeeProfile,
-    PurchaseRequest, GoodsReceipt, Notification,VendorQuotation
+    Invoice, InvoiceMatch, Payment, UserProfile, EmployeeProfile,
+    PurchaseRequest, GoodsReceipt, Notification,VendorQuotation, StatusEvent
 )
 
 import secrets
 import string
 
+
+# ==================== SPARSE FIELDSETS ====================
+
+class SparseFieldsMixin:
+    """
+    Render only the fields asked for in ?fields=a,b and only the nested
+    relations named in ?expand=x,y (see Meta.expandable_fields).
+
+    Applies to GET requests that pass either parameter; every other use of
+    the serializer keeps its full representation.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return
+        
+        requested = {f for f in params.get('fields', '').split(',') if f}
+        expand = {f for f in params.get('expand', '').split(',') if f}
+        expandable = set(getattr(self.Meta, 'expandable_fields', {}))
+        
+        for name in list(self.fields):
+            if name in expandable:
+                keep = name in expand
+            else:
+                keep = not requested or name in requested
+            if not keep:
+                self.fields.pop(name)
+
+
 # ==================== VENDOR SERIALIZER ====================
 
 
@@ -23,7 +59,7 @@ def generate_temp_password(length=12):
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 
-class VendorSerializer(serializers.ModelSerializer):
+class VendorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Existing fields...
     create_user_account = serializers.BooleanField(write_only=True, required=False, default=False)
     username = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -47,6 +83,12 @@ class VendorSerializer(serializers.ModelSerializer):
             'rejected_by',      # ← ADD
             'rejected_at',      # ← ADD
         ]
+        field_sources = {
+            'temporary_password': (),
+            'has_user_account': (),
+            'approved_by_name': ('approved_by__first_name', 'approved_by__last_name', 'approved_by__username'),
+            'rejected_by_name': ('rejected_by__first_name', 'rejected_by__last_name', 'rejected_by__username'),
+        }
     
     def get_has_user_account(self, obj):
         from .models import UserProfile
@@ -124,7 +166,7 @@ class VendorSerializer(serializers.ModelSerializer):
 
 # ==================== CATEGORY SERIALIZER ====================
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
@@ -132,7 +174,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
 # ==================== PRODUCT SERIALIZER ====================
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     class Meta:
@@ -140,15 +182,27 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ProductForecastSerializer(serializers.ModelSerializer):
+    product_code = serializers.CharField(source='product.product_code', read_only=True)
+    current_stock = serializers.IntegerField(source='product.current_stock', read_only=True)
+
+    class Meta:
+        model = ProductForecast
+        exclude = ['id']
+
+
 # ==================== PURCHASE ORDER SERIALIZERS ====================
 
-class PurchaseOrderItemSerializer(serializers.ModelSerializer):
+class PurchaseOrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product_name = serializers.SerializerMethodField()  # Changed to SerializerMethodField
     product_code = serializers.CharField(source='product.product_code', read_only=True, allow_null=True)
     
     class Meta:
         model = PurchaseOrderItem
         fields = '__all__'
+        field_sources = {
+            'product_name': ('product__name', 'purchase_order__purchase_request__item_name'),
+        }
     
     def get_product_name(self, obj):
         """Safely get product name, handling None products"""
@@ -160,7 +214,7 @@ class PurchaseOrderItemSerializer(serializers.ModelSerializer):
         return 'Product Not Specified'
 
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.company_name', read_only=True)
     assigned_to_name = serializers.SerializerMethodField()  # ← CHANGE THIS
     days_until_delivery = serializers.SerializerMethodField()  # ← ADD THIS
@@ -177,6 +231,17 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             'delivery_notes', 'tracking_number', 'shipment_date',
             'items', 'days_until_delivery', 'notes', 'has_invoice' 
         ]
+        field_sources = {
+            'assigned_to_name': ('assigned_to__first_name', 'assigned_to__last_name'),
+            'days_until_delivery': ('expected_delivery_date',),
+            'has_invoice': (),
+        }
+        expandable_fields = {
+            'items': {
+                'sources': ('purchase_request__item_name',),
+                'prefetch': ('items__product',),
+            },
+        }
     
     def get_assigned_to_name(self, obj):  # ← INDENT THIS PROPERLY
         if obj.assigned_to:
@@ -191,10 +256,12 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         return None
     
     def get_has_invoice(self, obj):  # ← ADD THIS
+        if hasattr(obj, 'has_invoice'):
+            return obj.has_invoice
         return Invoice.objects.filter(purchase_order=obj).exists()
 # ==================== INVOICE SERIALIZER ====================
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.company_name', read_only=True)
     balance_due = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     po_number = serializers.SerializerMethodField()
@@ -202,17 +269,48 @@ class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
+        field_sources = {
+            'balance_due': ('total_amount', 'paid_amount'),
+            'po_number': ('purchase_order__po_number',),
+        }
     
     def get_po_number(self, obj):
         if obj.purchase_order:
             return obj.purchase_order.po_number
         return None
 
+class InvoiceMatchSerializer(serializers.ModelSerializer):
+    invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True)
+    invoice_status = serializers.CharField(source='invoice.status', read_only=True)
+    invoice_subtotal = serializers.DecimalField(source='invoice.subtotal', max_digits=12, decimal_places=2, read_only=True)
+    vendor_name = serializers.CharField(source='invoice.vendor.company_name', read_only=True)
+    po_number = serializers.CharField(source='invoice.purchase_order.po_number', read_only=True, default=None)
+
+    class Meta:
+        model = InvoiceMatch
+        exclude = ['id']
+
+
+# ==================== STATUS EVENT SERIALIZER ====================
+
+class StatusEventSerializer(serializers.ModelSerializer):
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StatusEvent
+        fields = ['at', 'field', 'from_status', 'to_status', 'actor', 'actor_name', 'note']
+
+    def get_actor_name(self, obj):
+        if obj.actor is None:
+            return None
+        return obj.actor.get_full_name() or obj.actor.username
+
+
 # ==================== PAYMENT SERIALIZER ====================
 
 # In serializers.py - UPDATE PaymentSerializer
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='invoice.vendor.company_name', read_only=True)
     invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True)
     created_by_name = serializers.SerializerMethodField()
@@ -221,6 +319,9 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
         read_only_fields = ['created_at', 'created_by']
+        field_sources = {
+            'created_by_name': ('created_by__first_name', 'created_by__last_name', 'created_by__username'),
+        }
     
     def get_created_by_name(self, obj):
         if obj.created_by:
@@ -421,6 +522,9 @@ class VendorPurchaseOrderSerializer(serializers.ModelSerializer):
         return None
     
     def get_has_invoice(self, obj):
+        # Querysets annotated with Exists() (see VendorDashboardViewSet) skip the per-row query
+        if hasattr(obj, 'has_invoice'):
+            return obj.has_invoice
         from .models import Invoice
         return Invoice.objects.filter(purchase_order=obj).exists()
 
@@ -452,7 +556,7 @@ class DeliveryStatusUpdateSerializer(serializers.Serializer):
 
 # ==================== PURCHASE REQUEST SERIALIZERS ====================
 
-class PurchaseRequestSerializer(serializers.ModelSerializer):
+class PurchaseRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     employee_name = serializers.SerializerMethodField()
     employee_id = serializers.IntegerField(source='employee.id', read_only=True, allow_null=True)
     product_name = serializers.CharField(source='product.name', read_only=True, allow_null=True)
@@ -479,6 +583,9 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
             'rejection_reason'
         ]
         read_only_fields = ['id', 'employee_name', 'employee_id', 'product_name', 'created_at', 'updated_at']
+        field_sources = {
+            'employee_name': ('employee__first_name', 'employee__last_name', 'employee__username'),
+        }
     
     def get_employee_name(self, obj):
         """Safely get employee username"""
@@ -490,7 +597,7 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
 # RFQ SERIALIZERS
 # =========================
 
-class VendorQuotationSerializer(serializers.ModelSerializer):
+class VendorQuotationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='rfq.vendor.company_name', read_only=True)
     rfq_number = serializers.CharField(source='rfq.rfq_number', read_only=True)
     purchase_request_id = serializers.IntegerField(source='rfq.purchase_request.id', read_only=True)
@@ -502,7 +609,7 @@ class VendorQuotationSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'subtotal', 'tax_amount', 'total_amount']
 
 
-class RequestForQuotationSerializer(serializers.ModelSerializer):
+class RequestForQuotationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.company_name', read_only=True)
     vendor_email = serializers.EmailField(source='vendor.email', read_only=True)
     purchase_request_details = serializers.SerializerMethodField()  # Change this
@@ -514,6 +621,19 @@ class RequestForQuotationSerializer(serializers.ModelSerializer):
         model = RequestForQuotation
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'sent_date']
+        field_sources = {
+            'sent_by_name': ('sent_by__first_name', 'sent_by__last_name', 'sent_by__username'),
+            'has_quotation': ('quotation__id',),
+        }
+        expandable_fields = {
+            'purchase_request_details': {
+                'prefetch': ('purchase_request__employee', 'purchase_request__product'),
+            },
+            'quotation': {
+                'sources': ('rfq_number', 'vendor__company_name', 'purchase_request__item_name'),
+                'prefetch': ('quotation',),
+            },
+        }
     
     def get_purchase_request_details(self, obj):
         """Safely serialize purchase request details"""
@@ -532,7 +652,7 @@ class RequestForQuotationSerializer(serializers.ModelSerializer):
 
 # ==================== GOODS RECEIPT SERIALIZERS ====================
 
-class GoodsReceiptSerializer(serializers.ModelSerializer):
+class GoodsReceiptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     purchase_order_number = serializers.SerializerMethodField()
     vendor_name = serializers.SerializerMethodField()
     received_by_name = serializers.SerializerMethodField()
@@ -552,6 +672,11 @@ class GoodsReceiptSerializer(serializers.ModelSerializer):
             'received_at',
         ]
         read_only_fields = ['purchase_order', 'received_by', 'received_at']
+        field_sources = {
+            'purchase_order_number': ('purchase_order__po_number',),
+            'vendor_name': ('purchase_order__vendor__company_name',),
+            'received_by_name': ('received_by__first_name', 'received_by__last_name', 'received_by__username'),
+        }
 
     def get_purchase_order_number(self, obj):
         if obj.purchase_order:
@@ -572,7 +697,7 @@ class GoodsReceiptSerializer(serializers.ModelSerializer):
 
 # ==================== NOTIFICATION SERIALIZERS ====================
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = [
@@ -1,2 +1,232 @@
-# signals.py (we don't need signals now)
-# keep this file empty
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    Category, Product, Vendor, UserProfile, EmployeeProfile,
+    PurchaseRequest, RequestForQuotation, VendorQuotation, PurchaseOrder,
+    PurchaseOrderItem, Invoice, Payment, Notification
+)
+from .autocomplete import product_index
+from .middleware import SessionRefreshMiddleware
+from .response_cache import bump_model_version
+from . import db_metrics, spend, timeline
+from .sync import record_tombstone
+
+
+# =========================
+# PRODUCT AUTOCOMPLETE INDEX
+# =========================
+
+@receiver(post_save, sender=Product)
+def refresh_product_autocomplete(sender, instance, **kwargs):
+    product_index.update(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_autocomplete(sender, instance, **kwargs):
+    product_index.remove(instance.pk)
+
+
+# =========================
+# RESPONSE CACHE INVALIDATION
+# =========================
+
+CACHED_MODELS = (Category, Product, Vendor, User, UserProfile, EmployeeProfile)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_model_version(sender)
+
+
+for cached_model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=cached_model)
+    post_delete.connect(invalidate_cached_responses, sender=cached_model)
+
+
+# =========================
+# DATABASE CONNECTION METRICS
+# =========================
+
+@receiver(connection_created)
+def register_database_connection(sender, connection, **kwargs):
+    db_metrics.connection_opened(connection)
+
+
+# =========================
+# SESSION REFRESH
+# =========================
+
+@receiver(user_logged_in)
+def stamp_session_refresh(sender, request, user, **kwargs):
+    # Login already writes the session; start the refresh window there
+    if hasattr(request, 'session'):
+        request.session[SessionRefreshMiddleware.REFRESHED_AT_KEY] = int(time.time())
+
+
+# =========================
+# SYNC TOMBSTONES
+# =========================
+
+SYNCED_MODELS = (
+    PurchaseRequest, RequestForQuotation, VendorQuotation, PurchaseOrder,
+    Invoice, Payment, Notification,
+)
+
+
+def record_sync_tombstone(sender, instance, **kwargs):
+    record_tombstone(instance)
+
+
+for synced_model in SYNCED_MODELS:
+    post_delete.connect(record_sync_tombstone, sender=synced_model)
+
+
+@receiver(post_init, sender=PurchaseOrderItem)
+def remember_item_order(sender, instance, **kwargs):
+    instance._sync_order_id = instance.purchase_order_id
+
+
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+def touch_item_order(sender, instance, origin=None, **kwargs):
+    """Items are synced inside their order, so an item change has to bump the order's updated_at"""
+    if isinstance(origin, PurchaseOrder) or getattr(origin, 'model', None) is PurchaseOrder:
+        return  # The order itself is being deleted
+    order_ids = {instance.purchase_order_id, getattr(instance, '_sync_order_id', None)} - {None}
+    PurchaseOrder.objects.filter(pk__in=order_ids).update(updated_at=timezone.now())
+    instance._sync_order_id = instance.purchase_order_id
+
+
+# =========================
+# STATUS EVENTS
+# =========================
+
+def snapshot_status(sender, instance, **kwargs):
+    timeline.snapshot(instance)
+
+
+def record_status_events(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        timeline.record_changes(instance, created, update_fields)
+
+
+for tracked_model in timeline.TRACKED_MODELS:
+    post_init.connect(snapshot_status, sender=tracked_model)
+    post_save.connect(record_status_events, sender=tracked_model)
+
+
+# =========================
+# SPEND CUBE DELTAS
+# =========================
+
+# Fields (and attnames) that place a row in the cube; a save(update_fields=...)
+# touching none of them cannot move spend, so its handlers skip their queries
+ORDER_SPEND_FIELDS = {'order_date', 'purchase_request', 'purchase_request_id', 'vendor', 'vendor_id', 'status'}
+REQUEST_SPEND_FIELDS = {'department'}
+PRODUCT_SPEND_FIELDS = {'category', 'category_id'}
+ITEM_SPEND_FIELDS = {'purchase_order', 'purchase_order_id', 'product', 'product_id', 'line_total', 'quantity'}
+
+
+def saves_any(update_fields, fields):
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+def remember_order_spend_key(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and saves_any(update_fields, ORDER_SPEND_FIELDS):
+        instance._spend_previous = PurchaseOrder.objects.filter(pk=instance.pk).values_list(
+            'order_date', 'purchase_request_id', 'purchase_request__department', 'vendor_id', 'status'
+        ).first()
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def move_order_spend(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_spend_previous', None)
+    if created or previous is None or previous[0] is None:
+        return
+    order_date, request_id, old_department, vendor_id, order_status = previous
+    department = old_department
+    if instance.purchase_request_id != request_id:
+        department = instance.purchase_request.department if instance.purchase_request_id else ''
+    old_key = (spend.month_of(order_date), old_department or '', vendor_id, order_status)
+    new_key = (spend.month_of(instance.order_date), department or '', instance.vendor_id, instance.status)
+    spend.move_order(instance.pk, old_key, new_key)
+
+
+@receiver(pre_save, sender=PurchaseRequest)
+def remember_request_department(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and saves_any(update_fields, REQUEST_SPEND_FIELDS):
+        instance._spend_previous = PurchaseRequest.objects.filter(pk=instance.pk).values_list(
+            'department', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=PurchaseRequest)
+def move_request_spend(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_spend_previous', None)
+    if created or previous is None or previous == instance.department:
+        return
+    orders = PurchaseOrder.objects.filter(purchase_request=instance, order_date__isnull=False)
+    for order_id, order_date, vendor_id, order_status in orders.values_list('id', 'order_date', 'vendor_id', 'status'):
+        month = spend.month_of(order_date)
+        spend.move_order(
+            order_id,
+            (month, previous or '', vendor_id, order_status),
+            (month, instance.department or '', vendor_id, order_status),
+        )
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_category(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and saves_any(update_fields, PRODUCT_SPEND_FIELDS):
+        instance._spend_previous = Product.objects.filter(pk=instance.pk).values_list(
+            'category_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Product)
+def move_product_spend(sender, instance, created, update_fields=None, **kwargs):
+    previous = instance.__dict__.pop('_spend_previous', None)
+    if not created and saves_any(update_fields, PRODUCT_SPEND_FIELDS) and previous != instance.category_id:
+        spend.move_product(instance.pk, previous, instance.category_id)
+
+
+@receiver(pre_save, sender=PurchaseOrderItem)
+def remember_item_spend(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and saves_any(update_fields, ITEM_SPEND_FIELDS):
+        instance._spend_previous = PurchaseOrderItem.objects.filter(pk=instance.pk).values_list(
+            'purchase_order_id', 'product__category_id', 'line_total', 'quantity'
+        ).first()
+
+
+@receiver(post_save, sender=PurchaseOrderItem)
+def apply_item_spend(sender, instance, created, update_fields=None, **kwargs):
+    previous = instance.__dict__.pop('_spend_previous', None)
+    if not created and not saves_any(update_fields, ITEM_SPEND_FIELDS):
+        return
+    key = spend.order_key(instance.purchase_order_id)
+    category_id = spend.item_category_id(instance)
+    if previous is None:
+        spend.apply_delta(key, category_id, instance.line_total, instance.quantity, 1)
+        return
+
+    order_id, old_category_id, old_amount, old_quantity = previous
+    old_key = key if order_id == instance.purchase_order_id else spend.order_key(order_id)
+    if (old_key, old_category_id) == (key, category_id):
+        spend.apply_delta(key, category_id, instance.line_total - old_amount, instance.quantity - old_quantity, 0)
+    else:
+        spend.apply_delta(old_key, old_category_id, -old_amount, -old_quantity, -1)
+        spend.apply_delta(key, category_id, instance.line_total, instance.quantity, 1)
+
+
+@receiver(post_delete, sender=PurchaseOrderItem)
+def remove_item_spend(sender, instance, **kwargs):
+    # Runs before a cascading PO delete removes the order row itself
+    key = spend.order_key(instance.purchase_order_id)
+    spend.apply_delta(key, spend.item_category_id(instance), -instance.line_total, -instance.quantity, -1)
@@ -0,0 +1,254 @@
+"""
+Spend cube: purchase order line spend rolled up into SpendFact.
+
+Each fact row is keyed by (month, department, category, vendor, status).
+The month is the PO order month, the department comes from the source
+purchase request, the category from the line's product, and the status is
+the PO status. Measures are line_total, quantity and the number of lines.
+
+Signal handlers in signals.py keep the rollup current with deltas: saving
+or deleting a PurchaseOrderItem adds and removes its own contribution, and
+saving a PurchaseOrder, PurchaseRequest or Product whose dimension changed
+moves the affected lines from the old cell to the new one. Writes that
+bypass signals (queryset .update(), bulk_create) are not tracked;
+rebuild_spend_facts recomputes the whole table from scratch.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Product, PurchaseOrder, PurchaseOrderItem, SpendFact
+
+
+# Query parameter -> SpendFact values() paths
+DIMENSIONS = {
+    'month': ('month',),
+    'department': ('department',),
+    'category': ('category_id', 'category__name'),
+    'vendor': ('vendor_id', 'vendor__company_name'),
+    'status': ('status',),
+}
+REBUILD_CHUNK_SIZE = 2000
+
+
+class SpendQueryError(ValueError):
+    """Invalid dimension or filter passed to query_spend()"""
+
+
+# =========================
+# DELTA MAINTENANCE
+# =========================
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def order_key(purchase_order_id):
+    """(month, department, vendor_id, status) for a PO, or None when it has no cell"""
+    row = PurchaseOrder.objects.filter(pk=purchase_order_id).values_list(
+        'order_date', 'purchase_request__department', 'vendor_id', 'status'
+    ).first()
+    if row is None or row[0] is None:
+        return None
+    return month_of(row[0]), row[1] or '', row[2], row[3]
+
+
+def item_category_id(item):
+    if item.product_id is None:
+        return None
+    if PurchaseOrderItem.product.is_cached(item):
+        return item.product.category_id
+    return Product.objects.filter(pk=item.product_id).values_list('category_id', flat=True).first()
+
+
+def apply_delta(key, category_id, amount, quantity, lines):
+    """Add the given measures to one fact cell, creating it on first use"""
+    if key is None or not (amount or quantity or lines):
+        return
+    month, department, vendor_id, status = key
+    cell = {
+        'month': month, 'department': department, 'category_id': category_id,
+        'vendor_id': vendor_id, 'status': status,
+    }
+    facts = SpendFact.objects.filter(**cell)
+    measures = {
+        'amount': F('amount') + amount,
+        'quantity': F('quantity') + quantity,
+        'lines': F('lines') + lines,
+        'updated_at': timezone.now(),
+    }
+    if not facts.update(**measures):
+        try:
+            with transaction.atomic():
+                SpendFact.objects.create(**cell, amount=amount, quantity=quantity, lines=lines)
+            return
+        except IntegrityError:
+            # spendfact_cell_unique: a concurrent write created the cell first
+            facts.update(**measures)
+    if lines < 0:
+        facts.filter(lines__lte=0).delete()
+
+
+def move_product(product_id, old_category_id, new_category_id):
+    """Move every line of a recategorised product to its new category"""
+    if old_category_id == new_category_id:
+        return
+    groups = (
+        PurchaseOrderItem.objects.filter(product_id=product_id, purchase_order__order_date__isnull=False)
+        .values(
+            cell_month=TruncMonth('purchase_order__order_date'),
+            cell_department=Coalesce('purchase_order__purchase_request__department', Value('')),
+            cell_vendor=F('purchase_order__vendor_id'),
+            cell_status=F('purchase_order__status'),
+        )
+        .annotate(total_amount=Sum('line_total'), total_quantity=Sum('quantity'), line_count=Count('id'))
+        .order_by()
+    )
+    for group in groups:
+        key = (group['cell_month'], group['cell_department'], group['cell_vendor'], group['cell_status'])
+        apply_delta(key, old_category_id, -group['total_amount'], -group['total_quantity'], -group['line_count'])
+        apply_delta(key, new_category_id, group['total_amount'], group['total_quantity'], group['line_count'])
+
+
+def move_order(purchase_order_id, old_key, new_key):
+    """Move every line of a PO from one set of cells to another"""
+    if old_key == new_key:
+        return
+    groups = (
+        PurchaseOrderItem.objects.filter(purchase_order_id=purchase_order_id)
+        .values('product__category_id')
+        .annotate(total_amount=Sum('line_total'), total_quantity=Sum('quantity'), line_count=Count('id'))
+        .order_by()
+    )
+    for group in groups:
+        category_id = group['product__category_id']
+        apply_delta(old_key, category_id, -group['total_amount'], -group['total_quantity'], -group['line_count'])
+        apply_delta(new_key, category_id, group['total_amount'], group['total_quantity'], group['line_count'])
+
+
+# =========================
+# REBUILD
+# =========================
+
+@transaction.atomic
+def rebuild_spend_facts():
+    """Recompute SpendFact from every PO line; returns the number of cells written"""
+    cells = (
+        PurchaseOrderItem.objects.filter(purchase_order__order_date__isnull=False)
+        .values(
+            cell_month=TruncMonth('purchase_order__order_date'),
+            cell_department=Coalesce('purchase_order__purchase_request__department', Value('')),
+            cell_category=F('product__category_id'),
+            cell_vendor=F('purchase_order__vendor_id'),
+            cell_status=F('purchase_order__status'),
+        )
+        .annotate(total_amount=Sum('line_total'), total_quantity=Sum('quantity'), line_count=Count('id'))
+        .order_by()
+    )
+
+    SpendFact.objects.all().delete()
+    batch = []
+    written = 0
+    for cell in cells.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        batch.append(SpendFact(
+            month=cell['cell_month'],
+            department=cell['cell_department'],
+            category_id=cell['cell_category'],
+            vendor_id=cell['cell_vendor'],
+            status=cell['cell_status'],
+            amount=cell['total_amount'] or 0,
+            quantity=cell['total_quantity'] or 0,
+            lines=cell['line_count'],
+        ))
+        if len(batch) >= REBUILD_CHUNK_SIZE:
+            SpendFact.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    SpendFact.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+# =========================
+# QUERIES
+# =========================
+
+def _parse_month(value, name):
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise SpendQueryError(f'{name} must be a month in YYYY-MM format')
+
+
+def _parse_ids(value, name):
+    try:
+        return [int(part) for part in value.split(',') if part]
+    except ValueError:
+        raise SpendQueryError(f'{name} must be a comma separated list of ids')
+
+
+def query_spend(group_by=(), filters=None):
+    """
+    Slice the cube by any subset of DIMENSIONS.
+    `filters` may hold from/to (YYYY-MM) and comma separated department,
+    category, vendor and status values. Returns {'group_by', 'results', 'totals'}.
+    """
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise SpendQueryError(
+            f'Unknown dimension: {", ".join(unknown)}. Use any of {", ".join(DIMENSIONS)}'
+        )
+
+    filters = filters or {}
+    conditions = Q()
+    if filters.get('from'):
+        conditions &= Q(month__gte=_parse_month(filters['from'], 'from'))
+    if filters.get('to'):
+        conditions &= Q(month__lte=_parse_month(filters['to'], 'to'))
+    if filters.get('department'):
+        conditions &= Q(department__in=filters['department'].split(','))
+    if filters.get('status'):
+        conditions &= Q(status__in=filters['status'].split(','))
+    if filters.get('category'):
+        conditions &= Q(category_id__in=_parse_ids(filters['category'], 'category'))
+    if filters.get('vendor'):
+        conditions &= Q(vendor_id__in=_parse_ids(filters['vendor'], 'vendor'))
+
+    facts = SpendFact.objects.filter(conditions)
+    measures = {
+        'total_amount': Sum('amount'),
+        'total_quantity': Sum('quantity'),
+        'line_count': Sum('lines'),
+    }
+    paths = [path for name in group_by for path in DIMENSIONS[name]]
+
+    results = []
+    if paths:
+        cells = facts.values(*paths).annotate(**measures).filter(line_count__gt=0).order_by(*paths)
+        for cell in cells:
+            row = {}
+            for name in group_by:
+                if name == 'month':
+                    row['month'] = cell['month'].strftime('%Y-%m')
+                elif name in ('category', 'vendor'):
+                    id_path, name_path = DIMENSIONS[name]
+                    row[name] = cell[id_path]
+                    row[f'{name}_name'] = cell[name_path]
+                else:
+                    row[name] = cell[name]
+            row.update(amount=cell['total_amount'], quantity=cell['total_quantity'], lines=cell['line_count'])
+            results.append(row)
+
+    totals = facts.aggregate(**measures)
+    return {
+        'group_by': list(group_by),
+        'results': results,
+        'totals': {
+            'amount': totals['total_amount'] or 0,
+            'quantity': totals['total_quantity'] or 0,
+            'lines': totals['line_count'] or 0,
+        },
+    }
@@ -0,0 +1,199 @@
+"""
+Delta sync across the transactional procurement models.
+
+Clients send the opaque watermark from their previous call and get back
+every row whose updated_at is newer, plus tombstones for rows deleted
+since. Watermarks are signed timestamps. Each one is taken a few seconds
+before the query ran so rows committed by slower concurrent transactions
+are not skipped. Clients therefore upsert by id and may see a row twice.
+
+A source whose page fills up also gets an (updated_at, pk) keyset cursor
+in the token, and the next call resumes strictly after the last row sent.
+Any number of rows can share one updated_at (bulk updates stamp them
+all with the same time), so a timestamp alone cannot mark the page end.
+While a paged pass is in progress the token keeps the watermark taken
+when the pass started, so the call after the last page goes back to it
+and picks up rows that committed behind a cursor during the pass.
+
+Purchase order items are synced inside their order; signals.py touches
+the order's updated_at whenever one of its items is saved or deleted.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.utils import timezone
+
+from .models import (
+    PurchaseRequest, RequestForQuotation, VendorQuotation, PurchaseOrder,
+    PurchaseOrderItem, Invoice, Payment, Notification, SyncTombstone
+)
+from .serializers import (
+    PurchaseRequestSerializer, RequestForQuotationSerializer, VendorQuotationSerializer,
+    PurchaseOrderSerializer, InvoiceSerializer, PaymentSerializer, NotificationSerializer
+)
+
+
+WATERMARK_SALT = 'procurement.sync'
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_OVERLAP = timedelta(seconds=5)
+DEFAULT_TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+class InvalidWatermark(Exception):
+    pass
+
+
+class ExpiredWatermark(Exception):
+    """The watermark predates the oldest tombstone still kept; resync from scratch"""
+
+
+class SyncSource:
+    """One synced model: how to load changed rows and how to render them"""
+
+    def __init__(self, key, model, serializer_class, queryset, per_user=False):
+        self.key = key
+        self.model = model
+        self.serializer_class = serializer_class
+        self.queryset = queryset
+        self.per_user = per_user
+
+    @property
+    def label(self):
+        return self.model._meta.label_lower
+
+    def changed_rows(self, since, user, limit, cursor=None):
+        rows = self.queryset()
+        if self.per_user:
+            rows = rows.filter(user=user)
+        if cursor is not None:
+            updated_at, pk = cursor
+            rows = rows.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+        elif since is not None:
+            rows = rows.filter(updated_at__gt=since)
+        return list(rows.order_by('updated_at', 'pk')[:limit + 1])
+
+
+SYNC_SOURCES = [
+    SyncSource(
+        'purchase_requests', PurchaseRequest, PurchaseRequestSerializer,
+        lambda: PurchaseRequest.objects.select_related('employee', 'product'),
+    ),
+    SyncSource(
+        'rfqs', RequestForQuotation, RequestForQuotationSerializer,
+        lambda: RequestForQuotation.objects.select_related(
+            'vendor', 'sent_by', 'quotation', 'purchase_request__employee', 'purchase_request__product'
+        ),
+    ),
+    SyncSource(
+        'quotations', VendorQuotation, VendorQuotationSerializer,
+        lambda: VendorQuotation.objects.select_related('rfq__vendor', 'rfq__purchase_request'),
+    ),
+    SyncSource(
+        'purchase_orders', PurchaseOrder, PurchaseOrderSerializer,
+        lambda: PurchaseOrder.objects.select_related('vendor', 'assigned_to', 'purchase_request').prefetch_related(
+            Prefetch('items', queryset=PurchaseOrderItem.objects.select_related('product'))
+        ).annotate(has_invoice=Exists(Invoice.objects.filter(purchase_order=OuterRef('pk')))),
+    ),
+    SyncSource(
+        'invoices', Invoice, InvoiceSerializer,
+        lambda: Invoice.objects.select_related('vendor', 'purchase_order'),
+    ),
+    SyncSource(
+        'payments', Payment, PaymentSerializer,
+        lambda: Payment.objects.select_related('invoice__vendor', 'created_by'),
+    ),
+    SyncSource(
+        'notifications', Notification, NotificationSerializer,
+        lambda: Notification.objects.all(),
+        per_user=True,
+    ),
+]
+
+SYNC_SOURCES_BY_LABEL = {source.label: source for source in SYNC_SOURCES}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _from_timestamp(value):
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+
+
+def encode_watermark(moment, cursors=None):
+    """Sign the watermark plus {source key: (updated_at, pk)} for sources with more pages"""
+    payload = {'t': moment.timestamp()}
+    if cursors:
+        payload['c'] = {key: [updated_at.isoformat(), pk] for key, (updated_at, pk) in cursors.items()}
+    return signing.dumps(payload, salt=WATERMARK_SALT)
+
+
+def decode_watermark(token):
+    """(watermark, cursors) from a token made by encode_watermark()"""
+    try:
+        payload = signing.loads(token, salt=WATERMARK_SALT)
+        cursors = {
+            key: (datetime.fromisoformat(updated_at), int(pk))
+            for key, (updated_at, pk) in payload.get('c', {}).items()
+        }
+        return _from_timestamp(payload['t']), cursors
+    except (signing.BadSignature, AttributeError, KeyError, TypeError, ValueError):
+        raise InvalidWatermark('Invalid sync token')
+
+
+def changes_since(token, user, page_size=None):
+    """
+    Return the rows changed after `token` (None means everything) as
+    {'changes': {key: [...]}, 'deleted': {key: [ids]}, 'next': token, 'has_more': bool}
+    """
+    page_size = page_size or _setting('SYNC_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    since, cursors = decode_watermark(token) if token else (None, {})
+    started_at = timezone.now()
+
+    if since is not None:
+        retention = _setting('SYNC_TOMBSTONE_RETENTION', DEFAULT_TOMBSTONE_RETENTION)
+        if since < started_at - retention:
+            raise ExpiredWatermark('Sync token is too old, fetch a full snapshot')
+
+    if cursors:
+        # Mid-pass: keep the pass's starting watermark until the last page
+        watermark = since
+    else:
+        watermark = started_at - _setting('SYNC_OVERLAP', DEFAULT_OVERLAP)
+    next_cursors = {}
+    changes = {}
+    for source in SYNC_SOURCES:
+        rows = source.changed_rows(since, user, page_size, cursors.get(source.key))
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            # Resume strictly after the last row sent, even if later rows share its updated_at
+            next_cursors[source.key] = (rows[-1].updated_at, rows[-1].pk)
+        changes[source.key] = source.serializer_class(rows, many=True).data
+
+    deleted = {source.key: [] for source in SYNC_SOURCES}
+    if since is not None:
+        tombstones = SyncTombstone.objects.filter(
+            deleted_at__gt=since, model__in=SYNC_SOURCES_BY_LABEL
+        ).values_list('model', 'object_id')
+        for label, object_id in tombstones:
+            deleted[SYNC_SOURCES_BY_LABEL[label].key].append(object_id)
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'next': encode_watermark(watermark, next_cursors),
+        'has_more': bool(next_cursors),
+    }
+
+
+def record_tombstone(instance):
+    SyncTombstone.objects.create(model=instance._meta.label_lower, object_id=instance.pk)
+
+
+def purge_tombstones():
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION; returns the count"""
+    cutoff = timezone.now() - _setting('SYNC_TOMBSTONE_RETENTION', DEFAULT_TOMBSTONE_RETENTION)
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
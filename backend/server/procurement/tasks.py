@@ -0,0 +1,52 @@
+"""
+Background tasks run by `manage.py run_workers` (see procurement.jobs).
+
+Email goes out on the 'io' thread pool. The batch computations share the
+'cpu' process pool. Queue them with `--queue` on their management
+commands (rebuild_spend_facts, run_demand_forecast, run_three_way_match),
+e.g. from cron, so the run happens on a worker instead of in the caller.
+"""
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .jobs import enqueue, task
+
+
+@task('send_email', queue='io', max_attempts=5, timeout=120)
+def send_email(subject, message, recipient_list, from_email=None, html_message=None):
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient_list=recipient_list,
+        html_message=html_message,
+        fail_silently=False,
+    )
+
+
+def queue_email(subject, message, recipient_list, html_message=None, priority=None):
+    """Send an email from a worker once the current transaction commits"""
+    return enqueue('send_email', {
+        'subject': subject,
+        'message': message,
+        'recipient_list': list(recipient_list),
+        'html_message': html_message,
+    }, priority=priority)
+
+
+@task('run_three_way_match', queue='cpu', max_attempts=2, timeout=1800)
+def run_three_way_match():
+    from .matching import run_three_way_match
+    run_three_way_match()
+
+
+@task('run_demand_forecast', queue='cpu', max_attempts=2, timeout=1800)
+def run_demand_forecast(weeks=None, alpha=None, service_z=None):
+    from .forecasting import run_forecast
+    run_forecast(weeks=weeks, alpha=alpha, service_z=service_z)
+
+
+@task('rebuild_spend_facts', queue='cpu', max_attempts=2, timeout=1800)
+def rebuild_spend_facts():
+    from .spend import rebuild_spend_facts
+    rebuild_spend_facts()
@@ -0,0 +1,84 @@
+"""
+Minimal object graphs shared by the procurement tests.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from procurement.models import (
+    Category, Invoice, Product, PurchaseOrder, PurchaseOrderItem, PurchaseRequest,
+    RequestForQuotation, Vendor, VendorQuotation
+)
+
+
+def make_vendor(code='VEND-1001', user=None, **fields):
+    defaults = {
+        'company_name': 'Acme Supplies', 'contact_person': 'Jo', 'email': 'acme@example.com',
+        'phone': '1', 'address': '1 Main St', 'city': 'Pune', 'state': 'MH',
+        'postal_code': '411001', 'country': 'IN', 'status': 'approved',
+    }
+    return Vendor.objects.create(vendor_code=code, user=user, **{**defaults, **fields})
+
+
+def make_vendor_user(username='vendor', vendor=None):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pw')
+    vendor = vendor or make_vendor(f'VEND-{username.upper()}', user=user)
+    user.profile.role = 'vendor'
+    user.profile.vendor = vendor
+    user.profile.save()
+    return user, vendor
+
+
+def make_product(code='PID001', price='2.50', **fields):
+    category = fields.pop('category', None) or Category.objects.get_or_create(name='Hardware')[0]
+    return Product.objects.create(
+        product_code=code, name=fields.pop('name', f'Product {code}'), unit_price=Decimal(price),
+        category=category, **fields
+    )
+
+
+def make_purchase_request(employee, product=None, quantity=10, **fields):
+    product = product or make_product()
+    return PurchaseRequest.objects.create(
+        employee=employee, product=product, item_name=product.name, quantity=quantity,
+        department=fields.pop('department', 'Ops'), **fields
+    )
+
+
+def make_purchase_order(vendor, created_by, number='PO-1', items=((None, 10, '2.00'),), **fields):
+    """A PO with one item per (product, quantity, unit price); totals follow the items"""
+    order = PurchaseOrder.objects.create(
+        po_number=number, vendor=vendor, created_by=created_by,
+        subtotal=Decimal('0'), total_amount=Decimal('0'),
+        expected_delivery_date=fields.pop('expected_delivery_date', date.today() + timedelta(days=7)),
+        **fields
+    )
+    for product, quantity, unit_price in items:
+        PurchaseOrderItem.objects.create(
+            purchase_order=order, product=product or make_product(f'{number}-P'),
+            quantity=quantity, unit_price=Decimal(unit_price),
+        )
+    order.calculate_total()
+    return order
+
+
+def make_invoice(order, number='INV-1', total=None, **fields):
+    total = order.total_amount if total is None else Decimal(total)
+    return Invoice.objects.create(
+        invoice_number=number, vendor=order.vendor, purchase_order=order,
+        invoice_date=date.today(), due_date=date.today() + timedelta(days=30),
+        subtotal=total, total_amount=total, **fields
+    )
+
+
+def make_quotation(purchase_request, vendor, sent_by, number='Q-1', **fields):
+    rfq = RequestForQuotation.objects.create(
+        rfq_number=f'RFQ-{number}', purchase_request=purchase_request, vendor=vendor, sent_by=sent_by,
+    )
+    return VendorQuotation.objects.create(
+        rfq=rfq, quotation_number=number, unit_price=Decimal(fields.pop('unit_price', '2.00')),
+        quantity=purchase_request.quantity, estimated_delivery_days=5,
+        quotation_valid_until=date.today() + timedelta(days=30), status=fields.pop('status', 'submitted'),
+        **fields
+    )
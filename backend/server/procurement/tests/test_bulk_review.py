@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from procurement.models import Notification, PurchaseRequest, StatusEvent
+from procurement.views import PurchaseRequestViewSet
+
+from .fixtures import make_product, make_purchase_request
+
+
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.employee = User.objects.create_user('emp', 'emp@example.com', 'pw')
+        product = make_product()
+        self.requests = [make_purchase_request(self.employee, product) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def post(self, action, payload):
+        return self.client.post(f'/api/purchase-requests/{action}/', payload, format='json')
+
+    def test_reports_an_outcome_per_requested_id(self):
+        pending, other, done = self.requests
+        PurchaseRequest.objects.filter(pk=done.pk).update(status='approved')
+
+        response = self.post('bulk-approve', {'ids': [pending.pk, done.pk, 999999, pending.pk, other.pk]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['results'], [
+            {'id': pending.pk, 'outcome': 'approved'},
+            {'id': done.pk, 'outcome': 'skipped', 'status': 'approved'},
+            {'id': 999999, 'outcome': 'not_found'},
+            {'id': other.pk, 'outcome': 'approved'},
+        ])
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'approved')
+        self.assertEqual(pending.reviewed_by, self.admin)
+
+    def test_records_status_events_and_notifications_for_reviewed_rows_only(self):
+        pending, _, done = self.requests
+        PurchaseRequest.objects.filter(pk=done.pk).update(status='rejected')
+
+        self.post('bulk-approve', {'ids': [pending.pk, done.pk]})
+
+        events = StatusEvent.objects.filter(document_type='purchase_request', to_status='approved')
+        self.assertEqual(list(events.values_list('document_id', 'from_status', 'actor')),
+                         [(pending.pk, 'pending', self.admin.pk)])
+        self.assertEqual(
+            list(Notification.objects.filter(type='approval').values_list('related_request_id', flat=True)),
+            [pending.pk]
+        )
+
+    def test_reject_applies_the_shared_reason(self):
+        ids = [request.pk for request in self.requests[:2]]
+
+        response = self.post('bulk-reject', {'ids': ids, 'rejection_reason': 'Over budget'})
+
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(
+            set(PurchaseRequest.objects.filter(pk__in=ids).values_list('status', 'rejection_reason')),
+            {('rejected', 'Over budget')}
+        )
+        self.assertIn('Over budget', Notification.objects.filter(type='rejection').first().message)
+
+    def test_second_review_of_the_same_ids_changes_nothing(self):
+        ids = [request.pk for request in self.requests]
+        self.post('bulk-approve', {'ids': ids})
+
+        response = self.post('bulk-reject', {'ids': ids})
+
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual({result['outcome'] for result in response.data['results']}, {'skipped'})
+        self.assertFalse(PurchaseRequest.objects.exclude(status='approved').exists())
+
+    def test_rejects_malformed_id_lists(self):
+        for payload in ({}, {'ids': []}, {'ids': 'all'}, {'ids': ['x']}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post('bulk-approve', payload).status_code, 400)
+
+        too_many = list(range(1, PurchaseRequestViewSet.BULK_REVIEW_LIMIT + 2))
+        self.assertEqual(self.post('bulk-approve', {'ids': too_many}).status_code, 400)
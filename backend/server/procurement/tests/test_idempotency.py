@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from procurement.idempotency import idempotent, purge_expired
+from procurement.models import IdempotencyKey, PurchaseOrder, VendorQuotation
+
+from .fixtures import make_purchase_request, make_quotation, make_vendor
+
+
+class CountingView(APIView):
+    """Creates nothing, but counts how often its body really ran"""
+    runs = 0
+    reentrant = None
+
+    @idempotent('test.count')
+    def post(self, request):
+        CountingView.runs += 1
+        if CountingView.reentrant:
+            return CountingView.reentrant(request)
+        if request.data.get('fail'):
+            return Response({'error': 'nope'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.data.get('raise'):
+            raise RuntimeError('boom')
+        return Response({'run': CountingView.runs}, status=status.HTTP_201_CREATED)
+
+
+class IdempotentDecoratorTests(TestCase):
+    def setUp(self):
+        CountingView.runs = 0
+        CountingView.reentrant = None
+        self.user = User.objects.create_user('emp', 'emp@example.com', 'pw')
+        self.factory = APIRequestFactory()
+
+    def post(self, data=None, key='key-1', path='/test/'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        request = self.factory.post(path, data or {}, format='json', **headers)
+        force_authenticate(request, self.user)
+        response = CountingView.as_view()(request)
+        response.render()
+        return response
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post({'amount': 5})
+        second = self.post({'amount': 5})
+
+        self.assertEqual(CountingView.runs, 1)
+        self.assertEqual((second.status_code, second.data), (201, {'run': 1}))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+
+    def test_requests_without_a_key_always_run(self):
+        self.post(key=None)
+        self.post(key=None)
+
+        self.assertEqual(CountingView.runs, 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_keys_are_per_user(self):
+        self.post()
+        self.user = User.objects.create_user('other', 'other@example.com', 'pw')
+        self.post()
+
+        self.assertEqual(CountingView.runs, 2)
+
+    def test_retry_while_the_first_request_runs_gets_409(self):
+        CountingView.reentrant = lambda request: self.post()
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(CountingView.runs, 1)
+
+    def test_key_reused_for_another_request_gets_422(self):
+        self.post({'amount': 5})
+
+        self.assertEqual(self.post({'amount': 6}).status_code, 422)
+        self.assertEqual(self.post({'amount': 5}, path='/other/').status_code, 422)
+        self.assertEqual(CountingView.runs, 1)
+
+    def test_errors_release_the_key(self):
+        self.assertEqual(self.post({'fail': True}).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        with self.assertRaises(RuntimeError):
+            self.post({'raise': True})
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.post({'fail': True}).status_code, 400)
+        self.assertEqual(CountingView.runs, 3)
+
+    def test_abandoned_claim_is_taken_over(self):
+        self.post()
+        IdempotencyKey.objects.update(status='in_progress', locked_until=timezone.now() - timedelta(seconds=1))
+
+        response = self.post()
+
+        self.assertEqual((response.status_code, response.data), (201, {'run': 2}))
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
+
+    def test_overlong_key_is_rejected(self):
+        self.assertEqual(self.post(key='k' * 256).status_code, 400)
+        self.assertEqual(CountingView.runs, 0)
+
+    def test_purge_expired_deletes_only_expired_keys(self):
+        self.post(key='old')
+        self.post(key='new')
+        IdempotencyKey.objects.filter(key='old').update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+
+class AcceptQuotationIdempotencyTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        quotation = make_quotation(make_purchase_request(self.admin), make_vendor(), self.admin)
+        self.quotation = quotation
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def accept(self):
+        return self.client.post(
+            f'/api/rfqs/{self.quotation.rfq_id}/accept_quotation/', {}, format='json', HTTP_IDEMPOTENCY_KEY='accept-1'
+        )
+
+    def test_retried_accept_creates_one_purchase_order(self):
+        first = self.accept()
+        second = self.accept()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['po']['po_number'], first.json()['po']['po_number'])
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_rejected_attempt_can_be_retried_with_the_same_key(self):
+        VendorQuotation.objects.filter(pk=self.quotation.pk).update(status='draft')
+        self.assertEqual(self.accept().status_code, 400)
+
+        VendorQuotation.objects.filter(pk=self.quotation.pk).update(status='submitted')
+        response = self.accept()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from procurement import jobs
+from procurement.models import BackgroundJob
+
+
+calls = []
+
+
+def record(**payload):
+    calls.append(payload)
+
+
+def explode(**payload):
+    raise RuntimeError('boom')
+
+
+TEST_TASKS = {
+    'test.record': jobs.Task('test.record', record, 'io', 3, 300, 0),
+    'test.urgent': jobs.Task('test.urgent', record, 'io', 3, 30, 5),
+    'test.explode': jobs.Task('test.explode', explode, 'io', 2, 300, 0),
+}
+
+
+@override_settings(BACKGROUND_JOBS={'retry_backoff_seconds': 10, 'max_backoff_seconds': 15})
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        patches = [
+            mock.patch.dict(jobs.TASKS, TEST_TASKS),
+            # run_job manages its own connection; inside a test transaction that would roll it back
+            mock.patch('procurement.jobs.close_old_connections'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def expire(self, job):
+        BackgroundJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claims_by_priority_and_leases_for_the_task_timeout(self):
+        low = jobs.enqueue('test.record')
+        high = jobs.enqueue('test.urgent')
+        jobs.enqueue('test.record', delay=60)
+
+        leases = jobs.claim('io', 'worker-a', 10)
+
+        self.assertEqual([(lease.job_id, lease.timeout) for lease in leases], [(high.pk, 30), (low.pk, 300)])
+        high.refresh_from_db()
+        self.assertEqual((high.status, high.attempts, high.locked_by), ('running', 1, leases[0].token))
+        self.assertEqual(jobs.claim('cpu', 'worker-a', 10), [])
+
+    def test_held_lease_is_not_claimed_again_until_it_expires(self):
+        job = jobs.enqueue('test.record')
+        first, = jobs.claim('io', 'worker-a', 10)
+
+        self.assertEqual(jobs.claim('io', 'worker-b', 10), [])
+
+        self.expire(job)
+        second, = jobs.claim('io', 'worker-b', 10)
+        self.assertNotEqual(second.token, first.token)
+        self.assertEqual(jobs.run_job(job.pk, first.token), 'lost')
+        self.assertEqual(jobs.run_job(job.pk, second.token), 'succeeded')
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    def test_renew_extends_only_leases_still_held(self):
+        job = jobs.enqueue('test.record')
+        lease, = jobs.claim('io', 'worker-a', 10)
+        self.expire(job)
+
+        self.assertEqual(jobs.renew([lease]), 1)
+        self.assertEqual(jobs.claim('io', 'worker-b', 10), [])
+
+        stale = lease._replace(token='someone-else')
+        self.assertEqual(jobs.renew([stale]), 0)
+        jobs.run_job(job.pk, lease.token)
+        self.assertEqual(jobs.renew([lease]), 0)
+
+    def test_runs_the_task_with_its_payload(self):
+        job = jobs.enqueue('test.record', {'order': 7})
+        lease, = jobs.claim('io', 'worker-a', 10)
+
+        self.assertEqual(jobs.run_job(lease.job_id, lease.token), 'succeeded')
+
+        self.assertEqual(calls, [{'order': 7}])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertIsNone(job.locked_until)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failures_back_off_then_fail_after_max_attempts(self):
+        job = jobs.enqueue('test.explode')
+        lease, = jobs.claim('io', 'worker-a', 10)
+
+        before = timezone.now()
+        self.assertEqual(jobs.run_job(lease.job_id, lease.token), 'retry')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=10))
+        self.assertEqual(jobs.claim('io', 'worker-a', 10), [])
+
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        lease, = jobs.claim('io', 'worker-a', 10)
+        self.assertEqual(jobs.run_job(lease.job_id, lease.token), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_expired_final_attempt_is_failed_without_running(self):
+        job = jobs.enqueue('test.record')
+        BackgroundJob.objects.filter(pk=job.pk).update(attempts=3)
+        lease, = jobs.claim('io', 'worker-a', 10)
+
+        self.assertEqual(jobs.run_job(lease.job_id, lease.token), 'failed')
+        self.assertEqual(calls, [])
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        config = jobs.get_settings()
+        self.assertEqual([jobs._backoff(attempts, config) for attempts in (1, 2, 3)], [10, 15, 15])
+
+    def test_purge_removes_only_old_finished_jobs(self):
+        old = timezone.now() - timedelta(days=8)
+        finished = jobs.enqueue('test.record')
+        BackgroundJob.objects.filter(pk=finished.pk).update(status='succeeded', finished_at=old)
+        recent = jobs.enqueue('test.record')
+        BackgroundJob.objects.filter(pk=recent.pk).update(status='failed', finished_at=timezone.now())
+        pending = jobs.enqueue('test.record')
+
+        self.assertEqual(jobs.purge_finished(days=7), 1)
+        self.assertEqual(set(BackgroundJob.objects.values_list('pk', flat=True)), {recent.pk, pending.pk})
@@ -0,0 +1,134 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from procurement.matching import run_three_way_match
+from procurement.models import GoodsReceipt, GoodsReceiptItem, Invoice, InvoiceMatch
+
+from .fixtures import make_invoice, make_purchase_order, make_vendor, make_vendor_user
+
+
+class ThreeWayMatchTests(TestCase):
+    """Each PO orders 10 units at 2.00 (20.00) unless a test says otherwise"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.vendor = make_vendor()
+        self.count = 0
+
+    def order(self, **fields):
+        self.count += 1
+        return make_purchase_order(self.vendor, self.admin, number=f'PO-{self.count}', **fields)
+
+    def receive(self, order, quantity, itemised=True):
+        receipt = GoodsReceipt.objects.create(purchase_order=order, delivered_quantity=quantity, received_by=self.admin)
+        if itemised:
+            GoodsReceiptItem.objects.create(
+                goods_receipt=receipt, purchase_order_item=order.items.get(),
+                quantity_received=quantity, quantity_accepted=quantity,
+            )
+
+    def invoice(self, order, total=None, **fields):
+        return make_invoice(order, number=f'INV-{self.count}-{Invoice.objects.count()}', total=total, **fields)
+
+    def outcome(self, invoice):
+        match = InvoiceMatch.objects.get(invoice=invoice)
+        return match.status, match.exceptions
+
+    def test_fully_received_and_billed_order_matches(self):
+        order = self.order()
+        self.receive(order, 10)
+        invoice = self.invoice(order)
+
+        self.assertEqual(run_three_way_match(), {'invoices': 1, 'matched': 1, 'exception': 0})
+        self.assertEqual(self.outcome(invoice), ('matched', []))
+
+    def test_exception_codes(self):
+        unreceived = self.invoice(self.order())
+
+        half_received = self.order()
+        self.receive(half_received, 5, itemised=False)
+        billed_in_full = self.invoice(half_received)
+
+        over_delivered = self.order()
+        self.receive(over_delivered, 12)
+        over_delivered_invoice = self.invoice(over_delivered)
+
+        overbilled = self.order()
+        self.receive(overbilled, 10)
+        overbilled_invoice = self.invoice(overbilled, total='30.00')
+
+        other_vendor = self.order()
+        self.receive(other_vendor, 10)
+        wrong_vendor = self.invoice(other_vendor)
+        Invoice.objects.filter(pk=wrong_vendor.pk).update(vendor=make_vendor('VEND-2002'))
+
+        orphan = self.invoice(self.order())
+        Invoice.objects.filter(pk=orphan.pk).update(purchase_order=None)
+
+        summary = run_three_way_match()
+
+        self.assertEqual(summary, {'invoices': 6, 'matched': 0, 'exception': 6})
+        self.assertEqual(self.outcome(unreceived), ('exception', ['not_received']))
+        self.assertEqual(self.outcome(billed_in_full), ('exception', ['exceeds_received']))
+        self.assertEqual(self.outcome(over_delivered_invoice), ('exception', ['over_delivered']))
+        self.assertEqual(self.outcome(overbilled_invoice), ('exception', ['exceeds_ordered', 'exceeds_received']))
+        self.assertEqual(self.outcome(wrong_vendor), ('exception', ['vendor_mismatch']))
+        self.assertEqual(self.outcome(orphan), ('exception', ['no_purchase_order']))
+
+    def test_small_overbilling_is_within_tolerance(self):
+        order = self.order()
+        self.receive(order, 10)
+        invoice = self.invoice(order, total='20.90')
+
+        run_three_way_match()
+
+        self.assertEqual(self.outcome(invoice), ('matched', []))
+
+    def test_closed_invoices_are_skipped_and_reruns_update_in_place(self):
+        order = self.order()
+        open_invoice = self.invoice(order)
+        self.invoice(self.order(), status='paid')
+
+        run_three_way_match()
+        self.assertEqual(self.outcome(open_invoice), ('exception', ['not_received']))
+
+        self.receive(order, 10)
+        self.assertEqual(run_three_way_match()['matched'], 1)
+        self.assertEqual(InvoiceMatch.objects.count(), 1)
+        self.assertEqual(self.outcome(open_invoice), ('matched', []))
+
+
+class MatchExceptionsEndpointTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        vendor = make_vendor()
+        received = make_purchase_order(vendor, self.admin, number='PO-1')
+        GoodsReceipt.objects.create(purchase_order=received, delivered_quantity=10, received_by=self.admin)
+        self.overbilled = make_invoice(received, number='INV-1', total='50.00')
+        self.unreceived = make_invoice(make_purchase_order(vendor, self.admin, number='PO-2'), number='INV-2')
+        run_three_way_match()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, query=''):
+        return self.client.get(f'/api/invoices/match-exceptions/{query}')
+
+    def test_filters_by_exception_code(self):
+        response = self.get('?exception=not_received')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['invoice'], self.unreceived.pk)
+
+        self.assertEqual(self.get('?exception=exceeds_ordered').data['count'], 1)
+        self.assertEqual(self.get().data['count'], 2)
+
+    def test_unknown_exception_code_is_rejected(self):
+        self.assertEqual(self.get('?exception=received').status_code, 400)
+
+    def test_vendor_accounts_are_refused(self):
+        user, _ = make_vendor_user('vendor-user')
+        self.client.force_authenticate(user)
+
+        self.assertEqual(self.get().status_code, 403)
@@ -0,0 +1,145 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from procurement.throttling import TokenBucketThrottle, client_ip, consume, parse_rate, throttle
+
+THROTTLING = {
+    'enabled': True,
+    'cache': 'default',
+    'num_proxies': 0,
+    'scopes': {
+        'test': {'ip': '3/min', 'user': '2/min'},
+        'shared': {'global': '1/s'},
+    },
+}
+
+
+class TestThrottle(TokenBucketThrottle):
+    scope = 'test'
+
+
+@override_settings(THROTTLING=THROTTLING)
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.factory = RequestFactory()
+        self.now = 1000.0
+        clock = mock.patch('procurement.throttling.time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def request(self, ip='10.0.0.1', user=None, **meta):
+        request = self.factory.get('/', REMOTE_ADDR=ip, **meta)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/min'), (10, 60))
+        self.assertEqual(parse_rate('5/hour'), (5, 3600))
+        self.assertEqual(parse_rate('1/s'), (1, 1))
+
+    def test_allows_a_burst_then_refills_over_time(self):
+        self.assertEqual([consume('test', self.request()) for _ in range(3)], [None, None, None])
+
+        self.assertAlmostEqual(consume('test', self.request()), 20)
+        self.now += 20
+        self.assertIsNone(consume('test', self.request()))
+        self.assertIsNotNone(consume('test', self.request()))
+
+    def test_buckets_are_per_address(self):
+        for _ in range(3):
+            consume('test', self.request())
+
+        self.assertIsNotNone(consume('test', self.request()))
+        self.assertIsNone(consume('test', self.request(ip='10.0.0.2')))
+
+    def test_user_bucket_applies_to_authenticated_requests_only(self):
+        user = User.objects.create_user('emp', 'emp@example.com', 'pw')
+        consume('test', self.request(user=user))
+        consume('test', self.request(ip='10.0.0.2', user=user))
+
+        self.assertAlmostEqual(consume('test', self.request(ip='10.0.0.3', user=user)), 30)
+        self.assertIsNone(consume('test', self.request(ip='10.0.0.3')))
+
+    def test_refused_request_takes_no_tokens(self):
+        user = User.objects.create_user('emp', 'emp@example.com', 'pw')
+        consume('test', self.request(user=user))
+        consume('test', self.request(user=user))
+        self.assertIsNotNone(consume('test', self.request(user=user)))
+
+        # The address bucket still holds the token the refused request did not take
+        self.assertIsNone(consume('test', self.request()))
+        self.assertIsNotNone(consume('test', self.request()))
+
+    def test_global_bucket_is_shared_by_every_caller(self):
+        self.assertIsNone(consume('shared', self.request(ip='10.0.0.1')))
+        self.assertIsNotNone(consume('shared', self.request(ip='10.0.0.2')))
+
+    def test_unconfigured_or_disabled_scopes_are_not_throttled(self):
+        self.assertIsNone(consume('unknown', self.request()))
+        with override_settings(THROTTLING={**THROTTLING, 'enabled': False}):
+            for _ in range(5):
+                self.assertIsNone(consume('test', self.request()))
+
+    def test_decorated_view_returns_429_with_retry_after(self):
+        view = throttle('shared')(lambda request: JsonResponse({'ok': True}))
+        self.now = 1000.25
+
+        self.assertEqual(view(self.request()).status_code, 200)
+        response = view(self.request())
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertIn('error', json.loads(response.content))
+
+    def test_drf_throttle_reports_the_wait(self):
+        throttle_ = TestThrottle()
+        for _ in range(3):
+            self.assertTrue(throttle_.allow_request(self.request(), None))
+
+        self.assertFalse(throttle_.allow_request(self.request(), None))
+        self.assertAlmostEqual(throttle_.wait(), 20)
+
+
+class ClientIpTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def request(self, forwarded=None):
+        meta = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return self.factory.get('/', REMOTE_ADDR='172.16.0.1', **meta)
+
+    def test_without_proxies_the_header_is_ignored(self):
+        self.assertEqual(client_ip(self.request('1.2.3.4'), 0), '172.16.0.1')
+
+    def test_takes_the_address_seen_by_the_nearest_trusted_proxy(self):
+        spoofed = self.request('6.6.6.6, 1.2.3.4')
+        self.assertEqual(client_ip(spoofed, 1), '1.2.3.4')
+        self.assertEqual(client_ip(self.request('6.6.6.6, 1.2.3.4, 10.0.0.9'), 2), '1.2.3.4')
+
+    def test_short_header_falls_back_to_remote_addr(self):
+        self.assertEqual(client_ip(self.request('1.2.3.4'), 2), '172.16.0.1')
+        self.assertEqual(client_ip(self.request(), 1), '172.16.0.1')
+
+
+@override_settings(THROTTLING={**THROTTLING, 'scopes': {'login': {'ip': '2/min'}}})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_login_attempts_are_limited_per_address(self):
+        payload = json.dumps({'username': 'nobody', 'password': 'wrong'})
+        statuses = [
+            self.client.post('/api/auth/login/', payload, content_type='application/json').status_code
+            for _ in range(3)
+        ]
+
+        self.assertNotEqual(statuses[0], 429)
+        self.assertEqual(statuses[2], 429)
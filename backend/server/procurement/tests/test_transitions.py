@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from procurement.models import Notification, Product, PurchaseOrder, PurchaseRequest, StatusEvent
+from procurement.response_cache import get_model_versions
+from procurement.transitions import TransitionConflict, transition
+from procurement.views import PurchaseOrderViewSet
+
+from .fixtures import make_product, make_purchase_order, make_purchase_request, make_vendor
+
+
+class TransitionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.request = make_purchase_request(self.admin)
+
+    def test_moves_the_row_and_logs_the_change(self):
+        before = self.request.updated_at
+
+        transition(self.request, 'status', 'approved', reviewed_by=self.admin, note='ok')
+
+        self.assertEqual(self.request.status, 'approved')
+        self.assertGreater(self.request.updated_at, before)
+        stored = PurchaseRequest.objects.get(pk=self.request.pk)
+        self.assertEqual((stored.status, stored.reviewed_by), ('approved', self.admin))
+        event = StatusEvent.objects.get(document_type='purchase_request', to_status='approved')
+        self.assertEqual((event.from_status, event.note), ('pending', 'ok'))
+
+    def test_stale_instance_gets_a_conflict_naming_the_current_value(self):
+        stale = PurchaseRequest.objects.get(pk=self.request.pk)
+        transition(self.request, 'status', 'approved')
+
+        with self.assertRaises(TransitionConflict) as raised:
+            transition(stale, 'status', 'rejected', rejection_reason='late')
+
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(raised.exception.current, 'approved')
+        stored = PurchaseRequest.objects.get(pk=self.request.pk)
+        self.assertEqual((stored.status, stored.rejection_reason), ('approved', ''))
+        self.assertEqual(stale.status, 'pending')
+
+    def test_allowed_lists_the_accepted_starting_values(self):
+        stale = PurchaseRequest.objects.get(pk=self.request.pk)
+        PurchaseRequest.objects.filter(pk=self.request.pk).update(status='quotation_received')
+
+        transition(stale, 'status', 'approved', allowed=('pending', 'quotation_received'))
+
+        self.assertEqual(PurchaseRequest.objects.get(pk=self.request.pk).status, 'approved')
+
+    def test_idempotent_transition_accepts_a_row_already_there(self):
+        stale = PurchaseRequest.objects.get(pk=self.request.pk)
+        transition(self.request, 'status', 'approved')
+        events = StatusEvent.objects.count()
+
+        transition(stale, 'status', 'approved', idempotent=True)
+
+        self.assertEqual(stale.status, 'approved')
+        self.assertEqual(StatusEvent.objects.count(), events)
+        with self.assertRaises(TransitionConflict):
+            transition(stale, 'status', 'rejected', allowed=('pending',), idempotent=True)
+
+    def test_deleted_row_is_a_conflict(self):
+        PurchaseRequest.objects.filter(pk=self.request.pk).delete()
+
+        with self.assertRaises(TransitionConflict) as raised:
+            transition(self.request, 'status', 'approved')
+
+        self.assertIsNone(raised.exception.current)
+
+    def test_cached_models_are_invalidated(self):
+        product = make_product('PID900')
+        version, = get_model_versions((Product,))
+
+        transition(product, 'is_active', False, allowed=(True,))
+
+        self.assertNotEqual(get_model_versions((Product,)), [version])
+
+
+class TransitionEndpointTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.order = make_purchase_order(make_vendor(), self.admin, status='pending')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_concurrent_status_change_returns_409(self):
+        stale = PurchaseOrder.objects.get(pk=self.order.pk)
+        PurchaseOrder.objects.filter(pk=self.order.pk).update(status='in_progress')
+
+        with mock.patch.object(PurchaseOrderViewSet, 'get_object', return_value=stale):
+            response = self.client.post(
+                f'/api/purchase-orders/{self.order.pk}/update-status/', {'status': 'delayed'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'in_progress')
+        self.assertIn('error', response.data)
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.order.pk).status, 'in_progress')
+
+    def test_marking_a_read_notification_read_again_succeeds(self):
+        notification = Notification.objects.create(user=self.admin, type='general', message='Hi', read=True)
+
+        response = self.client.post(f'/api/notifications/{notification.pk}/mark_read/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['read'])
@@ -0,0 +1,195 @@
+"""
+Token-bucket throttling for public and expensive endpoints.
+
+Each scope is a class of endpoints, such as 'login' or 'pdf'. A scope
+can have up to three buckets, configured in settings.THROTTLING['scopes']:
+- 'ip': one bucket per client address. This is REMOTE_ADDR unless
+  THROTTLING['num_proxies'] says how many reverse proxies in front of
+  the app append to X-Forwarded-For. Otherwise a client could pick its
+  own bucket by sending the header itself;
+- 'user': one bucket per authenticated user, skipped for anonymous
+  requests;
+- 'global': one bucket shared by every caller of the scope. It caps the
+  load the whole endpoint class can put on the database, SMTP or PDF
+  rendering. Anonymous endpoints (login, register) have no global bucket:
+  one client spreading requests over many addresses could drain it and
+  lock everyone out.
+
+Rates use DRF's notation. 'N/period' is a bucket that holds N tokens and
+refills N tokens per period (s, min, hour or day), so it allows a burst
+of N and a sustained rate of N per period. A request takes one token
+from each of its buckets. If any bucket is empty the request is refused
+with 429 and a Retry-After header, and no tokens are taken.
+
+Buckets live in the cache named by THROTTLING['cache']. With the default
+LocMemCache each process has its own buckets. Point CACHE_BACKEND at a
+shared cache (Redis, Memcached) to enforce the limits across workers.
+Bucket updates are read-modify-write. They are serialized within a
+process but not across processes, so under contention a shared cache
+can admit a few extra requests.
+
+throttle() wraps plain Django views. TokenBucketThrottle subclasses plug
+into DRF's throttle_classes. The allowed and throttled counters are kept
+per process and served at /api/admin/throttling/.
+"""
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULT_SCOPES = {
+    'login': {'ip': '10/min'},
+    'register': {'ip': '5/hour'},
+    'pdf': {'ip': '60/min', 'user': '30/min', 'global': '120/min'},
+    'analytics': {'user': '30/min', 'global': '120/min'},
+}
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'cache': 'default',
+    'num_proxies': 0,  # Trusted proxies appending to X-Forwarded-For; 0 = use REMOTE_ADDR
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def get_settings():
+    config = {**DEFAULT_SETTINGS, **getattr(settings, 'THROTTLING', {})}
+    config['scopes'] = {**DEFAULT_SCOPES, **config.get('scopes', {})}
+    return config
+
+
+def parse_rate(rate):
+    """'10/min' -> (10 tokens, 60 seconds)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request, num_proxies):
+    """The address the nearest trusted proxy saw, or REMOTE_ADDR without proxies"""
+    if num_proxies:
+        forwarded = [addr.strip() for addr in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if addr.strip()]
+        if len(forwarded) >= num_proxies:
+            return forwarded[-num_proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _buckets(scope, request, rates, num_proxies):
+    """(kind, cache key, capacity, period) for each bucket the request draws from"""
+    idents = {
+        'ip': client_ip(request, num_proxies),
+        'user': request.user.pk if request.user.is_authenticated else None,
+        'global': 'all',
+    }
+    buckets = []
+    for kind, rate in rates.items():
+        if idents[kind] is None:
+            continue
+        capacity, period = parse_rate(rate)
+        buckets.append((kind, f'throttle:{scope}:{kind}:{idents[kind]}', capacity, period))
+    return buckets
+
+
+def _scope_stats(scope):
+    return _stats.setdefault(scope, {'allowed': 0, 'throttled': 0, 'throttled_by': {}})
+
+
+def consume(scope, request):
+    """
+    Take a token from each of the scope's buckets. Returns None when the
+    request may proceed, or the seconds until it could.
+    """
+    config = get_settings()
+    rates = config['scopes'].get(scope)
+    if not config['enabled'] or not rates:
+        return None
+
+    buckets = _buckets(scope, request, rates, config['num_proxies'])
+    cache = caches[config['cache']]
+    now = time.time()
+    with _lock:
+        states = cache.get_many([key for _, key, _, _ in buckets])
+        tokens = {}
+        wait, limited_by = 0, None
+        for kind, key, capacity, period in buckets:
+            level, updated = states.get(key, (capacity, now))
+            tokens[key] = min(capacity, level + (now - updated) * capacity / period)
+            if tokens[key] < 1:
+                needed = (1 - tokens[key]) * period / capacity
+                if needed > wait:
+                    wait, limited_by = needed, kind
+
+        stats = _scope_stats(scope)
+        if limited_by:
+            stats['throttled'] += 1
+            stats['throttled_by'][limited_by] = stats['throttled_by'].get(limited_by, 0) + 1
+            return wait
+        # An untouched bucket refills completely within its period, so it may expire then
+        cache.set_many(
+            {key: (tokens[key] - 1, now) for _, key, _, _ in buckets},
+            timeout=max(period for _, _, _, period in buckets),
+        )
+        stats['allowed'] += 1
+    return None
+
+
+def throttle(scope):
+    """Throttle a plain Django view; refused requests get 429 with Retry-After"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            wait = consume(scope, request)
+            if wait is not None:
+                retry_after = math.ceil(wait)
+                response = JsonResponse(
+                    {'error': f'Too many requests. Try again in {retry_after}s.'},
+                    status=429
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle backed by the buckets of `scope`"""
+    scope = None
+
+    def allow_request(self, request, view):
+        self.retry_after = consume(self.scope, request)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class PdfThrottle(TokenBucketThrottle):
+    scope = 'pdf'
+
+
+def snapshot():
+    """Configured rates and allowed/throttled counts per scope for this process"""
+    config = get_settings()
+    with _lock:
+        scopes = {
+            scope: {'rates': rates, **_scope_stats(scope), 'throttled_by': dict(_scope_stats(scope)['throttled_by'])}
+            for scope, rates in config['scopes'].items()
+        }
+    return {
+        'pid': os.getpid(),
+        'enabled': config['enabled'],
+        'cache': settings.CACHES[config['cache']]['BACKEND'],
+        'num_proxies': config['num_proxies'],
+        'scopes': scopes,
+    }
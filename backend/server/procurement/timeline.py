@@ -0,0 +1,268 @@
+"""
+Status timelines: an append-only StatusEvent row for every status change
+of a purchase request, RFQ, vendor quotation or purchase order.
+
+Signal handlers in signals.py compare each saved document with the status
+it was loaded with and call record(). Code that changes status through
+queryset .update() records the events itself with record_update(). Writes are batched: inside
+`with batch():` events are buffered and inserted with one bulk_create
+when the block exits, still inside the caller's transaction, so the log
+commits or rolls back with the transition. Outside a batch each event is
+inserted straight away.
+
+Each event's actor is, in order of preference:
+- the actor passed to record() or batch();
+- the user of the current request, which StatusEventActorMiddleware
+  publishes;
+- the document's own responsible-user field.
+
+Timelines and cycle times are answered from the (document_type,
+document_id, at) and (document_type, field, to_status, at) indexes
+without touching the document tables.
+"""
+import statistics
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import PurchaseOrder, PurchaseRequest, RequestForQuotation, StatusEvent, VendorQuotation
+
+
+# Model -> (document type, tracked status fields)
+TRACKED_MODELS = {
+    PurchaseRequest: ('purchase_request', ('status',)),
+    RequestForQuotation: ('rfq', ('status',)),
+    VendorQuotation: ('quotation', ('status',)),
+    PurchaseOrder: ('purchase_order', ('status', 'delivery_status')),
+}
+
+# Fallback actor when no request user is known
+ACTOR_FIELDS = {
+    PurchaseRequest: ('reviewed_by_id', 'employee_id'),
+    RequestForQuotation: ('sent_by_id',),
+    VendorQuotation: ('reviewed_by_id',),
+    PurchaseOrder: ('status_updated_by_id', 'created_by_id'),
+}
+
+# Default (from, to) pair per document type for cycle_times()
+DEFAULT_CYCLES = {
+    'purchase_request': ('pending', 'approved'),
+    'rfq': ('sent', 'received'),
+    'quotation': ('submitted', 'accepted'),
+    'purchase_order': ('sent', 'delivered'),
+}
+
+current_request = ContextVar('status_event_request', default=None)
+_batch = ContextVar('status_event_batch', default=None)
+_batch_actor = ContextVar('status_event_actor', default=None)
+
+
+class TimelineQueryError(ValueError):
+    """Invalid parameters passed to cycle_times()"""
+
+
+def document_type_of(model):
+    return TRACKED_MODELS[model][0]
+
+
+# =========================
+# RECORDING
+# =========================
+
+def snapshot(instance):
+    """Remember the tracked statuses an instance was loaded with (deferred fields are skipped)"""
+    _, fields = TRACKED_MODELS[type(instance)]
+    instance._status_snapshot = {field: instance.__dict__.get(field) for field in fields}
+
+
+def _actor_id(instance, actor):
+    if actor is not None:
+        return actor.pk
+    actor = _batch_actor.get()
+    if actor is not None:
+        return actor.pk
+    request = current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    for field in ACTOR_FIELDS.get(type(instance), ()):
+        if getattr(instance, field, None):
+            return getattr(instance, field)
+    return None
+
+
+def record(instance, field, from_status, to_status, actor=None, note='', at=None):
+    """Log one status change of a tracked document"""
+    event = StatusEvent(
+        document_type=document_type_of(type(instance)),
+        document_id=instance.pk,
+        field=field,
+        from_status=from_status or '',
+        to_status=to_status,
+        actor_id=_actor_id(instance, actor),
+        note=note[:255],
+        at=at or timezone.now(),
+    )
+    buffer = _batch.get()
+    if buffer is None:
+        event.save()
+    else:
+        buffer.append(event)
+    return event
+
+
+def record_update(model, transitions, field, to_status, actor=None, note='', at=None):
+    """
+    Log a queryset .update() that moved several documents to `to_status`.
+    `transitions` is (document id, previous status) pairs. The events are
+    inserted with one query, or join the enclosing batch.
+    """
+    at = at or timezone.now()
+    actor_id = _actor_id(None, actor)  # No per-row fallback: the request user or `actor` is the reviewer
+    events = [
+        StatusEvent(
+            document_type=document_type_of(model),
+            document_id=document_id,
+            field=field,
+            from_status=from_status or '',
+            to_status=to_status,
+            actor_id=actor_id,
+            note=note[:255],
+            at=at,
+        )
+        for document_id, from_status in transitions
+        if from_status != to_status
+    ]
+    buffer = _batch.get()
+    if buffer is not None:
+        buffer.extend(events)
+    elif events:
+        StatusEvent.objects.bulk_create(events)
+    return events
+
+
+def record_changes(instance, created, update_fields=None):
+    """Record every tracked field that differs from the instance's snapshot"""
+    _, fields = TRACKED_MODELS[type(instance)]
+    previous = instance.__dict__.get('_status_snapshot') or {}
+    for field in fields:
+        if update_fields is not None and field not in update_fields:
+            continue
+        new = getattr(instance, field)
+        old = None if created else previous.get(field)
+        if created or (field in previous and old != new):
+            record(instance, field, old, new)
+    snapshot(instance)
+
+
+@contextmanager
+def batch(actor=None):
+    """
+    Buffer events recorded inside the block and insert them with one query
+    on exit. Nested batches share the outermost buffer. Events are dropped
+    if the block raises, matching the rolled-back transition.
+    """
+    if _batch.get() is not None:
+        if actor is None:
+            yield
+            return
+        token = _batch_actor.set(actor)
+        try:
+            yield
+        finally:
+            _batch_actor.reset(token)
+        return
+
+    buffer = []
+    batch_token = _batch.set(buffer)
+    actor_token = _batch_actor.set(actor)
+    try:
+        yield
+    finally:
+        _batch.reset(batch_token)
+        _batch_actor.reset(actor_token)
+    if buffer:
+        StatusEvent.objects.bulk_create(buffer)
+
+
+# =========================
+# QUERIES
+# =========================
+
+def timeline(document_type, document_id):
+    return StatusEvent.objects.filter(
+        document_type=document_type, document_id=document_id,
+    ).select_related('actor').order_by('at', 'id')
+
+
+def _parse_datetime(value, name):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise TimelineQueryError(f'{name} must be an ISO date or datetime')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2)
+
+
+def cycle_times(document_type, from_status=None, to_status=None, field='status', since=None, until=None):
+    """
+    Time from a document first entering `from_status` to first entering
+    `to_status`, over documents that entered `from_status` between since and
+    until. Returns counts and avg/median/p90/max hours.
+    """
+    if document_type not in DEFAULT_CYCLES:
+        raise TimelineQueryError(f'Unknown document type. Use any of {", ".join(DEFAULT_CYCLES)}')
+    default_from, default_to = DEFAULT_CYCLES[document_type]
+    from_status = from_status or default_from
+    to_status = to_status or default_to
+    if from_status == to_status:
+        raise TimelineQueryError('from and to must be different statuses')
+    tracked_fields = dict(TRACKED_MODELS.values())[document_type]
+    if field not in tracked_fields:
+        raise TimelineQueryError(f'field must be one of {", ".join(tracked_fields)}')
+
+    events = StatusEvent.objects.filter(document_type=document_type, field=field)
+    started = events.filter(to_status=from_status).values('document_id').annotate(first_at=Min('at')).order_by()
+    if since:
+        started = started.filter(first_at__gte=_parse_datetime(since, 'since'))
+    if until:
+        started = started.filter(first_at__lte=_parse_datetime(until, 'until'))
+    finished = (
+        events.filter(to_status=to_status, document_id__in=started.values('document_id'))
+        .values('document_id').annotate(first_at=Min('at')).order_by()
+    )
+    started = {row['document_id']: row['first_at'] for row in started}
+
+    durations = []
+    for row in finished:
+        started_at = started[row['document_id']]
+        if row['first_at'] >= started_at:
+            durations.append((row['first_at'] - started_at).total_seconds())
+
+    result = {
+        'document_type': document_type,
+        'field': field,
+        'from': from_status,
+        'to': to_status,
+        'started': len(started),
+        'completed': len(durations),
+        'avg_hours': None,
+        'median_hours': None,
+        'p90_hours': None,
+        'max_hours': None,
+    }
+    if durations:
+        durations.sort()
+        result.update(
+            avg_hours=_hours(statistics.mean(durations)),
+            median_hours=_hours(statistics.median(durations)),
+            p90_hours=_hours(durations[min(int(len(durations) * 0.9), len(durations) - 1)]),
+            max_hours=_hours(durations[-1]),
+        )
+    return result
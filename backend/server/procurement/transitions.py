@@ -0,0 +1,97 @@
+"""
+State transitions as conditional UPDATEs.
+
+transition() changes one field of one row with
+
+    UPDATE ... SET <field> = <new>, <changes> WHERE id = <pk> AND <field> IN (<allowed>)
+
+instead of mutating the instance and calling save(). The database
+decides, atomically, whether the row is still in a state the transition
+applies to. Concurrent callers cannot overwrite each other: the loser
+updates zero rows and gets TransitionConflict (HTTP 409) naming the
+current value. By default `allowed` is the value the instance was loaded
+with, which makes the UPDATE a compare-and-swap. Only the listed columns
+are written, like save(update_fields=...).
+
+A queryset UPDATE skips the post_save handlers, so their work is done here:
+- the StatusEvent log;
+- spend cube moves for purchase order status;
+- response cache versions;
+- the product autocomplete index.
+"""
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import spend, timeline
+from .autocomplete import product_index
+from .models import Product, PurchaseOrder
+from .response_cache import bump_model_version
+from .signals import CACHED_MODELS
+
+
+class TransitionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'conflict'
+
+    def __init__(self, instance, field, current):
+        name = instance._meta.verbose_name
+        self.current = current
+        if current is None:
+            message = f'This {name} no longer exists'
+        else:
+            message = f'This {name} was changed by someone else; {field} is now {current!r}'
+        super().__init__({'error': message, field: current})
+
+
+def _has_field(model, name):
+    return any(field.name == name for field in model._meta.concrete_fields)
+
+
+def _after_update(instance, field, old, new, note):
+    """Side effects of a successful transition that post_save handlers would otherwise apply"""
+    model = type(instance)
+    if old != new and model in timeline.TRACKED_MODELS and field in timeline.TRACKED_MODELS[model][1]:
+        timeline.record(instance, field, old, new, note=note)
+        # A later save() of this instance must not log the same change again
+        instance.__dict__.setdefault('_status_snapshot', {})[field] = new
+    if old != new and model is PurchaseOrder and field == 'status':
+        new_key = spend.order_key(instance.pk)
+        if new_key is not None:
+            spend.move_order(instance.pk, new_key[:3] + (old,), new_key)
+    if model in CACHED_MODELS:
+        bump_model_version(model)
+    if model is Product:
+        product_index.update(instance)
+
+
+def transition(instance, field, new, allowed=None, idempotent=False, note='', **changes):
+    """
+    Set `instance.<field>` to `new` only if the row's current value is in
+    `allowed` (default: the value `instance` holds now), along with
+    `changes`. updated_at is bumped when the model has one.
+
+    Raises TransitionConflict when no row matched. With idempotent=True a
+    row that already holds `new` counts as success and nothing is written.
+    On success the instance is updated in place and returned.
+    """
+    model = type(instance)
+    old = getattr(instance, field)
+    allowed = (old,) if allowed is None else tuple(allowed)
+
+    values = {field: new, **changes}
+    if _has_field(model, 'updated_at'):
+        values.setdefault('updated_at', timezone.now())
+
+    updated = model._default_manager.filter(pk=instance.pk, **{f'{field}__in': allowed}).update(**values)
+    if not updated:
+        current = model._default_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+        if idempotent and current == new:
+            setattr(instance, field, new)
+            return instance
+        raise TransitionConflict(instance, field, current)
+
+    for name, value in values.items():
+        setattr(instance, name, value)
+    _after_update(instance, field, old, new, note)
+    return instance
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -21,7 +22,20 @@ router.register(r'payments', views.PaymentViewSet, basename='payment')
 router.register(r'notifications', views.NotificationViewSet, basename='notification')
 router.register(r'vendor-dashboard', views.VendorDashboardViewSet, basename='vendor-dashboard')
 
-urlpatterns = [
+# Async vendor portal reads, matched ahead of the VendorDashboardViewSet actions
+async_vendor_urls = []
+if settings.ASYNC_VENDOR_PORTAL:
+    from . import async_views
+
+    async_vendor_urls = [
+        path('vendor-dashboard/dashboard_stats/', async_views.vendor_dashboard_stats, name='vendor-dashboard-stats-async'),
+        path('vendor-dashboard/my_rfqs/', async_views.vendor_rfqs, name='vendor-dashboard-rfqs-async'),
+        path('vendor-dashboard/my_quotations/', async_views.vendor_quotations, name='vendor-dashboard-quotations-async'),
+        path('vendor-dashboard/my_purchase_orders/', async_views.vendor_purchase_orders, name='vendor-dashboard-purchase-orders-async'),
+        path('vendor-dashboard/my_invoices/', async_views.vendor_invoices, name='vendor-dashboard-invoices-async'),
+    ]
+
+urlpatterns = async_vendor_urls + [
     # Include all router URLs
     path('', include(router.urls)),
     
@@ -31,11 +45,26 @@ urlpatterns = [
     path('auth/logout/', views.logout_view, name='logout'),
     path('auth/current-user/', views.current_user, name='current-user'),
     path('auth/check/', views.check_auth, name='check_auth'),
+    path('auth/token/', views.issue_token_view, name='auth-token'),
     path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark-all-notifications-read'),
      
     # Dashboard endpoints
     path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
 
+    # Search endpoints
+    path('search/', views.global_search, name='global-search'),
+
+    # Delta sync endpoint
+    path('sync/', views.sync_changes, name='sync'),
+
+    # Analytics endpoints
+    path('analytics/spend/', views.spend_analytics, name='spend-analytics'),
+    path('analytics/cycle-times/', views.cycle_time_analytics, name='cycle-time-analytics'),
+
+    # Admin endpoints
+    path('admin/db-pool/', views.db_pool_stats, name='db-pool-stats'),
+    path('admin/throttling/', views.throttle_stats, name='throttle-stats'),
+
     # ADD THIS NEW LINE:
     path('vendor/register/', views.vendor_self_register, name='vendor-register'),
 ]
\ No newline at end of file
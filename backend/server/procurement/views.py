@@ -1,5 +1,4 @@
 from decimal import Decimal
-from http import client
 from io import BytesIO
 import json
 import os
@@ -7,11 +6,6 @@ import secrets
 import string
 import traceback
 from datetime import datetime, timedelta
-from urllib import request
-import razorpay
-from django.conf import settings
-import hmac
-import hashlib
 
 
 from django.utils import timezone
@@ -21,13 +15,11 @@ from django.contrib.auth.hashers import check_password
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.http import JsonResponse, HttpResponse
 from django.middleware.csrf import get_token
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Exists, OuterRef, Prefetch, Sum, Q
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.decorators import method_decorator
-from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import viewsets, status
@@ -36,15 +28,15 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-
+from .idempotency import idempotent
+from .mixins import (
+    CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, StatusTimelineMixin, VendorContextMixin,
+)
 from .models import (
     Vendor, Category, Product, PurchaseOrder, 
     PurchaseOrderItem, Invoice, Payment, EmployeeProfile,
     PurchaseRequest, GoodsReceipt, Notification,
-    RequestForQuotation, VendorQuotation, UserProfile
+    RequestForQuotation, VendorQuotation, UserProfile, ProductForecast, InvoiceMatch
 )
 from .serializers import (
     InvoiceUploadSerializer, VendorSerializer, CategorySerializer, ProductSerializer,
@@ -52,8 +44,13 @@ from .serializers import (
     InvoiceSerializer, PaymentSerializer, EmployeeSerializer, 
     VendorPurchaseOrderSerializer, DeliveryStatusUpdateSerializer,
     PurchaseRequestSerializer, GoodsReceiptSerializer, NotificationSerializer,
-    RequestForQuotationSerializer, VendorQuotationSerializer
+    RequestForQuotationSerializer, VendorQuotationSerializer, ProductForecastSerializer,
+    InvoiceMatchSerializer
 )
+from .tasks import queue_email
+from .throttling import PdfThrottle, throttle
+from .timeline import batch as batch_status_events, record_update as record_status_update
+from .transitions import transition
 
 
 
@@ -94,6 +91,7 @@ def get_csrf_token(request):
 # ============================================
 
 @csrf_exempt
+@throttle('login')
 def login_view(request):
     """Handle user login with proper session management"""
     if request.method == 'POST':
@@ -237,6 +235,35 @@ def current_user(request):
     return JsonResponse({'error': 'Not authenticated'}, status=401)
 
 
+@csrf_exempt
+@throttle('login')
+def issue_token_view(request):
+    """Exchange username/password for a signed stateless Bearer token"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    from .authentication import issue_token, token_lifetime
+
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    user = authenticate(request, username=data.get('username'), password=data.get('password'))
+    if user is None:
+        return JsonResponse({'error': 'Invalid username or password'}, status=401)
+
+    profile = getattr(user, 'profile', None)
+    if profile and profile.role == 'vendor' and profile.vendor and profile.vendor.status != 'approved':
+        return JsonResponse({'error': f'Vendor account is {profile.vendor.status}.'}, status=403)
+
+    return JsonResponse({
+        'token': issue_token(user),
+        'token_type': 'Bearer',
+        'expires_in': int(token_lifetime().total_seconds()),
+    })
+
+
 # ==================== DASHBOARD VIEWS ====================
 
 def dashboard_stats(request):
@@ -299,9 +326,168 @@ def dashboard_stats(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+# ==================== SEARCH VIEWS ====================
+
+def global_search(request):
+    """
+    Ranked full-text search grouped by document type
+    GET /api/search/?q=<text>&types=vendors,products&limit=10
+    """
+    from .search import search, SEARCH_TARGETS_BY_KEY
+
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    profile = getattr(request.user, 'profile', None)
+    if not request.user.is_superuser and profile and profile.role == 'vendor':
+        return JsonResponse({'error': 'Search is not available for vendor accounts'}, status=403)
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'Query parameter q is required'}, status=400)
+    
+    types = [t for t in request.GET.get('types', '').split(',') if t]
+    unknown_types = [t for t in types if t not in SEARCH_TARGETS_BY_KEY]
+    if unknown_types:
+        return JsonResponse({
+            'error': f'Unknown types: {", ".join(unknown_types)}. Must be one of: {", ".join(SEARCH_TARGETS_BY_KEY)}'
+        }, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    
+    results = search(query, types=types, limit=limit)
+    
+    return JsonResponse({
+        'query': query,
+        'results': results,
+        'total': sum(len(hits) for hits in results.values()),
+    })
+
+
+# ==================== SYNC VIEWS ====================
+
+def sync_changes(request):
+    """
+    Rows created, updated or deleted since the client's last sync
+    GET /api/sync/?since=<token>
+    Omit `since` for a full snapshot. Keep calling with `next` while
+    `has_more` is true.
+    """
+    from .sync import changes_since, InvalidWatermark, ExpiredWatermark
+    
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    profile = getattr(request.user, 'profile', None)
+    if not request.user.is_superuser and profile and profile.role == 'vendor':
+        return JsonResponse({'error': 'Sync is not available for vendor accounts'}, status=403)
+    
+    try:
+        result = changes_since(request.GET.get('since') or None, request.user)
+    except InvalidWatermark as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ExpiredWatermark as e:
+        return JsonResponse({'error': str(e)}, status=410)
+    
+    return JsonResponse(result)
+
+
+# ==================== ANALYTICS VIEWS ====================
+
+@throttle('analytics')
+def spend_analytics(request):
+    """
+    Spend sliced by any subset of month, department, category, vendor and status
+    GET /api/analytics/spend/?group_by=month,category&from=2025-01&to=2025-12
+    Optional filters: department, category, vendor, status (comma separated).
+    Answered from the SpendFact rollup.
+    """
+    from .spend import query_spend, SpendQueryError
+    
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    profile = getattr(request.user, 'profile', None)
+    if not request.user.is_superuser and profile and profile.role == 'vendor':
+        return JsonResponse({'error': 'Spend analytics is not available for vendor accounts'}, status=403)
+    
+    group_by = [name.strip() for name in request.GET.get('group_by', '').split(',') if name.strip()]
+    try:
+        result = query_spend(group_by, request.GET)
+    except SpendQueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse(result)
+
+
+
+@throttle('analytics')
+def cycle_time_analytics(request):
+    """
+    Time documents take to move between two statuses
+    GET /api/analytics/cycle-times/?document=purchase_request&from=pending&to=approved
+    Optional: field (status or, for purchase orders, delivery_status),
+    since/until (ISO dates, applied to when the document entered `from`).
+    Answered from the StatusEvent log.
+    """
+    from .timeline import cycle_times, TimelineQueryError
+    
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    profile = getattr(request.user, 'profile', None)
+    if not request.user.is_superuser and profile and profile.role == 'vendor':
+        return JsonResponse({'error': 'Cycle-time analytics is not available for vendor accounts'}, status=403)
+    
+    try:
+        result = cycle_times(
+            request.GET.get('document', 'purchase_request'),
+            from_status=request.GET.get('from'),
+            to_status=request.GET.get('to'),
+            field=request.GET.get('field', 'status'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except TimelineQueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse(result)
+
+# ==================== ADMIN VIEWS ====================
+
+def db_pool_stats(request):
+    """
+    Database connection statistics for the worker process serving the request
+    GET /api/admin/db-pool/ (superusers only)
+    """
+    from .db_metrics import snapshot
+    
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Only administrators can view database statistics'}, status=403)
+    
+    return JsonResponse(snapshot())
+
+
+def throttle_stats(request):
+    """
+    Throttle rates and allowed/throttled counts for the worker process serving the request
+    GET /api/admin/throttling/ (superusers only)
+    """
+    from .throttling import snapshot
+    
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Only administrators can view throttling statistics'}, status=403)
+    
+    return JsonResponse(snapshot())
+
+
 # ==================== VENDOR SELF-REGISTRATION ====================
 
 @csrf_exempt
+@throttle('register')
 def vendor_self_register(request):
     """
     Public endpoint for vendor self-registration with password
@@ -410,19 +596,17 @@ Please review and approve/reject this vendor in the admin dashboard.
 Once approved, a permanent vendor code will be assigned and the vendor can login.
                 """
                 
-                send_mail(
+                queue_email(
                     subject=subject,
                     message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=list(admin_emails),
-                    fail_silently=True,
                 )
         except Exception as e:
             print(f"Failed to send admin notification: {e}")
         
         # Send confirmation email to vendor
         try:
-            send_mail(
+            queue_email(
                 subject='Vendor Registration Received',
                 message=f"""
 Dear {vendor.contact_person},
@@ -443,9 +627,7 @@ If you have any questions, please contact our procurement team.
 Best regards,
 Procurement Team
                 """,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[vendor.email],
-                fail_silently=True,
             )
         except Exception as e:
             print(f"Failed to send vendor confirmation: {e}")
@@ -471,9 +653,10 @@ Procurement Team
 
 # ==================== EMPLOYEE VIEWSET ====================
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet for Employee management with full CRUD - EXCLUDES VENDORS"""
     serializer_class = EmployeeSerializer
+    cache_dependencies = (User, UserProfile, EmployeeProfile)
    
     
     def get_queryset(self):
@@ -640,7 +823,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             except Exception as e:
                 print(f"Note: No UserProfile found or error deleting: {e}")
             
-            PurchaseRequest.objects.filter(employee=instance).update(employee=None)
+            PurchaseRequest.objects.filter(employee=instance).update(employee=None, updated_at=timezone.now())
             
             try:
                 Notification.objects.filter(user=instance).delete()
@@ -648,12 +831,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 print(f"Note: Error deleting notifications: {e}")
             
             try:
-                GoodsReceipt.objects.filter(received_by=instance).update(received_by=None)
+                GoodsReceipt.objects.filter(received_by=instance).update(received_by=None, updated_at=timezone.now())
             except Exception as e:
                 print(f"Note: Error updating GoodsReceipts: {e}")
             
             try:
-                PurchaseOrder.objects.filter(assigned_to=instance).update(assigned_to=None)
+                PurchaseOrder.objects.filter(assigned_to=instance).update(assigned_to=None, updated_at=timezone.now())
             except Exception as e:
                 print(f"Note: Error updating PurchaseOrders: {e}")
             
@@ -676,8 +859,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         instance = self.get_object()
-        instance.is_active = True
-        instance.save()
+        transition(instance, 'is_active', True, allowed=(False,), idempotent=True)
         
         return Response({
             'message': 'Employee activated successfully',
@@ -687,8 +869,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
         instance = self.get_object()
-        instance.is_active = False
-        instance.save()
+        transition(instance, 'is_active', False, allowed=(True,), idempotent=True)
         
         return Response({
             'message': 'Employee deactivated successfully',
@@ -752,9 +933,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
 # ==================== VENDOR VIEWSET ====================
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
+    conditional_timestamp_fields = ('updated_at', 'user_profiles__updated_at')
+    cache_dependencies = (Vendor, UserProfile, User)
     
     @action(detail=True, methods=['post'])
     @transaction.atomic
@@ -806,7 +989,7 @@ class VendorViewSet(viewsets.ModelViewSet):
         
         # Send approval email (NO CREDENTIALS)
         try:
-            send_mail(
+            queue_email(
                 subject=f'Vendor Account Approved - {vendor.company_name}',
                 message=f"""
 Dear {vendor.contact_person},
@@ -822,9 +1005,7 @@ You can now login to the vendor portal using the username and password you creat
 Best regards,
 Procurement Team
                 """,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[vendor.email],
-                fail_silently=False,
             )
         except Exception as e:
             print(f"Failed to send approval email: {e}")
@@ -862,7 +1043,7 @@ Procurement Team
         
         # Send rejection email
         try:
-            send_mail(
+            queue_email(
                 subject=f'Vendor Registration Update - {vendor.company_name}',
                 message=f"""
 Dear {vendor.contact_person},
@@ -879,9 +1060,7 @@ If you have any questions or would like to reapply, please contact our procureme
 Best regards,
 Procurement Team
                 """,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[vendor.email],
-                fail_silently=False,
             )
         except Exception as e:
             print(f"Failed to send rejection email: {e}")
@@ -982,10 +1161,11 @@ Procurement Team
 
 # ==================== CATEGORY VIEWSET ====================
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for Category model"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_dependencies = (Category,)
 
 
 # ==================== PRODUCT VIEWSET ====================
@@ -993,10 +1173,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
 # Updated ProductViewSet for views.py
 # Replace the existing ProductViewSet class with this updated version
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for Product model with auto-generated product codes"""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    conditional_timestamp_fields = ('updated_at', 'category__updated_at')
+    cache_dependencies = (Product, Category)
     
     def get_queryset(self):
         queryset = Product.objects.all()
@@ -1012,29 +1194,18 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     def generate_product_code(self):
         """Generate next product code in sequence (PID001, PID002, etc.)"""
-        from django.db.models import Max
+        from django.db.models import IntegerField, Max
+        from django.db.models.functions import Cast, Substr
         
-        # Get all existing product codes that start with 'PID'
-        existing_codes = Product.objects.filter(
-            product_code__startswith='PID'
-        ).values_list('product_code', flat=True)
-        
-        # Find the maximum number
-        max_number = 0
-        for code in existing_codes:
-            try:
-                # Extract number from format PID001, PID002, etc.
-                number = int(code.replace('PID', ''))
-                if number > max_number:
-                    max_number = number
-            except (IndexError, ValueError):
-                continue
+        # Highest numeric suffix among PID<digits> codes, computed by the database
+        max_number = Product.objects.filter(
+            product_code__regex=r'^PID[0-9]+$'
+        ).aggregate(
+            max_number=Max(Cast(Substr('product_code', 4), IntegerField()))
+        )['max_number'] or 0
         
         # Generate new code with zero-padding (PID001, PID002, etc.)
-        new_number = max_number + 1
-        new_product_code = f"PID{new_number:03d}"
-        
-        return new_product_code
+        return f"PID{max_number + 1:03d}"
     
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -1055,25 +1226,87 @@ class ProductViewSet(viewsets.ModelViewSet):
             'message': f'Product created successfully with code {serializer.data["product_code"]}'
         }, status=status.HTTP_201_CREATED, headers=headers)
     
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_catalog(self, request):
+        """
+        Upsert products by product_code from an uploaded CSV file
+        POST /api/products/import/ (multipart, field "file")
+        """
+        import io
+        from .catalog_import import import_products, CatalogImportError
+        
+        if not request.user.is_superuser:
+            return Response(
+                {'error': 'Only administrators can import the product catalog'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        create_categories = request.data.get('create_categories', 'true').lower() != 'false'
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            summary = import_products(stream, create_categories=create_categories)
+        except CatalogImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+        
+        return Response(summary)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Prefix suggestions for active products, served from memory
+        GET /api/products/autocomplete/?q=<prefix>&limit=10
+        """
+        from .autocomplete import product_index
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({
+                'error': 'limit must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(product_index.lookup(request.query_params.get('q', ''), limit=limit))
+
+    @action(detail=True, methods=['get'])
+    def forecast(self, request, pk=None):
+        """
+        Latest demand forecast and safety stock for one product
+        GET /api/products/{id}/forecast/
+        """
+        try:
+            forecast = ProductForecast.objects.select_related('product').get(product_id=pk)
+        except (ProductForecast.DoesNotExist, ValueError):
+            return Response({
+                'error': 'No forecast has been generated for this product yet'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ProductForecastSerializer(forecast).data)
+
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         product = self.get_object()
-        product.is_active = True
-        product.save()
+        transition(product, 'is_active', True, allowed=(False,), idempotent=True)
         return Response(self.get_serializer(product).data)
     
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
         product = self.get_object()
-        product.is_active = False
-        product.save()
+        transition(product, 'is_active', False, allowed=(True,), idempotent=True)
         return Response(self.get_serializer(product).data)
 
 
 # ==================== PURCHASE REQUEST VIEWSET ====================
 
-class PurchaseRequestViewSet(viewsets.ModelViewSet):
+class PurchaseRequestViewSet(StatusTimelineMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = PurchaseRequestSerializer
+    timeline_document_type = 'purchase_request'
+    conditional_timestamp_fields = ('updated_at', 'product__updated_at')
 
     
     def get_queryset(self):
@@ -1083,15 +1316,6 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             'reviewed_by'
         ).all().order_by('-created_at')
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        print(f"DEBUG LIST: Found {queryset.count()} requests")
-        
-        serializer = self.get_serializer(queryset, many=True)
-        print(f"DEBUG LIST: Serialized data: {serializer.data}")
-        
-        return Response(serializer.data)
-    
     @action(detail=False, methods=['get'])
     def my_requests(self, request):
         try:
@@ -1128,10 +1352,11 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        purchase_request.status = 'approved'
-        purchase_request.reviewed_by = request.user if request.user.is_authenticated else None
-        purchase_request.reviewed_date = timezone.now()
-        purchase_request.save()
+        transition(
+            purchase_request, 'status', 'approved',
+            reviewed_by=request.user if request.user.is_authenticated else None,
+            reviewed_date=timezone.now(),
+        )
         
         if purchase_request.employee:
             Notification.objects.create(
@@ -1159,11 +1384,12 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         
         rejection_reason = request.data.get('rejection_reason', 'No reason provided')
         
-        purchase_request.status = 'rejected'
-        purchase_request.reviewed_by = request.user if request.user.is_authenticated else None
-        purchase_request.reviewed_date = timezone.now()
-        purchase_request.rejection_reason = rejection_reason
-        purchase_request.save()
+        transition(
+            purchase_request, 'status', 'rejected',
+            reviewed_by=request.user if request.user.is_authenticated else None,
+            reviewed_date=timezone.now(),
+            rejection_reason=rejection_reason,
+        )
         
         if purchase_request.employee:
             Notification.objects.create(
@@ -1179,8 +1405,104 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             'data': serializer.data
         })
     
+    BULK_REVIEW_LIMIT = 1000
+    
+    def _bulk_review(self, request, new_status, notification_type, message, extra_fields=None):
+        """
+        Move many pending requests to `new_status` with one conditional UPDATE
+        and report what happened to each requested id.
+        `message` builds the employee notification from the item name.
+        """
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = list(dict.fromkeys(int(pr_id) for pr_id in ids))
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.BULK_REVIEW_LIMIT:
+            return Response(
+                {'error': f'At most {self.BULK_REVIEW_LIMIT} requests can be reviewed at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        reviewer = request.user if request.user.is_authenticated else None
+        now = timezone.now()
+        
+        with transaction.atomic():
+            # Lock the rows so the UPDATE below changes exactly the ones seen as pending
+            rows = {
+                row['id']: row
+                for row in PurchaseRequest.objects.select_for_update().filter(id__in=ids).values(
+                    'id', 'status', 'employee_id', 'item_name'
+                )
+            }
+            PurchaseRequest.objects.filter(id__in=ids, status='pending').update(
+                status=new_status,
+                reviewed_by=reviewer,
+                reviewed_date=now,
+                updated_at=now,
+                **(extra_fields or {})
+            )
+            reviewed = [row for row in rows.values() if row['status'] == 'pending']
+            # .update() skips post_save, so the status events are written here
+            record_status_update(
+                PurchaseRequest, [(row['id'], row['status']) for row in reviewed],
+                'status', new_status, actor=reviewer, at=now,
+            )
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=row['employee_id'],
+                    type=notification_type,
+                    message=message(row['item_name']),
+                    related_request_id=row['id'],
+                )
+                for row in reviewed if row['employee_id']
+            ])
+        
+        results = []
+        for pr_id in ids:
+            row = rows.get(pr_id)
+            if row is None:
+                results.append({'id': pr_id, 'outcome': 'not_found'})
+            elif row['status'] == 'pending':
+                results.append({'id': pr_id, 'outcome': new_status})
+            else:
+                results.append({'id': pr_id, 'outcome': 'skipped', 'status': row['status']})
+        
+        return Response({
+            'message': f'{len(reviewed)} of {len(ids)} purchase request(s) {new_status}',
+            'updated': len(reviewed),
+            'results': results,
+        })
+    
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """
+        Approve many pending requests at once
+        POST /api/purchase-requests/bulk-approve/ {"ids": [1, 2, 3]}
+        """
+        return self._bulk_review(
+            request, 'approved', 'approval',
+            lambda item_name: f'Your purchase request for "{item_name}" has been approved!',
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """
+        Reject many pending requests at once with a shared reason
+        POST /api/purchase-requests/bulk-reject/ {"ids": [1, 2], "rejection_reason": "..."}
+        """
+        rejection_reason = request.data.get('rejection_reason', 'No reason provided')
+        return self._bulk_review(
+            request, 'rejected', 'rejection',
+            lambda item_name: f'Your purchase request for "{item_name}" has been rejected. Reason: {rejection_reason}',
+            extra_fields={'rejection_reason': rejection_reason},
+        )
+    
     @action(detail=True, methods=['post'], url_path='send-rfq')
     @transaction.atomic
+    @batch_status_events()
     def send_rfq(self, request, pk=None):
         """
         Send RFQ to one or more vendors
@@ -1270,9 +1592,14 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
 
 # ==================== RFQ VIEWSET ====================
 
-class RequestForQuotationViewSet(viewsets.ModelViewSet):
+class RequestForQuotationViewSet(StatusTimelineMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for managing RFQs"""
     serializer_class = RequestForQuotationSerializer
+    timeline_document_type = 'rfq'
+    conditional_timestamp_fields = (
+        'updated_at', 'quotation__updated_at',
+        'purchase_request__updated_at', 'vendor__updated_at'
+    )
     
     def get_queryset(self):
         queryset = RequestForQuotation.objects.select_related(
@@ -1292,7 +1619,9 @@ class RequestForQuotationViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-sent_date')
     
     @action(detail=True, methods=['post'])
+    @idempotent()
     @transaction.atomic
+    @batch_status_events()
     def accept_quotation(self, request, pk=None):
         rfq = self.get_object()
         
@@ -1308,15 +1637,15 @@ class RequestForQuotationViewSet(viewsets.ModelViewSet):
                 'error': 'Only submitted quotations can be accepted'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Accept the quotation
-        quotation.status = 'accepted'
-        quotation.reviewed_by = request.user if request.user.is_authenticated else None
-        quotation.reviewed_date = timezone.now()
-        quotation.save()
+        # Accept the quotation; a concurrent accept or reject turns this into a 409
+        transition(
+            quotation, 'status', 'accepted',
+            reviewed_by=request.user if request.user.is_authenticated else None,
+            reviewed_date=timezone.now(),
+        )
         
         # Update RFQ status
-        rfq.status = 'accepted'
-        rfq.save()
+        transition(rfq, 'status', 'accepted')
         
         # Get or create admin user
         admin_user = None
@@ -1405,14 +1734,14 @@ class RequestForQuotationViewSet(viewsets.ModelViewSet):
         quotation = rfq.quotation
         review_notes = request.data.get('review_notes', 'No reason provided')
         
-        rfq.status = 'rejected'
-        rfq.save()
+        transition(rfq, 'status', 'rejected')
         
-        quotation.status = 'rejected'
-        quotation.reviewed_by = request.user if request.user.is_authenticated else None
-        quotation.reviewed_date = timezone.now()
-        quotation.review_notes = review_notes
-        quotation.save()
+        transition(
+            quotation, 'status', 'rejected',
+            reviewed_by=request.user if request.user.is_authenticated else None,
+            reviewed_date=timezone.now(),
+            review_notes=review_notes,
+        )
         
         if rfq.vendor.user:
             Notification.objects.create(
@@ -1430,9 +1759,14 @@ class RequestForQuotationViewSet(viewsets.ModelViewSet):
 
 # ==================== VENDOR QUOTATION VIEWSET ====================
 
-class VendorQuotationViewSet(viewsets.ModelViewSet):
+class VendorQuotationViewSet(StatusTimelineMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for vendor quotations"""
     serializer_class = VendorQuotationSerializer
+    timeline_document_type = 'quotation'
+    conditional_timestamp_fields = (
+        'updated_at', 'rfq__updated_at',
+        'rfq__purchase_request__updated_at', 'rfq__vendor__updated_at'
+    )
     
     def get_queryset(self):
         queryset = VendorQuotation.objects.select_related(
@@ -1458,15 +1792,9 @@ class VendorQuotationViewSet(viewsets.ModelViewSet):
                 'error': 'Only draft quotations can be submitted'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        quotation.status = 'submitted'
-        quotation.submitted_date = timezone.now()
-        quotation.save()
-        
-        quotation.rfq.status = 'received'
-        quotation.rfq.save()
-        
-        quotation.rfq.purchase_request.status = 'quotation_received'
-        quotation.rfq.purchase_request.save()
+        transition(quotation, 'status', 'submitted', submitted_date=timezone.now())
+        transition(quotation.rfq, 'status', 'received')
+        transition(quotation.rfq.purchase_request, 'status', 'quotation_received')
         
         return Response({
             'message': 'Quotation submitted successfully',
@@ -1476,9 +1804,15 @@ class VendorQuotationViewSet(viewsets.ModelViewSet):
 
 # ==================== PURCHASE ORDER VIEWSET ====================
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(StatusTimelineMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PurchaseOrder.objects.all().prefetch_related('items')
     serializer_class = PurchaseOrderSerializer
+    timeline_document_type = 'purchase_order'
+    conditional_timestamp_fields = (
+        'updated_at', 'items__updated_at', 'items__product__updated_at',
+        'vendor__updated_at', 'invoice__updated_at'
+    )
+    conditional_date_relative = True  # days_until_delivery counts from today
 
     
     def get_queryset(self):
@@ -1562,11 +1896,9 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update status
-        purchase_order.status = new_status
-        if new_status == 'delayed':
-            purchase_order.delay_reason = reason
-        purchase_order.save()
+        # Update status, unless someone else changed it since it was loaded
+        changes = {'delay_reason': reason} if new_status == 'delayed' else {}
+        transition(purchase_order, 'status', new_status, **changes)
         
         # Notify vendor if status changed to received/delivered
         if new_status in ['received', 'delivered'] and purchase_order.vendor.user:
@@ -1583,9 +1915,10 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             'purchase_order': serializer.data
         })
     
-class GoodsReceiptViewSet(viewsets.ModelViewSet):
+class GoodsReceiptViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset=GoodsReceipt.objects.all()
     serializer_class = GoodsReceiptSerializer
+    conditional_timestamp_fields = ('updated_at', 'purchase_order__updated_at')
 
     def perform_create(self, serializer):
         receipt=serializer.save(received_by=self.request.user)
@@ -1616,9 +1949,10 @@ class GoodsReceiptViewSet(viewsets.ModelViewSet):
 
 # ==================== PURCHASE ORDER ITEM VIEWSET ====================
 
-class PurchaseOrderItemViewSet(viewsets.ModelViewSet):
+class PurchaseOrderItemViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PurchaseOrderItem.objects.all()
     serializer_class = PurchaseOrderItemSerializer
+    conditional_timestamp_fields = ('updated_at', 'product__updated_at', 'purchase_order__purchase_request__updated_at')
     
     def get_queryset(self):
         queryset = PurchaseOrderItem.objects.all()
@@ -1632,9 +1966,10 @@ class PurchaseOrderItemViewSet(viewsets.ModelViewSet):
 
 # ==================== INVOICE VIEWSET ====================
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
+    conditional_timestamp_fields = ('updated_at', 'purchase_order__updated_at', 'vendor__updated_at')
     
     def get_queryset(self):
         queryset = Invoice.objects.all()
@@ -1648,9 +1983,62 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-invoice_date')
     
-    @action(detail=True, methods=['get'], url_path='download')
+    @action(detail=False, methods=['get'], url_path='match-exceptions')
+    def match_exceptions(self, request):
+        """
+        Open invoices whose last three-way match raised exceptions
+        GET /api/invoices/match-exceptions/?exception=<code>&vendor=<id>&limit=100&offset=0
+        Results are written by the run_three_way_match command.
+        """
+        from .matching import EXCEPTION_CODES, get_policy, with_exception
+        
+        if not request.user.is_authenticated:
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        profile = getattr(request.user, 'profile', None)
+        if not request.user.is_superuser and profile and profile.role == 'vendor':
+            return Response({
+                'error': 'Match exceptions are not available for vendor accounts'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({
+                'error': 'limit and offset must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        matches = InvoiceMatch.objects.filter(
+            status='exception',
+            invoice__status__in=get_policy()['invoice_statuses'],
+        )
+        exception = request.query_params.get('exception')
+        if exception:
+            if exception not in EXCEPTION_CODES:
+                return Response({
+                    'error': f'Unknown exception: {exception}. Must be one of: {", ".join(EXCEPTION_CODES)}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            matches = with_exception(matches, exception)
+        vendor = request.query_params.get('vendor')
+        if vendor:
+            matches = matches.filter(invoice__vendor_id=vendor)
+        
+        page = matches.select_related(
+            'invoice__vendor', 'invoice__purchase_order'
+        ).order_by('-matched_at', 'invoice_id')[offset:offset + limit]
+        return Response({
+            'count': matches.count(),
+            'results': InvoiceMatchSerializer(page, many=True).data,
+        })
+    
+    @action(detail=True, methods=['get'], url_path='download', throttle_classes=[PdfThrottle])
     def download_invoice(self, request, pk=None):
         """Generate and download invoice as PDF"""
+        # reportlab is only needed here; importing it lazily keeps worker boot fast
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.pdfgen import canvas
+        
         invoice = self.get_object()
         
         # Create PDF
@@ -1717,6 +2105,8 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='create-razorpay-order')
     def create_razorpay_order(self, request, pk=None):
         """Create Razorpay order for the invoice"""
+        import razorpay  # Loaded on first payment, not at worker boot
+        
         invoice = self.get_object()
         
         if invoice.status == 'paid':
@@ -1759,9 +2149,12 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
     @action(detail=True, methods=['post'], url_path='verify-razorpay-payment')
+    @idempotent()
     @transaction.atomic
     def verify_razorpay_payment(self, request, pk=None):
         """Verify Razorpay payment and update invoice status"""
+        import razorpay  # Loaded on first payment, not at worker boot
+        
         invoice = self.get_object()
         
         
@@ -1837,9 +2230,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Update PaymentViewSet to include created_by
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    conditional_timestamp_fields = ('updated_at', 'invoice__updated_at', 'invoice__vendor__updated_at')
     
     def get_queryset(self):
         queryset = Payment.objects.all()
@@ -1864,7 +2258,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
 # ==================== NOTIFICATION VIEWSET ====================
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
 
     
@@ -1876,8 +2270,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         notification = self.get_object()
-        notification.read = True
-        notification.save()
+        transition(notification, 'read', True, allowed=(False,), idempotent=True)
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
     
@@ -1885,143 +2278,157 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 @action(detail=False, methods=['post'])
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(self, request):
-        Notification.objects.filter(user=request.user, read=False).update(read=True)
+        Notification.objects.filter(user=request.user, read=False).update(read=True, updated_at=timezone.now())
         return Response({'status': 'All notifications marked as read'})
 
 
 
 # ==================== VENDOR DASHBOARD VIEWSET ====================
 
-class VendorDashboardViewSet(viewsets.ViewSet):
+class VendorDashboardViewSet(VendorContextMixin, viewsets.ViewSet):
     """ViewSet for vendor portal functionality"""
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    bootstrap_page_size = 20
     
-    def get_vendor(self, request):
-        """Get vendor associated with current user"""
-        user = request.user
-        if not user.is_authenticated:
-            print("❌ User not authenticated")
-            return None
-        
-        print(f"🔍 Looking for vendor for user: {user.username}")
-        
-        # Method 1: Check UserProfile
-        if hasattr(user, 'profile') and user.profile.vendor:
-            vendor = user.profile.vendor
-            print(f"✅ Found vendor via profile: {vendor.company_name}")
-            return vendor
-        
-        # Method 2: Check direct vendor_account relationship
-        if hasattr(user, 'vendor_account'):
-            vendor = user.vendor_account
-            print(f"✅ Found vendor via vendor_account: {vendor.company_name}")
-            return vendor
+    def get_stats_aggregates(self, vendor_id):
+        """(queryset, aggregates) behind the dashboard counters, one conditional aggregate per table"""
+        today = timezone.now().date()
+        return [
+            (RequestForQuotation.objects.filter(vendor_id=vendor_id), {
+                'total_rfqs': Count('id'),
+                'pending_rfqs': Count('id', filter=Q(status='sent')),
+            }),
+            (VendorQuotation.objects.filter(rfq__vendor_id=vendor_id), {
+                'submitted_quotations': Count('id', filter=Q(status='submitted')),
+                'accepted_quotations': Count('id', filter=Q(status='accepted')),
+            }),
+            (PurchaseOrder.objects.filter(vendor_id=vendor_id), {
+                'total_orders': Count('id'),
+                'pending_deliveries': Count('id', filter=~Q(delivery_status='delivered')),
+                'upcoming_deliveries': Count('id', filter=Q(
+                    expected_delivery_date__gte=today,
+                    expected_delivery_date__lte=today + timedelta(days=7),
+                )),
+            }),
+            (Invoice.objects.filter(vendor_id=vendor_id), {
+                'pending_payments': Count('id', filter=Q(status='pending')),
+            }),
+        ]
+    
+    def get_stats(self, vendor_id):
+        """Dashboard counters"""
+        stats = {}
+        for queryset, aggregates in self.get_stats_aggregates(vendor_id):
+            stats.update(queryset.aggregate(**aggregates))
+        return stats
+    
+    def get_rfq_queryset(self, vendor_id):
+        return RequestForQuotation.objects.filter(vendor_id=vendor_id).select_related(
+            'purchase_request',
+            'purchase_request__employee',
+            'purchase_request__product',
+            'vendor',
+            'sent_by',
+            'quotation',
+        ).order_by('-sent_date')
+    
+    def get_quotation_queryset(self, vendor_id):
+        return VendorQuotation.objects.filter(rfq__vendor_id=vendor_id).select_related(
+            'rfq__vendor', 'rfq__purchase_request'
+        ).order_by('-created_at')
+    
+    def get_purchase_order_queryset(self, vendor_id):
+        return PurchaseOrder.objects.filter(vendor_id=vendor_id).select_related(
+            'vendor', 'purchase_request'
+        ).prefetch_related(
+            Prefetch('items', queryset=PurchaseOrderItem.objects.select_related('product'))
+        ).annotate(
+            has_invoice=Exists(Invoice.objects.filter(purchase_order=OuterRef('pk')))
+        ).order_by('-created_at')
+    
+    def get_invoice_queryset(self, vendor_id):
+        return Invoice.objects.filter(vendor_id=vendor_id).select_related(
+            'vendor', 'purchase_order'
+        ).order_by('-invoice_date')
+    
+    @action(detail=False, methods=['get'])
+    def bootstrap(self, request):
+        """
+        Everything the portal needs on load in one response: the stats plus
+        the first page of RFQs, quotations, purchase orders and invoices.
+        `has_more` tells the client to fetch the full my_* list.
+        """
+        vendor_id = request.vendor_id
+        if not vendor_id:
+            return Response(
+                {'error': 'No vendor account associated with this user'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        # Method 3: Query Vendor model directly
         try:
-            vendor = Vendor.objects.get(user=user)
-            print(f"✅ Found vendor via direct query: {vendor.company_name}")
-            return vendor
-        except Vendor.DoesNotExist:
-            print(f"❌ No vendor found for user {user.username}")
-            pass
-        
-        # Method 4: Check UserProfile vendor field
-        try:
-            from .models import UserProfile
-            profile = UserProfile.objects.get(user=user)
-            if profile.vendor:
-                vendor = profile.vendor
-                print(f"✅ Found vendor via UserProfile query: {vendor.company_name}")
-                return vendor
-        except UserProfile.DoesNotExist:
-            print(f"❌ No UserProfile found for user {user.username}")
-            pass
+            page_size = min(max(int(request.query_params.get('limit', self.bootstrap_page_size)), 1), 100)
+        except ValueError:
+            page_size = self.bootstrap_page_size
+        
+        def first_page(queryset, serializer_class):
+            rows = list(queryset[:page_size + 1])
+            return {
+                'results': serializer_class(rows[:page_size], many=True).data,
+                'has_more': len(rows) > page_size,
+            }
         
-        return None
+        return Response({
+            'stats': self.get_stats(vendor_id),
+            'rfqs': first_page(self.get_rfq_queryset(vendor_id), RequestForQuotationSerializer),
+            'quotations': first_page(self.get_quotation_queryset(vendor_id), VendorQuotationSerializer),
+            'purchase_orders': first_page(self.get_purchase_order_queryset(vendor_id), VendorPurchaseOrderSerializer),
+            'invoices': first_page(self.get_invoice_queryset(vendor_id), InvoiceSerializer),
+        })
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Get vendor dashboard statistics"""
-        print(f"\n📊 Dashboard stats requested by: {request.user.username if request.user.is_authenticated else 'Anonymous'}")
-        
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        print(f"✅ Calculating stats for vendor: {vendor.company_name}")
-        
-        stats = {
-            'total_rfqs': RequestForQuotation.objects.filter(vendor=vendor).count(),
-            'pending_rfqs': RequestForQuotation.objects.filter(vendor=vendor, status='sent').count(),
-            'submitted_quotations': VendorQuotation.objects.filter(rfq__vendor=vendor, status='submitted').count(),
-            'accepted_quotations': VendorQuotation.objects.filter(rfq__vendor=vendor, status='accepted').count(),
-            'total_orders': PurchaseOrder.objects.filter(vendor=vendor).count(),
-            'pending_deliveries': PurchaseOrder.objects.filter(vendor=vendor).exclude(delivery_status='delivered').count(),
-            'upcoming_deliveries': PurchaseOrder.objects.filter(
-                vendor=vendor,
-                expected_delivery_date__gte=timezone.now().date(),
-                expected_delivery_date__lte=timezone.now().date() + timedelta(days=7)
-            ).count(),
-            'pending_payments': Invoice.objects.filter(vendor=vendor, status='pending').count(),
-        }
-        
-        print(f"📈 Stats: {stats}")
-        return Response(stats)
+        return Response(self.get_stats(vendor_id))
     
     @action(detail=False, methods=['get'])
     def my_rfqs(self, request):
         """Get all RFQs for the logged-in vendor"""
-        print(f"\n📨 RFQs requested by: {request.user.username if request.user.is_authenticated else 'Anonymous'}")
-        
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        print(f"🔍 Fetching RFQs for vendor: {vendor.company_name} (ID: {vendor.id})")
-        
-        rfqs = RequestForQuotation.objects.filter(vendor=vendor).select_related(
-            'purchase_request',
-            'purchase_request__employee',
-            'purchase_request__product',
-            'vendor',
-            'sent_by'
-        ).prefetch_related('quotation').order_by('-sent_date')
-        
-        print(f"📊 Found {rfqs.count()} RFQs")
-        
-        for rfq in rfqs:
-            print(f"  - RFQ #{rfq.rfq_number}: Status={rfq.status}, PR={rfq.purchase_request.item_name if rfq.purchase_request else 'N/A'}")
+        rfqs = self.get_rfq_queryset(vendor_id)
         
         status_filter = request.query_params.get('status')
         if status_filter:
             rfqs = rfqs.filter(status=status_filter)
-            print(f"🔍 Filtered to {rfqs.count()} RFQs with status={status_filter}")
         
         serializer = RequestForQuotationSerializer(rfqs, many=True)
-        
-        print(f"✅ Returning {len(serializer.data)} serialized RFQs")
-        
+
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def my_quotations(self, request):
         """Get all quotations submitted by the vendor"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        quotations = VendorQuotation.objects.filter(rfq__vendor=vendor).order_by('-created_at')
+        quotations = self.get_quotation_queryset(vendor_id)
         
         status_filter = request.query_params.get('status')
         if status_filter:
@@ -2033,16 +2440,14 @@ class VendorDashboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def my_purchase_orders(self, request):
         """Get all purchase orders for the logged-in vendor"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        purchase_orders = PurchaseOrder.objects.filter(
-            vendor=vendor
-        ).prefetch_related('items').order_by('-created_at')
+        purchase_orders = self.get_purchase_order_queryset(vendor_id)
         
         status_filter = request.query_params.get('status', None)
         if status_filter:
@@ -2054,29 +2459,29 @@ class VendorDashboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def my_invoices(self, request):
         """Get all invoices for the logged-in vendor"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        invoices = Invoice.objects.filter(vendor=vendor).order_by('-invoice_date')
+        invoices = self.get_invoice_queryset(vendor_id)
         serializer = InvoiceSerializer(invoices, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], url_path='update_delivery_status')
     def update_delivery_status(self, request, pk=None):
         """Update delivery status of a purchase order"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
         try:
-            purchase_order = PurchaseOrder.objects.get(id=pk, vendor=vendor)
+            purchase_order = PurchaseOrder.objects.get(id=pk, vendor_id=vendor_id)
         except PurchaseOrder.DoesNotExist:
             return Response(
                 {'error': 'Purchase order not found'},
@@ -2110,15 +2515,15 @@ class VendorDashboardViewSet(viewsets.ViewSet):
     @method_decorator(csrf_exempt)
     def upload_invoice(self, request, pk=None):
         """Upload invoice file for an invoice"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
         try:
-            invoice = Invoice.objects.get(id=pk, vendor=vendor)
+            invoice = Invoice.objects.get(id=pk, vendor_id=vendor_id)
         except Invoice.DoesNotExist:
             return Response(
                 {'error': 'Invoice not found'},
@@ -2165,15 +2570,15 @@ class VendorDashboardViewSet(viewsets.ViewSet):
     @transaction.atomic
     def submit_quotation(self, request, pk=None):
         """Submit a quotation for an RFQ"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
         try:
-            rfq = RequestForQuotation.objects.get(id=pk, vendor=vendor)
+            rfq = RequestForQuotation.objects.get(id=pk, vendor_id=vendor_id)
         except RequestForQuotation.DoesNotExist:
             return Response(
                 {'error': 'RFQ not found'},
@@ -2220,11 +2625,12 @@ class VendorDashboardViewSet(viewsets.ViewSet):
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['post'], url_path='create_invoice')
+    @idempotent()
     @transaction.atomic
     def create_invoice(self, request):
         """Create invoice for a purchase order"""
-        vendor = self.get_vendor(request)
-        if not vendor:
+        vendor_id = request.vendor_id
+        if not vendor_id:
             return Response(
                 {'error': 'No vendor account associated with this user'},
                 status=status.HTTP_403_FORBIDDEN
@@ -2232,7 +2638,7 @@ class VendorDashboardViewSet(viewsets.ViewSet):
         
         try:
             purchase_order_id = request.data.get('purchase_order')
-            purchase_order = PurchaseOrder.objects.get(id=purchase_order_id, vendor=vendor)
+            purchase_order = PurchaseOrder.objects.select_related('vendor').get(id=purchase_order_id, vendor_id=vendor_id)
         except PurchaseOrder.DoesNotExist:
             return Response(
                 {'error': 'Purchase order not found'},
@@ -2249,7 +2655,7 @@ class VendorDashboardViewSet(viewsets.ViewSet):
         # Create the invoice
         invoice = Invoice.objects.create(
             invoice_number=request.data.get('invoice_number'),
-            vendor=vendor,
+            vendor_id=vendor_id,
             purchase_order=purchase_order,
             invoice_date=request.data.get('invoice_date'),
             due_date=request.data.get('due_date'),
@@ -2267,7 +2673,7 @@ class VendorDashboardViewSet(viewsets.ViewSet):
             Notification.objects.create(
                 user=admin,
                 type='general',
-                message=f'New invoice {invoice.invoice_number} (₹{invoice.total_amount:,.2f}) submitted by {vendor.company_name}',
+                message=f'New invoice {invoice.invoice_number} (₹{invoice.total_amount:,.2f}) submitted by {purchase_order.vendor.company_name}',
                 related_order=purchase_order
             )
         
@@ -2275,22 +2681,20 @@ class VendorDashboardViewSet(viewsets.ViewSet):
         try:
             admin_emails = [admin.email for admin in admins if admin.email]
             if admin_emails:
-                send_mail(
+                queue_email(
                     subject=f'New Invoice Received - {invoice.invoice_number}',
                     message=f"""
 A new invoice has been submitted:
 
 Invoice Number: {invoice.invoice_number}
-Vendor: {vendor.company_name}
+Vendor: {purchase_order.vendor.company_name}
 PO Number: {purchase_order.po_number}
 Amount: ₹{invoice.total_amount:,.2f}
 Due Date: {invoice.due_date}
 
 Please review in the admin dashboard.
                     """,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=admin_emails,
-                    fail_silently=True,
                 )
         except Exception as e:
             print(f"Failed to send email: {e}")
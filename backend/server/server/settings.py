@@ -58,10 +58,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # ✅ CORS must be early
+    'procurement.middleware.DatabaseMetricsMiddleware',  # ✅ Before anything that queries; reuse/wait stats for /api/admin/db-pool/
     'django.contrib.sessions.middleware.SessionMiddleware',  # ✅ Sessions before Auth
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',  # ✅ CSRF enabled
     'django.contrib.auth.middleware.AuthenticationMiddleware',  # ✅ After sessions
+    'procurement.middleware.SessionRefreshMiddleware',  # ✅ After auth, refreshes expiry when due
+    'procurement.middleware.ReplicaRoutingMiddleware',  # ✅ Safe-method reads go to the replica when configured
+    'procurement.middleware.StatusEventActorMiddleware',  # ✅ Status timeline events record the request user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,9 +105,34 @@ DATABASES = {
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
+        # Persistent connections: reuse each worker thread's connection for this
+        # many seconds instead of reconnecting per request. Set DB_CONN_MAX_AGE=0
+        # under ASGI, where requests do not reuse threads.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Ping a reused connection before its first query in each request
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() != 'false',
     }
 }
 
+# Optional read replica. Safe-method requests read from it via
+# procurement.routers.ReplicaRouter and ReplicaRoutingMiddleware; writes
+# always go to 'default'. Unset values are copied from 'default'.
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = 5  # Reads stay on the primary this long after a client's write
+
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'ENGINE': os.environ.get('DB_REPLICA_ENGINE', DATABASES['default']['ENGINE']),
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['procurement.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -168,22 +197,117 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 
 # ============================================
 # SESSION CONFIGURATION
 # ============================================
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # ✅ Store in database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'  # ✅ Database, reads served from cache
 SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_AGE = 86400  # ✅ 24 hours (1 day)
 SESSION_COOKIE_HTTPONLY = True  # ✅ Prevent JavaScript access (security)
 SESSION_COOKIE_SAMESITE = 'Lax'  # ✅ CRITICAL: Must be 'Lax' for cross-origin
 SESSION_COOKIE_SECURE = False  # ✅ False for development (no HTTPS)
-SESSION_SAVE_EVERY_REQUEST = True  # ✅ Refresh session on every request
+SESSION_SAVE_EVERY_REQUEST = False  # ✅ Only write modified sessions
+SESSION_REFRESH_THRESHOLD = 3600  # ✅ Extend expiry at most once an hour (SessionRefreshMiddleware)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # ✅ Session persists after browser close
 
 
+# ============================================
+# CACHE CONFIGURATION
+# ============================================
+# Local memory works out of the box for a single process. With several
+# workers, point CACHE_BACKEND/CACHE_LOCATION at a shared backend, e.g.
+# django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'procurement-cache'),
+        'TIMEOUT': 300,
+    }
+}
+RESPONSE_CACHE_TIMEOUT = 300  # Seconds a cached categories/products/vendors/employees response is kept
+
+
+# ============================================
+# REORDER POLICY (run_reorder_scan)
+# ============================================
+REORDER_POLICY = {
+    'target_multiplier': 2,  # Order up to reorder_level * target_multiplier
+    'minimum_quantity': 1,
+    'department': 'Inventory',
+    'urgency_level': 'medium',
+    'requester': None,  # Username the requests are raised for; None = first active superuser
+}
+
+# ============================================
+# THREE-WAY MATCH (run_three_way_match)
+# ============================================
+THREE_WAY_MATCH = {
+    'price_tolerance_percent': 2,  # Billed may exceed ordered/received value by this much...
+    'price_tolerance_amount': 1,  # ...or by this flat amount, whichever is larger
+    'quantity_tolerance_percent': 0,  # Allowed over-delivery against the ordered quantity
+    'invoice_statuses': ('pending', 'overdue'),  # Invoices that are (re)matched on every run
+}
+
+
+# ============================================
+# BACKGROUND JOBS (run_workers)
+# ============================================
+BACKGROUND_JOBS = {
+    'io_threads': 8,  # Thread pool for the 'io' queue (email)
+    'cpu_processes': None,  # Process pool for the 'cpu' queue; None = CPU count
+    'batch_size': 10,  # Jobs claimed per queue per poll
+    'poll_interval': 1.0,  # Seconds between polls when no job is due
+    'retry_backoff_seconds': 30,  # First retry delay, doubled per attempt
+    'max_backoff_seconds': 3600,
+    'keep_finished_days': 7,  # Finished jobs are purged after this
+}
+
+# ============================================
+# IDEMPOTENCY KEYS (Idempotency-Key header on side-effecting POSTs)
+# ============================================
+IDEMPOTENCY = {
+    'ttl_hours': 24,  # Completed responses are replayed to retries this long
+    'lock_timeout': 300,  # Seconds before a claim left by a dead request may be taken over
+}
+
+# ============================================
+# THROTTLING (token buckets, see procurement.throttling)
+# ============================================
+THROTTLING = {
+    'enabled': os.environ.get('THROTTLING_ENABLED', 'true').lower() == 'true',
+    'cache': 'default',  # Use a shared CACHE_BACKEND to enforce limits across workers
+    'num_proxies': int(os.environ.get('THROTTLING_NUM_PROXIES', '0')),  # Reverse proxies appending X-Forwarded-For
+    'scopes': {
+        # Scope: {'ip' | 'user' | 'global': 'N/period'}, a bucket of N tokens refilled N per period
+        # No global bucket on public endpoints: one client rotating addresses could drain it for everyone
+        'login': {'ip': '10/min'},  # Login and token endpoints
+        'register': {'ip': '5/hour'},  # Vendor self-registration
+        'pdf': {'ip': '60/min', 'user': '30/min', 'global': '120/min'},  # Invoice PDF download
+        'analytics': {'user': '30/min', 'global': '120/min'},  # Spend and cycle-time aggregations
+    },
+}
+
+# ============================================
+# STARTUP PROFILE (startup_profile)
+# ============================================
+STARTUP_PROFILE = {
+    'budget_ms': 2000,  # Max median cold start of a WSGI worker, process start to URLconf loaded
+    'lazy_modules': ('razorpay', 'reportlab', 'numpy'),  # Must not be imported at startup
+}
+
+# ============================================
+# ASYNC VENDOR PORTAL (procurement.async_views)
+# ============================================
+# Serve the vendor portal's read endpoints from async views when running
+# under ASGI. Under WSGI they still work, one event loop per request.
+ASYNC_VENDOR_PORTAL = os.environ.get('ASYNC_VENDOR_PORTAL', 'true').lower() != 'false'
+
+
 # ============================================
 # CSRF CONFIGURATION
 # ============================================
@@ -203,6 +327,7 @@ CSRF_COOKIE_SECURE = False  # ✅ False for development (no HTTPS)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',  # ✅ Use session auth
+        'procurement.authentication.SignedTokenAuthentication',  # ✅ Optional stateless Bearer tokens
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # ✅ Allow unauthenticated access
@@ -217,8 +342,9 @@ REST_FRAMEWORK = {
 
 
 # ============================================
-# JWT CONFIGURATION (if needed in future)
+# TOKEN CONFIGURATION
 # ============================================
+# ACCESS_TOKEN_LIFETIME is the lifetime of procurement.authentication tokens
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -466,6 +466,8 @@ const fetchInvoices = async () => {
   try {
     const res = await apiFetch(`${API_BASE_URL}/rfqs/${rfqId}/accept_quotation/`, {
       method: 'POST',
+      // A retry after a dropped connection gets the same PO instead of a second one
+      headers: { 'Idempotency-Key': `accept-quotation-${rfqId}` },
       body: JSON.stringify({ 
         create_po: createPO,
         expected_delivery_date: null // Will use quotation's estimated delivery
@@ -4326,6 +4328,7 @@ function PaymentModal({ invoice, onClose, onSuccess }) {
               `${API_BASE_URL}/invoices/${invoice.id}/verify-razorpay-payment/`,
               {
                 method: 'POST',
+                headers: { 'Idempotency-Key': `razorpay-payment-${response.razorpay_payment_id}` },
                 body: JSON.stringify({
                   razorpay_order_id: response.razorpay_order_id,
                   razorpay_payment_id: response.razorpay_payment_id,
@@ -29,51 +29,50 @@ export default function VendorDashboard() {
     fetchDashboardData();
   }, []);
 
+  const fetchList = async (action) => {
+    const res = await fetch(
+      `${API_BASE_URL}/vendor-dashboard/${action}/`,
+      { credentials: 'include' }
+    );
+    if (!res.ok) {
+      console.error(`❌ Failed to fetch ${action}:`, res.status);
+      return null;
+    }
+    return res.json();
+  };
+
   const fetchDashboardData = async () => {
     try {
-      console.log('Fetching vendor dashboard data...');
-      
-      const rfqRes = await fetch(
-        `${API_BASE_URL}/vendor-dashboard/my_rfqs/`,
-        { credentials: 'include' }
-      );
-      
-      if (rfqRes.ok) {
-        const rfqData = await rfqRes.json();
-        console.log('✅ RFQs received:', rfqData);
-        setRfqs(rfqData);
-      } else {
-        console.error('❌ Failed to fetch RFQs:', rfqRes.status);
-      }
-
-      const quotRes = await fetch(
-        `${API_BASE_URL}/vendor-dashboard/my_quotations/`,
-        { credentials: 'include' }
-      );
-      if (quotRes.ok) {
-        const quotData = await quotRes.json();
-        console.log('Quotations:', quotData);
-        setQuotations(quotData);
-      }
-
-      const poRes = await fetch(
-        `${API_BASE_URL}/vendor-dashboard/my_purchase_orders/`,
+      // One request for stats and the first page of every tab
+      const res = await fetch(
+        `${API_BASE_URL}/vendor-dashboard/bootstrap/`,
         { credentials: 'include' }
       );
-      if (poRes.ok) {
-        const poData = await poRes.json();
-        console.log('✅ Purchase Orders received:', poData);
-        setPurchaseOrders(poData);
+      if (!res.ok) {
+        console.error('❌ Failed to fetch vendor dashboard:', res.status);
+        return;
       }
+      const data = await res.json();
 
-      const invRes = await fetch(
-        `${API_BASE_URL}/vendor-dashboard/my_invoices/`,
-        { credentials: 'include' }
+      const collections = [
+        ['rfqs', 'my_rfqs', setRfqs],
+        ['quotations', 'my_quotations', setQuotations],
+        ['purchase_orders', 'my_purchase_orders', setPurchaseOrders],
+        ['invoices', 'my_invoices', setInvoices],
+      ];
+
+      setStats(data.stats);
+      collections.forEach(([key, , setter]) => setter(data[key].results));
+
+      // Tabs show everything, so load the rest of any collection that was cut off
+      await Promise.all(
+        collections
+          .filter(([key]) => data[key].has_more)
+          .map(async ([, action, setter]) => {
+            const rows = await fetchList(action);
+            if (rows) setter(rows);
+          })
       );
-      if (invRes.ok) {
-        const invData = await invRes.json();
-        setInvoices(invData);
-      }
     } catch (err) {
       console.error('Error fetching data:', err);
     } finally {
@@ -1031,7 +1030,9 @@ function DeliveryStatusModal({ po, onClose, onSuccess }) {
         method: 'POST',
         headers: { 
           'Content-Type': 'application/json',
-          'X-CSRFToken': csrfToken
+          'X-CSRFToken': csrfToken,
+          // One invoice per PO: a retried request replays the first response
+          'Idempotency-Key': `create-invoice-${purchaseOrder.id}`
         },
         credentials: 'include',
         body: JSON.stringify(invoiceData),
@@ -1248,7 +1249,8 @@ function InvoiceCreateModal({ po, onClose, onSuccess }) {
         method: 'POST',
         headers: { 
           'Content-Type': 'application/json',
-          'X-CSRFToken': csrfToken
+          'X-CSRFToken': csrfToken,
+          'Idempotency-Key': `create-invoice-${po.id}`
         },
         credentials: 'include',
         body: JSON.stringify(payload),